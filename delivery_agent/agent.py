@@ -1,23 +1,52 @@
 """
 Delivery Agent implementation with various planners.
 """
-import heapq
+import itertools
 import time
-from typing import List, Tuple, Optional, Callable
-from environment import GridEnvironment
+import numpy as np
+from typing import List, Tuple, Optional, Callable, Iterable
+from environment import GridEnvironment, MOVES
+from dstar_lite import DStarLite
+from hierarchy import ClusterGraph
+from landmarks import LandmarkTable
+from fields import field_for, descend
+from path_cache import PathCache
+from components import ComponentIndex
+import bidirectional
+import flat_search
+import instrument
+import local_search
+from flat_search import FlatGrid
+
+def _unit_cost(row: int, col: int) -> int:
+    return 1
 
 class DeliveryAgent:
-    def __init__(self, env: GridEnvironment, start: Tuple[int, int], goal: Tuple[int, int]):
+    UNCACHED = {'d_star_lite'}  # planners whose result depends on state kept on the agent
+    heap_ops = instrument.HEAP_OPS  # (push, pop) for open lists; counting versions while instrumented
+    use_flat = True  # run the flat_search loops on dense maps (False: always the tuple-keyed loops)
+
+    def __init__(self, env: GridEnvironment, start: Tuple[int, int], goal: Tuple[int, int], fuel: Optional[int] = None,
+                 cache: Optional[PathCache] = None, instrument: bool = False):
         self.env = env
         self.start = start
         self.goal = goal
+        self.fuel = fuel  # None: unlimited
+        self.fuel_capacity = fuel  # tank size when refuelling
+        self.cache = cache  # shared result cache for run_planner
+        self._d_star: Optional[DStarLite] = None
+        self.search_info: dict = {}  # extra figures from the last planner run, merged into run_planner results
+        self.instrument = instrument  # collect search counters and timers into run_planner results
+        self.stats: Optional[instrument.SearchStats] = None  # counters of the run in progress, when instrumented
 
     def bfs(self, dynamic: bool = False) -> Optional[List[Tuple[int, int]]]:
         """
         Breadth-First Search. For dynamic, uses time but cost 1 per step.
         """
         if dynamic:
-            return self._uniform_cost_search(dynamic=True, cost_func=lambda r,c: 1)
+            return self._uniform_cost_search(dynamic=True, cost_func=_unit_cost)
+        if self.use_flat and self.env.dense:
+            return flat_search.bfs(self._flat(), self.start, self.goal)
         # Static BFS
         from collections import deque
         queue = deque([(self.start, 0)])  # (position, steps)
@@ -45,13 +74,17 @@ class DeliveryAgent:
         """
         Helper for uniform cost and BFS.
         """
+        if self.use_flat and self.env.dense and cost_func in (self.env.get_cost, _unit_cost):
+            return flat_search.uniform_cost(self._flat(), self.start, self.goal, dynamic,
+                                            unit=cost_func is _unit_cost)
+        push, pop = self.heap_ops
         pq = [(0, self.start, 0)]  # (cost, position, time)
         visited = set()
         parent = {}
         cost_so_far = {self.start: 0}
 
         while pq:
-            current_cost, current, t = heapq.heappop(pq)
+            current_cost, current, t = pop(pq)
             if current == self.goal:
                 return self._reconstruct_path(parent, current)
             state = (current, t) if dynamic else current
@@ -66,24 +99,31 @@ class DeliveryAgent:
                 if new_state not in visited and not self.env.is_occupied(nr, nc, new_t):
                     if (nr, nc) not in cost_so_far or new_cost < cost_so_far[(nr, nc)]:
                         cost_so_far[(nr, nc)] = new_cost
-                        heapq.heappush(pq, (new_cost, (nr, nc), new_t))
+                        push(pq, (new_cost, (nr, nc), new_t))
                         parent[(nr, nc)] = current
         return None
 
-    def a_star(self, dynamic: bool = False) -> Optional[List[Tuple[int, int]]]:
+    def a_star(self, dynamic: bool = False, heuristic: Optional[Callable[[Tuple[int, int]], float]] = None) -> Optional[List[Tuple[int, int]]]:
         """
-        A* Search with Manhattan heuristic.
+        A* Search with Manhattan heuristic, or any admissible heuristic(pos) passed in.
         """
-        def heuristic(pos):
-            return abs(pos[0] - self.goal[0]) + abs(pos[1] - self.goal[1])
+        default_heuristic = heuristic is None
+        if default_heuristic:
+            def heuristic(pos):
+                return abs(pos[0] - self.goal[0]) + abs(pos[1] - self.goal[1])
+        self.search_info['heuristic_estimate'] = heuristic(self.start)
+        if self.use_flat and self.env.dense:
+            return flat_search.a_star(self._flat(), self.start, self.goal, dynamic,
+                                      None if default_heuristic else heuristic)
 
+        push, pop = self.heap_ops
         pq = [(0, self.start, 0)]  # (f, position, time)
         visited = set()
         parent = {}
         g_cost = {self.start: 0}
 
         while pq:
-            f, current, t = heapq.heappop(pq)
+            f, current, t = pop(pq)
             if current == self.goal:
                 return self._reconstruct_path(parent, current)
             state = (current, t) if dynamic else current
@@ -99,44 +139,515 @@ class DeliveryAgent:
                     if (nr, nc) not in g_cost or new_g < g_cost[(nr, nc)]:
                         g_cost[(nr, nc)] = new_g
                         f_new = new_g + heuristic((nr, nc))
-                        heapq.heappush(pq, (f_new, (nr, nc), new_t))
+                        push(pq, (f_new, (nr, nc), new_t))
                         parent[(nr, nc)] = current
         return None
 
-    def local_search_replan(self, dynamic: bool = False, max_iter: int = 1000) -> Optional[List[Tuple[int, int]]]:
+    def ara_star(self, dynamic: bool = False, epsilon: float = 3.0, epsilon_step: float = 0.5,
+                 time_budget: Optional[float] = None, max_expansions: Optional[int] = None) -> Optional[List[Tuple[int, int]]]:
         """
-        Local search replanning using hill-climbing with random restarts.
-        For simplicity, start from start, try to move towards goal, if blocked, random restart.
+        Anytime Repairing A* (Likhachev et al.): a weighted A* search with
+        f = g + epsilon * h finds a first path quickly, then epsilon is lowered
+        by epsilon_step and the search is repaired (reusing its g-values) until
+        epsilon reaches 1 or the wall-clock (seconds) or expansion budget runs
+        out. Returns the best path found in time, or None if the budget ran out
+        before the first one. search_info['bound'] is the proven suboptimality
+        factor of that path (1.0 = optimal).
         """
-        import random
-        best_path = None
-        best_cost = float('inf')
-        for restart in range(10):  # random restarts
-            current = self.start
-            path = [current]
-            cost = 0
-            t = 0
-            for _ in range(max_iter):
-                if current == self.goal:
-                    if cost < best_cost:
-                        best_cost = cost
-                        best_path = path[:]
+        deadline = time.time() + time_budget if time_budget is not None else None
+        # Dynamic states are (cell, time); past the last scheduled obstacle step time no longer matters
+        horizon = max(self.env.occupancy.by_time, default=-1) + 1 if dynamic else 0
+
+        def heuristic(state):
+            return abs(state[0][0] - self.goal[0]) + abs(state[0][1] - self.goal[1])
+
+        start = (self.start, 0)
+        g = {start: 0}
+        parent = {start: None}
+        open_f = {}  # state -> f of its live heap entry
+        heap = []
+        closed = set()
+        incons = set()
+        goal_state = start if self.start == self.goal else None  # cheapest goal state reached so far
+        best_path, bound = None, None
+        expansions = 0
+        self.search_info.update({'heuristic_estimate': heuristic(start), 'expansions': 0, 'iterations': 0})
+
+        heap_push, heap_pop = self.heap_ops
+
+        def push(state):
+            open_f[state] = g[state] + epsilon * heuristic(state)
+            heap_push(heap, (open_f[state], g[state], state))
+
+        def out_of_budget():
+            return (max_expansions is not None and expansions >= max_expansions) or \
+                (deadline is not None and time.time() >= deadline)
+
+        push(start)
+        while True:
+            # ImprovePath: expand until no open state could lead to a cheaper goal
+            exhausted = False
+            while heap:
+                f, _, state = heap[0]
+                if open_f.get(state) != f:
+                    heap_pop(heap)
+                    continue
+                if goal_state is not None and g[goal_state] <= f:
+                    break
+                if out_of_budget():
+                    exhausted = True
                     break
-                neighbors = [(nr, nc) for nr, nc in self.env.neighbors(*current) if not self.env.is_occupied(nr, nc, t)]
-                if not neighbors:
-                    break  # stuck
-                # Hill-climbing: choose neighbor closest to goal
-                def dist(pos):
-                    return abs(pos[0] - self.goal[0]) + abs(pos[1] - self.goal[1])
-                neighbors.sort(key=dist)
-                next_pos = neighbors[0]
-                path.append(next_pos)
-                cost += self.env.get_cost(*next_pos)
-                current = next_pos
-                t += 1 if dynamic else 0
-            # If not reached, random restart by choosing random start neighbor or something, but simple
+                heap_pop(heap)
+                del open_f[state]
+                closed.add(state)
+                expansions += 1
+                cell, t = state
+                new_t = min(t + 1, horizon) if dynamic else 0
+                for nr, nc in self.env.neighbors(*cell):
+                    if self.env.is_occupied(nr, nc, t + 1 if dynamic else 0):
+                        continue
+                    nxt = ((nr, nc), new_t)
+                    new_g = g[state] + self.env.get_cost(nr, nc)
+                    if new_g < g.get(nxt, float('inf')):
+                        g[nxt] = new_g
+                        parent[nxt] = state
+                        if (nr, nc) == self.goal and (goal_state is None or new_g < g[goal_state]):
+                            goal_state = nxt
+                        if nxt in closed:
+                            incons.add(nxt)
+                        else:
+                            push(nxt)
+            self.search_info['expansions'] = expansions
+            if exhausted:
+                break
+            if goal_state is None:
+                return None  # nothing left to expand: no path at all
+            self.search_info['iterations'] += 1
+            path, state = [], goal_state
+            while state is not None:
+                path.append(state[0])
+                state = parent[state]
+            best_path = path[::-1]
+            lower = min((g[s] + heuristic(s) for s in itertools.chain(open_f, incons)), default=g[goal_state])
+            bound = min(epsilon, g[goal_state] / lower) if lower > 0 else 1.0
+            self.search_info['epsilon'] = epsilon
+            if epsilon <= 1.0:
+                break
+            # Lower epsilon and reopen the inconsistent states
+            epsilon = max(1.0, epsilon - epsilon_step)
+            states = list(open_f) + list(incons)
+            open_f.clear()
+            heap.clear()
+            incons.clear()
+            closed.clear()
+            for state in states:
+                push(state)
+        if best_path is not None:
+            self.search_info['bound'] = max(1.0, bound)
+        self.search_info['budget_exhausted'] = exhausted
         return best_path
 
+    def alt_a_star(self, dynamic: bool = False, landmarks: int = 8) -> Optional[List[Tuple[int, int]]]:
+        """
+        A* with the ALT landmark heuristic. The landmark tables are built once per
+        map and cached on the environment (or loaded from disk with
+        LandmarkTable.load(path).attach(env)). Needs whole-grid arrays; on a
+        tiled environment this falls back to a_star.
+        """
+        if not self.env.dense:
+            return self.a_star(dynamic)
+        with instrument.phase(self.stats, 'preprocess'):
+            table = LandmarkTable.for_env(self.env, landmarks)
+        return self.a_star(dynamic, heuristic=table.heuristic(self.goal))
+
+    def sipp(self, dynamic: bool = True, park: bool = False) -> Optional[List[Tuple[int, int]]]:
+        """
+        Safe Interval Path Planning. States are (cell, safe interval) pairs, where
+        a safe interval is a maximal run of time steps in which no dynamic obstacle
+        holds the cell, and the agent may wait in place (waiting burns no fuel).
+        Minimises path cost, preferring earlier arrival on ties. The path repeats
+        a cell for every step spent waiting, so path[t] is the position at time t.
+        With park=True the agent stays at the goal once there, so it may only
+        finish in the goal's last (open-ended) safe interval.
+        With dynamic=False this is plain A*.
+        """
+        if not dynamic:
+            return self.a_star(dynamic=False)
+
+        def heuristic(pos):
+            return abs(pos[0] - self.goal[0]) + abs(pos[1] - self.goal[1])
+
+        intervals = {}
+        def safe(cell):
+            if cell not in intervals:
+                intervals[cell] = self.env.safe_intervals(*cell)
+            return intervals[cell]
+
+        # The agent is at its start at t=0 whether or not that is safe.
+        start_intervals = safe(self.start)
+        if start_intervals and start_intervals[0][0] == 1:
+            intervals[self.start] = [(0, start_intervals[0][1])] + start_intervals[1:]
+        elif not start_intervals or start_intervals[0][0] > 1:
+            intervals[self.start] = [(0, 0)] + start_intervals
+        push, pop = self.heap_ops
+        pq = [(heuristic(self.start), 0, 0, self.start, 0)]  # (f, -cost, time, position, interval index)
+        expanded = {}  # (position, interval index) -> [(cost, time)] labels already expanded
+        best_cost = {(self.start, 0): 0}  # (position, arrival time) -> cost
+        parent = {}
+
+        while pq:
+            f, g, t, current, idx = pop(pq)
+            g = -g
+            labels = expanded.setdefault((current, idx), [])
+            if any(g2 <= g and t2 <= t for g2, t2 in labels):
+                continue  # an earlier, no more expensive arrival can do anything this one can
+            labels.append((g, t))
+            if current == self.goal and not (park and intervals[current][idx][1] != float('inf')):
+                return self._reconstruct_timed_path(parent, (current, t))
+            leave_by = intervals[current][idx][1]
+            for nr, nc in self.env.neighbors(*current):
+                new_g = g + self.env.get_cost(nr, nc)
+                for j, (first, last) in enumerate(safe((nr, nc))):
+                    arrive = max(t + 1, first)
+                    if arrive - 1 > leave_by:
+                        break  # would have to wait past the end of the current interval
+                    if arrive > last:
+                        continue
+                    key = ((nr, nc), arrive)
+                    if new_g < best_cost.get(key, float('inf')):
+                        best_cost[key] = new_g
+                        parent[key] = (current, t)
+                        push(pq, (new_g + heuristic((nr, nc)), -new_g, arrive, (nr, nc), j))  # deeper first on ties
+        return None
+
+    def _reconstruct_timed_path(self, parent: dict, state: Tuple[Tuple[int, int], int]) -> List[Tuple[int, int]]:
+        path = []
+        while state is not None:
+            cell, t = state
+            path.append(cell)
+            state = parent.get(state)
+            if state is not None:
+                path.extend([state[0]] * (t - state[1] - 1))  # waiting steps
+        path.reverse()
+        return path
+
+    def jump_point_search(self, dynamic: bool = False) -> Optional[List[Tuple[int, int]]]:
+        """
+        Jump Point Search for the 4-connected grid. Inside regions of equal terrain
+        cost, straight runs are skipped in one step and only cells with forced
+        neighbours become search nodes. Cells whose cost differs from a neighbour's
+        are always stopped at and expanded like plain A*, so paths cost the same as
+        a_star. Static maps only; with dynamic=True this falls back to a_star.
+        """
+        if dynamic:
+            return self.a_star(dynamic=True)
+        env = self.env
+        goal = self.goal
+
+        free_cache = {}
+        def free(r, c):
+            if (r, c) not in free_cache:
+                free_cache[(r, c)] = 0 <= r < env.rows and 0 <= c < env.cols and not env.is_occupied(r, c, 0)
+            return free_cache[(r, c)]
+
+        uniform_cache = {}
+        def uniform(r, c):
+            # True if every enterable neighbour has the same terrain cost as (r, c)
+            if (r, c) not in uniform_cache:
+                cost = env.get_cost(r, c)
+                uniform_cache[(r, c)] = all(env.get_cost(r + dr, c + dc) == cost for dr, dc in MOVES if free(r + dr, c + dc))
+            return uniform_cache[(r, c)]
+
+        def stop_here(r, c):
+            return (r, c) == goal or not uniform(r, c)
+
+        def detour_differs(r, c, cost):
+            # The symmetric detour through (r, c) is unavailable or costs a different amount
+            return not free(r, c) or env.get_cost(r, c) != cost
+
+        def jump(r, c, dr, dc):
+            """
+            Walk from (r, c) in direction (dr, dc); return (jump point, cost) or None.
+            """
+            cost = 0
+            while True:
+                r, c = r + dr, c + dc
+                if not free(r, c):
+                    return None
+                here = env.get_cost(r, c)
+                cost += here
+                if stop_here(r, c):
+                    return (r, c), cost
+                if dr == 0:
+                    if (free(r - 1, c) and detour_differs(r - 1, c - dc, here)) or (free(r + 1, c) and detour_differs(r + 1, c - dc, here)):
+                        return (r, c), cost
+                else:
+                    if (free(r, c - 1) and detour_differs(r - dr, c - 1, here)) or (free(r, c + 1) and detour_differs(r - dr, c + 1, here)):
+                        return (r, c), cost
+                    # Moving vertically, stop wherever a horizontal jump would find something
+                    if scan(r, c, 1) or scan(r, c, -1):
+                        return (r, c), cost
+
+        def scan(r, c, dc):
+            """
+            True if a horizontal jump from (r, c) reaches a jump point.
+            """
+            while True:
+                c += dc
+                if not free(r, c):
+                    return False
+                if stop_here(r, c):
+                    return True
+                here = env.get_cost(r, c)
+                if (free(r - 1, c) and detour_differs(r - 1, c - dc, here)) or (free(r + 1, c) and detour_differs(r + 1, c - dc, here)):
+                    return True
+
+        def directions(node):
+            d = direction.get(node)
+            if d is None or not uniform(*node):
+                return [(-1, 0), (1, 0), (0, -1), (0, 1)]
+            dr, dc = d
+            if dr == 0:
+                return [(-1, 0), (1, 0), (0, dc)]
+            return [(0, -1), (0, 1), (dr, 0)]
+
+        def heuristic(pos):
+            return abs(pos[0] - goal[0]) + abs(pos[1] - goal[1])
+
+        push, pop = self.heap_ops
+        pq = [(heuristic(self.start), heuristic(self.start), self.start)]  # (f, h, position): deeper nodes first on ties
+        g_cost = {self.start: 0}
+        parent = {self.start: None}
+        direction = {}
+        closed = set()
+
+        while pq:
+            f, h, current = pop(pq)
+            if current == goal:
+                self._count_jump_points(closed, g_cost)
+                return self._expand_jumps(self._reconstruct_path(parent, current))
+            if current in closed:
+                continue
+            closed.add(current)
+            for dr, dc in directions(current):
+                found = jump(current[0], current[1], dr, dc)
+                if found is None:
+                    continue
+                node, step_cost = found
+                new_g = g_cost[current] + step_cost
+                if node not in closed and new_g < g_cost.get(node, float('inf')):
+                    g_cost[node] = new_g
+                    parent[node] = current
+                    direction[node] = (dr, dc)
+                    h = heuristic(node)
+                    push(pq, (new_g + h, h, node))
+        self._count_jump_points(closed, g_cost)
+        return None
+
+    def _count_jump_points(self, closed: set, g_cost: dict):
+        if self.stats is not None:
+            self.stats.expansions += len(closed)
+            self.stats.generated += len(g_cost) - 1
+
+    def bidirectional_dijkstra(self, dynamic: bool = False) -> Optional[List[Tuple[int, int]]]:
+        """
+        Uniform-cost search from both ends at once, meeting in the middle
+        (bidirectional.search). Same path costs as uniform_cost_search.
+        Static maps only; with dynamic=True this falls back to uniform_cost_search.
+        """
+        if dynamic:
+            return self.uniform_cost_search(dynamic=True)
+        return self._bidirectional(heuristic=False)
+
+    def bidirectional_a_star(self, dynamic: bool = False) -> Optional[List[Tuple[int, int]]]:
+        """
+        Bidirectional A* with the average of the Manhattan distances to the goal
+        and from the start as potential. Same path costs as a_star.
+        Static maps only; with dynamic=True this falls back to a_star.
+        """
+        if dynamic:
+            return self.a_star(dynamic=True)
+        return self._bidirectional(heuristic=True)
+
+    def _bidirectional(self, heuristic: bool) -> Optional[List[Tuple[int, int]]]:
+        (sr, sc), (gr, gc) = self.start, self.goal
+        if self.use_flat and self.env.dense:
+            flat = self._flat()
+            potential = None
+            if heuristic:
+                rows, cols = np.arange(flat.rows)[:, None], np.arange(flat.cols)
+                to_goal = np.abs(rows - gr) + np.abs(cols - gc)
+                from_start = np.abs(rows - sr) + np.abs(cols - sc)
+                potential = ((to_goal - from_start) / 2).ravel().tolist()
+            path, settled = bidirectional.search(flat.encode(self.start), flat.encode(self.goal), flat.adjacency,
+                                                 flat.blocked, flat.cost, potential, flat.size, self.heap_ops)
+            path = [divmod(v, flat.cols) for v in path] if path is not None else None
+        else:
+            env = self.env
+
+            def potential(pos):
+                return (abs(pos[0] - gr) + abs(pos[1] - gc) - abs(pos[0] - sr) - abs(pos[1] - sc)) / 2
+            path, settled = bidirectional.search(
+                self.start, self.goal, bidirectional.Lookup(lambda pos: env.neighbors(*pos)),
+                bidirectional.Lookup(lambda pos: env.is_occupied(pos[0], pos[1], 0)),
+                bidirectional.Lookup(lambda pos: env.get_cost(*pos)),
+                bidirectional.Lookup(potential) if heuristic else None, heap_ops=self.heap_ops)
+        self.search_info['settled'] = settled
+        return path
+
+    def hpa_star(self, dynamic: bool = False, cluster_size: int = 10) -> Optional[List[Tuple[int, int]]]:
+        """
+        Hierarchical A* (HPA*). The cluster graph is built once per map and cached
+        on the environment; map edits only rebuild the clusters they touch. Paths
+        are optimal between cluster entrances, so close to but not always optimal.
+        Static maps only; with dynamic=True this falls back to a_star, as it does
+        while dynamic obstacles hold cells at t=0 (the graph only knows the
+        static walls).
+        """
+        if dynamic or self.env.dynamic_cells_at(0):
+            return self.a_star(dynamic)
+        with instrument.phase(self.stats, 'preprocess'):
+            graph = ClusterGraph.for_env(self.env, cluster_size)
+        return graph.find_path(self.start, self.goal)
+
+    def wavefront(self, dynamic: bool = False) -> Optional[List[Tuple[int, int]]]:
+        """
+        Greedy descent of the goal's cost-to-go field (fields.cost_to_go). The
+        field is built once per goal and cached on the environment, so every
+        further agent heading to the same goal only pays for the descent.
+        Static, whole-grid maps only; otherwise this falls back to a_star, as it
+        does while dynamic obstacles hold cells at t=0 (the field only knows
+        the static walls).
+        """
+        if dynamic or not self.env.dense or self.env.dynamic_cells_at(0):
+            return self.a_star(dynamic)
+        with instrument.phase(self.stats, 'preprocess'):
+            field = field_for(self.env, self.goal)
+        return descend(self.env, field, self.start)
+
+    def _expand_jumps(self, jump_points: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """
+        Fill in the straight runs between consecutive jump points.
+        """
+        path = [jump_points[0]]
+        for (r, c) in jump_points[1:]:
+            pr, pc = path[-1]
+            dr, dc = (r > pr) - (r < pr), (c > pc) - (c < pc)
+            while (pr, pc) != (r, c):
+                pr, pc = pr + dr, pc + dc
+                path.append((pr, pc))
+        return path
+
+    def local_search_replan(self, dynamic: bool = False, max_iter: int = 1000, restarts: int = 10,
+                            seed: Optional[int] = None, time_budget: Optional[float] = None,
+                            processes: Optional[int] = None, temperature: float = 2.0,
+                            tabu_size: int = 16) -> Optional[List[Tuple[int, int]]]:
+        """
+        Stochastic local search with seeded random restarts. Each restart walks
+        towards the goal greedily (step cost plus Manhattan distance), accepting
+        worse moves by simulated annealing and avoiding recently visited cells
+        (tabu list); static paths have their loops cut out. Restarts share the
+        best cost so far and abandon walks that cannot beat it. With
+        processes > 1 they run across a process pool; time_budget (seconds)
+        stops the search early. Not optimal, and results depend on seed.
+        """
+        path, stats = local_search.search(self.env, self.start, self.goal, dynamic, restarts=restarts, seed=seed,
+                                          max_iter=max_iter, temperature=temperature, tabu_size=tabu_size,
+                                          time_budget=time_budget, processes=processes)
+        self.search_info.update(stats)
+        return path
+
+    def d_star_lite(self, dynamic: bool = False, blocked_cells: Optional[Iterable[Tuple[int, int]]] = None,
+                    changed_cells: Iterable[Tuple[int, int]] = ()) -> Optional[List[Tuple[int, int]]]:
+        """
+        Incremental D* Lite. The search state is kept on the agent, so later calls
+        (after moving self.start, or passing cells that became blocked/free or whose
+        cost changed) only repair the affected part of the previous search.
+        Dynamic obstacles are not planned around in time; pass the cells they hold
+        as blocked_cells when they get in the way.
+        """
+        if self._d_star is None or self._d_star.goal != self.goal:
+            self._d_star = DStarLite(self.env, self.start, self.goal)
+        return self._d_star.replan(start=self.start, blocked=blocked_cells, changed=changed_cells)
+
+    def fuel_aware_search(self, dynamic: bool = False, fuel: Optional[int] = None,
+                          capacity: Optional[int] = None) -> Optional[List[Tuple[int, int]]]:
+        """
+        A* over (cell, fuel left) labels, so only paths the agent can actually
+        drive are returned. Entering a cell burns its cost in fuel and needs that
+        much in the tank; entering a refuel station then fills the tank to
+        capacity. A label is dropped when another label at the same cell (and
+        time, while dynamic obstacles are still moving) has no higher cost and
+        no less fuel. Returns None as soon as no label is left, i.e. the goal
+        cannot be reached on the fuel available.
+        fuel/capacity default to self.fuel/self.fuel_capacity; without a fuel
+        limit this is plain A*.
+        """
+        fuel = self.fuel if fuel is None else fuel
+        if fuel is None:
+            return self.a_star(dynamic)
+        capacity = max(fuel, self.fuel_capacity or 0) if capacity is None else capacity
+        has_stations = self.env.has_refuel_stations()
+        # Past the last scheduled obstacle step time no longer matters, so labels collapse per cell
+        horizon = max(self.env.occupancy.by_time, default=-1) + 1 if dynamic else 0
+
+        def heuristic(pos):
+            return abs(pos[0] - self.goal[0]) + abs(pos[1] - self.goal[1])
+        self.search_info['heuristic_estimate'] = heuristic(self.start)
+
+        start_label = (self.start, 0, fuel, 0)  # (cell, time, fuel left, cost)
+        push, pop = self.heap_ops
+        pq = [(heuristic(self.start), 0, -fuel, 0, self.start)]
+        parent = {start_label: None}
+        expanded = {}  # (cell, time) -> [(cost, fuel left)] of expanded labels
+
+        def dominated(key, g, left):
+            return any(g2 <= g and left2 >= left for g2, left2 in expanded.get(key, ()))
+
+        while pq:
+            f, g, neg_left, t, current = pop(pq)
+            left = -neg_left
+            if current == self.goal:
+                self.search_info['fuel_left'] = left
+                path = []
+                label = (current, t, left, g)
+                while label is not None:
+                    path.append(label[0])
+                    label = parent[label]
+                path.reverse()
+                return path
+            key = (current, min(t, horizon))
+            if dominated(key, g, left):
+                continue
+            expanded.setdefault(key, []).append((g, left))
+            for nr, nc in self.env.neighbors(*current):
+                move_cost = self.env.get_cost(nr, nc)
+                if move_cost > left:
+                    continue
+                new_t = t + 1 if dynamic else 0
+                if self.env.is_occupied(nr, nc, new_t):
+                    continue
+                new_left = capacity if self.env.is_refuel_station(nr, nc) else left - move_cost
+                h = heuristic((nr, nc))
+                if not has_stations and new_left < h:
+                    continue  # every remaining step burns at least one unit
+                new_g = g + move_cost
+                if dominated(((nr, nc), min(new_t, horizon)), new_g, new_left):
+                    continue
+                label = ((nr, nc), new_t, new_left, new_g)
+                if label not in parent:
+                    parent[label] = (current, t, left, g)
+                    push(pq, (new_g + h, new_g, -new_left, new_t, (nr, nc)))
+        return None
+
+    def _flat(self) -> FlatGrid:
+        """
+        The environment's FlatGrid (patched as the map changes), or a counting view of it when instrumented.
+        """
+        with instrument.phase(self.stats, 'preprocess'):
+            flat = FlatGrid.for_env(self.env)
+        return flat if self.stats is None else self.stats.flat_view(flat)
+
     def _reconstruct_path(self, parent: dict, current: Tuple[int, int]) -> List[Tuple[int, int]]:
         path = []
         while current is not None:
@@ -145,35 +656,96 @@ class DeliveryAgent:
         path.reverse()
         return path
 
-    def run_planner(self, planner_name: str, dynamic: bool = False) -> dict:
+    def run_planner(self, planner_name: str, dynamic: bool = False, **options) -> dict:
         """
-        Run a planner and return results.
+        Run a planner and return results. Extra keyword options are passed to the planner.
+        With a cache, repeated queries are answered from it (marked 'cached': True).
+        When instrumented (self.instrument, or any instrument.add_hook hook), the
+        result also carries search counters and phase timers under 'stats'.
         """
         planners = {
             'bfs': self.bfs,
             'uniform_cost': self.uniform_cost_search,
             'a_star': self.a_star,
-            'local_search': self.local_search_replan
+            'local_search': self.local_search_replan,
+            'd_star_lite': self.d_star_lite,
+            'sipp': self.sipp,
+            'jps': self.jump_point_search,
+            'hpa_star': self.hpa_star,
+            'alt': self.alt_a_star,
+            'fuel_aware': self.fuel_aware_search,
+            'wavefront': self.wavefront,
+            'ara_star': self.ara_star,
+            'bidirectional_dijkstra': self.bidirectional_dijkstra,
+            'bidirectional_a_star': self.bidirectional_a_star
         }
         if planner_name not in planners:
             raise ValueError(f"Unknown planner: {planner_name}")
+        if not (self.instrument or instrument.hooks()):
+            return self._run(planners[planner_name], planner_name, dynamic, options)
+        stats = self.stats = instrument.SearchStats()
+        self.heap_ops = stats.heap_ops
+        try:
+            with stats.probing(self.env):
+                result = self._run(planners[planner_name], planner_name, dynamic, options)
+        finally:
+            self.stats = None
+            del self.heap_ops
+        result['stats'] = stats.as_dict()
+        for hook in list(instrument.hooks()):
+            hook(planner_name, result)
+        return result
+
+    def _run(self, planner: Callable, planner_name: str, dynamic: bool, options: dict) -> dict:
+        self.search_info = {}
         start_time = time.time()
-        path = planners[planner_name](dynamic)
+        key = None
+        if self.cache is not None and planner_name not in self.UNCACHED:
+            key = (planner_name, self.start, self.goal, dynamic, self.fuel, self.fuel_capacity, tuple(sorted(options.items())))
+            try:
+                with instrument.phase(self.stats, 'cache'):
+                    cached = self.cache.get(key)
+            except TypeError:  # unhashable options
+                key = None
+            else:
+                if cached is not None:
+                    cached['time'] = time.time() - start_time
+                    cached['cached'] = True
+                    return cached
+        reachable = True
+        if self.env.dense:
+            with instrument.phase(self.stats, 'preprocess'):
+                reachable = ComponentIndex.for_env(self.env).reachable(self.start, self.goal)
+        if reachable:
+            with instrument.phase(self.stats, 'search'):
+                path = planner(dynamic, **options)
+        else:
+            # Start and goal are in different static components: no planner can connect them
+            path = None
+            self.search_info['unreachable'] = True
         end_time = time.time()
         if path:
-            cost = sum(self.env.get_cost(r, c) for r, c in path[1:])  # exclude start
-            return {
+            with instrument.phase(self.stats, 'result'):
+                cost = sum(self.env.get_cost(r, c) for (r, c), prev in zip(path[1:], path) if (r, c) != prev)  # exclude start and waits
+            result = {
                 'path': path,
                 'cost': cost,
                 'length': len(path) - 1,
                 'time': end_time - start_time,
                 'success': True
             }
+            if 'heuristic_estimate' in self.search_info and cost:
+                # 1.0 means the heuristic was exact at the start
+                result['heuristic_strength'] = self.search_info['heuristic_estimate'] / cost
         else:
-            return {
+            result = {
                 'path': None,
                 'cost': None,
                 'length': None,
                 'time': end_time - start_time,
                 'success': False
             }
+        result.update(self.search_info)
+        if key is not None:
+            self.cache.put(key, result)
+        return result
@@ -0,0 +1,89 @@
+"""
+Batch many-to-many delivery costs: one Dijkstra sweep per source covers every
+target, instead of one DeliveryAgent search per (source, target) pair.
+"""
+import heapq
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from environment import GridEnvironment
+
+Cell = Tuple[int, int]
+
+def dijkstra(env: GridEnvironment, source: Cell, targets: Optional[Sequence[Cell]] = None) -> Tuple[Dict[Cell, int], Dict[Cell, Optional[Cell]]]:
+    """
+    Static shortest path costs from source, with the same move rules as the
+    static planners in agent.py. Stops once every target is settled.
+    Returns (cost, parent) dicts over the settled cells.
+    """
+    remaining = set(targets) if targets is not None else None
+    dist = {source: 0}
+    parent: Dict[Cell, Optional[Cell]] = {source: None}
+    settled = {}
+    pq = [(0, source)]
+    while pq:
+        d, current = heapq.heappop(pq)
+        if current in settled:
+            continue
+        settled[current] = d
+        if remaining is not None:
+            remaining.discard(current)
+            if not remaining:
+                break
+        for nr, nc in env.neighbors(*current):
+            if env.is_occupied(nr, nc, 0):
+                continue
+            nd = d + env.get_cost(nr, nc)
+            if nd < dist.get((nr, nc), float('inf')):
+                dist[(nr, nc)] = nd
+                parent[(nr, nc)] = current
+                heapq.heappush(pq, (nd, (nr, nc)))
+    return settled, parent
+
+def _trace(parent: Dict[Cell, Optional[Cell]], cell: Cell) -> List[Cell]:
+    path = []
+    while cell is not None:
+        path.append(cell)
+        cell = parent[cell]
+    path.reverse()
+    return path
+
+def _row(env: GridEnvironment, source: Cell, targets: Sequence[Cell], return_paths: bool):
+    settled, parent = dijkstra(env, source, targets)
+    costs = [settled.get(t, np.inf) for t in targets]
+    paths = [(_trace(parent, t) if t in settled else None) for t in targets] if return_paths else None
+    return costs, paths
+
+_worker_env: Optional[GridEnvironment] = None
+
+def _init_worker(env: GridEnvironment):
+    global _worker_env
+    _worker_env = env
+
+def _worker_row(args):
+    source, targets, return_paths = args
+    return _row(_worker_env, source, targets, return_paths)
+
+def distance_matrix(env: GridEnvironment, sources: Sequence[Cell], targets: Sequence[Cell],
+                    return_paths: bool = False, processes: Optional[int] = None) -> dict:
+    """
+    Cost of the cheapest static path from every source to every target.
+    costs[i][j] is inf when targets[j] cannot be reached from sources[i].
+    With processes > 1 the sources are spread over a process pool (the map is
+    sent to each worker once).
+    """
+    sources = [tuple(s) for s in sources]
+    targets = [tuple(t) for t in targets]
+    start_time = time.time()
+    if processes and processes > 1 and len(sources) > 1:
+        jobs = [(s, targets, return_paths) for s in sources]
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(env,)) as pool:
+            rows = list(pool.map(_worker_row, jobs, chunksize=max(1, len(jobs) // (processes * 4))))
+    else:
+        rows = [_row(env, s, targets, return_paths) for s in sources]
+    return {
+        'costs': np.array([costs for costs, _ in rows], dtype=float).reshape(len(sources), len(targets)),
+        'paths': [paths for _, paths in rows] if return_paths else None,
+        'time': time.time() - start_time
+    }
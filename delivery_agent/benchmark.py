@@ -0,0 +1,250 @@
+"""
+Reproducible planner benchmarks on generated maps.
+
+Maps come from a seeded generator (size, obstacle density, terrain cost mix,
+number of dynamic obstacles), so the same arguments always give the same
+maps. Each planner runs through run_planner: one cold, instrumented run (see
+instrument.py) for the search counters, preprocessing time and, under
+tracemalloc, peak memory (it includes any per-map preprocessing the planner
+caches), then repeated plain timed trials with time.perf_counter. Each trial
+times a cold run, on a fresh environment over the same arrays (so nothing
+cached on the map from earlier runs is reused), and a warm run on the map
+with its caches in place; both are reported (median/p95/min are warm,
+cold_median/cold_p95 cold), since for planners that preprocess the map the
+two measure different things.
+Results are written as JSON and/or CSV, and can be compared against a saved
+JSON baseline:
+
+    python benchmark.py --sizes 10 50 100 --trials 5 --json baseline.json
+    python benchmark.py --sizes 10 50 100 --trials 5 --baseline baseline.json
+
+Large grids (up to 5000x5000) are best run with a few planners at a time and
+a trial budget, e.g. --sizes 1000 5000 --planners a_star jps --trial-budget 30.
+"""
+import argparse
+import csv
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from environment import GridEnvironment, DynamicObstacle, MOVES
+from agent import DeliveryAgent
+
+PLANNERS = ['bfs', 'uniform_cost', 'a_star', 'bidirectional_dijkstra', 'bidirectional_a_star', 'jps', 'alt',
+            'hpa_star', 'wavefront', 'ara_star', 'sipp', 'fuel_aware', 'd_star_lite', 'local_search']
+# Planners that run a_star or uniform_cost instead when planning with dynamic=True
+STATIC_ONLY = {'jps', 'hpa_star', 'bidirectional_dijkstra', 'bidirectional_a_star', 'wavefront'}
+COUNTERS = ['expansions', 'generated', 'pushes', 'max_open', 'occupancy_checks']
+FIELDS = ['map', 'rows', 'cols', 'density', 'dynamic_obstacles', 'planner', 'trials', 'success', 'cost',
+          'median', 'p95', 'min', 'cold_median', 'cold_p95', 'preprocess'] + COUNTERS + ['peak_kib']
+DEFAULT_TERRAIN = {1: 0.6, 2: 0.25, 5: 0.15}  # cost -> share of free cells
+
+def generate_map(rows: int, cols: int, density: float = 0.2, terrain: Optional[Dict[int, float]] = None,
+                 dynamic_obstacles: int = 0, seed: int = 0) -> GridEnvironment:
+    """
+    Random map: each cell is a static obstacle with probability density,
+    otherwise its cost is drawn from terrain (cost -> weight). The corners
+    (0, 0) and (rows - 1, cols - 1), the usual start and goal, are kept free.
+    Dynamic obstacles are random walks (see add_random_walkers).
+    """
+    rng = np.random.default_rng(seed)
+    terrain = terrain or DEFAULT_TERRAIN
+    costs = np.array(list(terrain), dtype=np.int32)
+    weights = np.array(list(terrain.values()), dtype=float)
+    cost_grid = rng.choice(costs, size=(rows, cols), p=weights / weights.sum()).astype(np.int32)
+    obstacle_grid = rng.random((rows, cols)) < density
+    obstacle_grid[0, 0] = obstacle_grid[rows - 1, cols - 1] = False
+    env = GridEnvironment.from_arrays(cost_grid, obstacle_grid)
+    add_random_walkers(env, dynamic_obstacles, rng)
+    return env
+
+def add_random_walkers(env: GridEnvironment, count: int, rng: np.random.Generator):
+    """
+    Add count dynamic obstacles that walk randomly for 5 to 20 steps, starting
+    at random cells and times over the first rows + cols steps.
+    """
+    rows, cols = env.rows, env.cols
+    for _ in range(count):
+        r, c = int(rng.integers(rows)), int(rng.integers(cols))
+        start = int(rng.integers(rows + cols))
+        path = [(r, c)]
+        for _ in range(int(rng.integers(5, 21)) - 1):
+            dr, dc = MOVES[int(rng.integers(len(MOVES)))]
+            if 0 <= r + dr < rows and 0 <= c + dc < cols and not env.obstacle_grid[r + dr, c + dc]:
+                r, c = r + dr, c + dc
+            path.append((r, c))
+        env.add_dynamic_obstacle(DynamicObstacle(path, list(range(start, start + len(path)))))
+
+def _percentile(values: Sequence[float], q: float) -> float:
+    return float(np.percentile(values, q))
+
+def fresh_copy(env: GridEnvironment) -> GridEnvironment:
+    """
+    An environment over the same arrays and dynamic obstacles as env, with
+    none of its cached preprocessing.
+    """
+    copy = GridEnvironment.from_arrays(env.cost_grid, env.obstacle_grid, env.refuel_grid, env.terrain_grid,
+                                       env.terrain_types)
+    for obstacle in env.dynamic_obstacles:
+        copy.add_dynamic_obstacle(obstacle)
+    return copy
+
+def bench_planner(env: GridEnvironment, planner: str, start: Tuple[int, int], goal: Tuple[int, int],
+                  dynamic: bool = False, trials: int = 5, trial_budget: Optional[float] = None,
+                  memory: bool = True) -> dict:
+    """
+    Time one planner on one map, after an untimed, instrumented cold run:
+    each trial times a cold run (fresh_copy(env), no cached preprocessing)
+    and a warm one (env, caches built). Later trials are skipped once the
+    timed trials so far have used trial_budget seconds.
+    """
+    options = {'seed': 0} if planner == 'local_search' else {}
+    # Cold run first (it builds any preprocessing the planner caches on env), traced for peak memory
+    peak = None
+    if memory:
+        tracemalloc.start()
+    stats = DeliveryAgent(env, start, goal, instrument=True).run_planner(planner, dynamic=dynamic, **options)['stats']
+    if memory:
+        peak = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+    times = []
+    cold_times = []
+    result = None
+    for _ in range(trials):
+        agent = DeliveryAgent(fresh_copy(env), start, goal)
+        began = time.perf_counter()
+        agent.run_planner(planner, dynamic=dynamic, **options)
+        cold_times.append(time.perf_counter() - began)
+        agent = DeliveryAgent(env, start, goal)
+        began = time.perf_counter()
+        result = agent.run_planner(planner, dynamic=dynamic, **options)
+        times.append(time.perf_counter() - began)
+        if trial_budget is not None and sum(times) + sum(cold_times) >= trial_budget:
+            break
+    return {
+        'planner': planner,
+        'trials': len(times),
+        'success': result['success'],
+        'cost': result['cost'],
+        'median': statistics.median(times),
+        'p95': _percentile(times, 95),
+        'min': min(times),
+        'cold_median': statistics.median(cold_times),
+        'cold_p95': _percentile(cold_times, 95),
+        'preprocess': stats['timers'].get('preprocess', 0.0),
+        **{name: stats[name] for name in COUNTERS},
+        'peak_kib': round(peak, 1) if peak is not None else None
+    }
+
+def run_suite(sizes: Sequence[int], planners: Sequence[str] = PLANNERS, density: float = 0.2,
+              terrain: Optional[Dict[int, float]] = None, dynamic_obstacles: int = 0, seed: int = 0,
+              trials: int = 5, trial_budget: Optional[float] = None, memory: bool = True,
+              verbose: bool = False) -> List[dict]:
+    """
+    Every planner on one generated square map per size, from corner to corner.
+    With dynamic obstacles the static-only planners are skipped, since their
+    rows would only time the fallback under another name.
+    """
+    if dynamic_obstacles > 0:
+        skipped = [planner for planner in planners if planner in STATIC_ONLY]
+        planners = [planner for planner in planners if planner not in STATIC_ONLY]
+        if verbose and skipped:
+            print(f"Skipping static-only planners with dynamic obstacles: {', '.join(skipped)}")
+    rows = []
+    for size in sizes:
+        env = generate_map(size, size, density, terrain, dynamic_obstacles, seed)
+        name = f"{size}x{size}-d{density}-o{dynamic_obstacles}-s{seed}"
+        for planner in planners:
+            row = {'map': name, 'rows': size, 'cols': size, 'density': density,
+                   'dynamic_obstacles': dynamic_obstacles}
+            row.update(bench_planner(env, planner, (0, 0), (size - 1, size - 1), dynamic_obstacles > 0,
+                                     trials, trial_budget, memory))
+            rows.append(row)
+            if verbose:
+                print(f"{name:<28} {planner:<14} median {row['median'] * 1000:9.2f} ms  "
+                      f"p95 {row['p95'] * 1000:9.2f} ms  cold {row['cold_median'] * 1000:9.2f} ms  "
+                      f"expansions {row['expansions']:>8}  cost {row['cost']}")
+    return rows
+
+def write_json(rows: List[dict], path: str, args: Optional[dict] = None):
+    meta = {'python': sys.version.split()[0], 'numpy': np.__version__, 'platform': platform.platform(),
+            'args': args or {}}
+    with open(path, 'w') as f:
+        json.dump({'meta': meta, 'results': rows}, f, indent=2)
+
+def write_csv(rows: List[dict], path: str):
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+
+def compare(rows: List[dict], baseline: List[dict], tolerance: float = 0.1) -> List[dict]:
+    """
+    Match rows to the baseline by (map, planner). A row regresses when its
+    warm or cold median time is more than tolerance (a fraction) above the
+    baseline's (cold only if the baseline has it), or when its path cost or
+    success changed.
+    """
+    old = {(row['map'], row['planner']): row for row in baseline}
+    report = []
+    for row in rows:
+        before = old.get((row['map'], row['planner']))
+        if before is None:
+            continue
+        ratio = row['median'] / before['median'] if before['median'] else float('inf')
+        cold_ratio = None
+        if 'cold_median' in row and before.get('cold_median') is not None:
+            cold_ratio = row['cold_median'] / before['cold_median'] if before['cold_median'] else float('inf')
+        changed = row['cost'] != before['cost'] or row['success'] != before['success']
+        report.append({'map': row['map'], 'planner': row['planner'], 'baseline': before['median'],
+                       'median': row['median'], 'ratio': ratio, 'cold_ratio': cold_ratio, 'cost_changed': changed,
+                       'regression': ratio > 1 + tolerance or (cold_ratio or 0) > 1 + tolerance or changed})
+    return report
+
+def _parse_terrain(text: str) -> Dict[int, float]:
+    return {int(cost): float(weight) for cost, weight in (item.split(':') for item in text.split(','))}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark planners on generated maps")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 50, 100], help='Square grid sizes')
+    parser.add_argument('--planners', nargs='+', choices=PLANNERS, default=PLANNERS, help='Planners to run')
+    parser.add_argument('--density', type=float, default=0.2, help='Static obstacle probability per cell')
+    parser.add_argument('--terrain', type=_parse_terrain, default=None,
+                        help='Terrain cost mix as cost:weight pairs, e.g. 1:0.6,2:0.25,5:0.15')
+    parser.add_argument('--dynamic-obstacles', type=int, default=0, help='Dynamic obstacles per map (plans with dynamic=True)')
+    parser.add_argument('--seed', type=int, default=0, help='Map generator seed')
+    parser.add_argument('--trials', type=int, default=5, help='Timed trials per planner and map')
+    parser.add_argument('--trial-budget', type=float, default=None, help='Stop repeating a planner after this many seconds')
+    parser.add_argument('--no-memory', action='store_true', help='Skip the tracemalloc run')
+    parser.add_argument('--json', type=str, default=None, help='Write results as JSON')
+    parser.add_argument('--csv', type=str, default=None, help='Write results as CSV')
+    parser.add_argument('--baseline', type=str, default=None, help='JSON results to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='Allowed median slowdown before flagging a regression')
+    args = parser.parse_args()
+
+    rows = run_suite(args.sizes, args.planners, args.density, args.terrain, args.dynamic_obstacles, args.seed,
+                     args.trials, args.trial_budget, not args.no_memory, verbose=True)
+    if args.json:
+        write_json(rows, args.json, {key: value for key, value in vars(args).items() if key not in ('json', 'csv', 'baseline')})
+    if args.csv:
+        write_csv(rows, args.csv)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        report = compare(rows, baseline, args.tolerance)
+        print()
+        for item in report:
+            flag = 'REGRESSION' if item['regression'] else ''
+            cold = f"cold {item['cold_ratio']:.2f}x " if item['cold_ratio'] is not None else ''
+            print(f"{item['map']:<28} {item['planner']:<14} {item['baseline'] * 1000:9.2f} -> "
+                  f"{item['median'] * 1000:9.2f} ms ({item['ratio']:.2f}x) "
+                  f"{cold}{'cost changed ' if item['cost_changed'] else ''}{flag}")
+        if any(item['regression'] for item in report):
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Bidirectional shortest paths for static planning: one search grows from the
+start and one from the goal over the reversed moves, alternating until they
+provably cannot improve on the best path through a cell both have reached.
+On open maps the two frontiers cover about half the area of one search
+reaching all the way.
+
+Entering a cell costs that cell's cost, so the backward search pays for the
+cell it leaves: reaching y from x costs cost(x). A forward path may not enter
+a blocked cell, and the same holds backwards for every cell except the start.
+
+With a potential p (bidirectional A*), the forward queue is keyed by
+g + p(v) and the backward one by g - p(v). p should be the average
+potential (h_goal(v) - h_start(v)) / 2 of two consistent heuristics,
+which keeps both reduced graphs non-negative. The search can then stop
+as soon as the two queue tops add up to the best meeting cost.
+"""
+from typing import Callable, Hashable, List, Optional, Sequence, Tuple
+from instrument import HEAP_OPS
+
+INF = float('inf')
+
+class Lookup:
+    """
+    lookup[node] -> function(node), for graphs without flat arrays to index.
+    """
+    __slots__ = ('function',)
+
+    def __init__(self, function: Callable):
+        self.function = function
+
+    def __getitem__(self, node):
+        return self.function(node)
+
+class _Zero:
+    def __getitem__(self, node):
+        return 0
+
+class _Table(dict):
+    """
+    Dict that reads missing keys as a default, standing in for a preallocated list.
+    """
+    def __init__(self, default):
+        super().__init__()
+        self.default = default
+
+    def __missing__(self, key):
+        return self.default
+
+def search(start: Hashable, goal: Hashable, adjacency: Sequence, blocked: Sequence, cost: Sequence,
+           potential: Optional[Sequence] = None, size: Optional[int] = None,
+           heap_ops: Tuple[Callable, Callable] = HEAP_OPS) -> Tuple[Optional[List[Hashable]], int]:
+    """
+    Cheapest path from start to goal, or None, plus the number of nodes
+    settled by both searches together. The graph is given by lookups indexed
+    by node: adjacency[u] lists u's neighbours, blocked[v] and cost[v] are v's
+    occupancy and entry cost, and potential[v] is the bidirectional A*
+    potential (none for Dijkstra). With size, nodes are encoded cells
+    0..size-1 (as in flat_search.FlatGrid) and the lookups can be plain lists;
+    otherwise nodes are any hashable ids, e.g. with Lookup wrappers.
+    """
+    if start == goal:
+        return [start], 0
+    if blocked[goal]:
+        return None, 0
+    push, pop = heap_ops
+    potential = potential if potential is not None else _Zero()
+    if size is not None:
+        dist = ([INF] * size, [INF] * size)
+        parent = ([None] * size, [None] * size)
+        closed = (bytearray(size), bytearray(size))
+    else:
+        dist = (_Table(INF), _Table(INF))
+        parent = (_Table(None), _Table(None))
+        closed = (_Table(0), _Table(0))
+    dist[0][start] = dist[1][goal] = 0
+    heaps = ([(potential[start], start)], [(-potential[goal], goal)])
+    best, meet = INF, None
+    settled = 0
+    side = 1
+    while heaps[0] and heaps[1]:
+        if heaps[0][0][0] + heaps[1][0][0] >= best:
+            break
+        side = 1 - side
+        _, u = pop(heaps[side])
+        done = closed[side]
+        if done[u]:
+            continue
+        done[u] = 1
+        settled += 1
+        own, other, parents, heap = dist[side], dist[1 - side], parent[side], heaps[side]
+        d = own[u]
+        if side == 0:
+            for v in adjacency[u]:
+                if blocked[v]:
+                    continue
+                nd = d + cost[v]
+                if nd < own[v]:
+                    own[v] = nd
+                    parents[v] = u
+                    push(heap, (nd + potential[v], v))
+                    if nd + other[v] < best:
+                        best, meet = nd + other[v], v
+        else:
+            nd = d + cost[u]  # backwards, reaching a neighbour costs the cell being left
+            for v in adjacency[u]:
+                if blocked[v] and v != start:
+                    continue
+                if nd < own[v]:
+                    own[v] = nd
+                    parents[v] = u
+                    push(heap, (nd - potential[v], v))
+                    if nd + other[v] < best:
+                        best, meet = nd + other[v], v
+    if meet is None:
+        return None, settled
+    path = []
+    node = meet
+    while node is not None:
+        path.append(node)
+        node = parent[0][node]
+    path.reverse()
+    node = parent[1][meet]
+    while node is not None:
+        path.append(node)
+        node = parent[1][node]
+    return path, settled
@@ -0,0 +1,188 @@
+"""
+Connected components of the static free cells, so queries whose start and goal
+are walled off from each other can be answered without a search.
+
+Static obstacles block every planner (dynamic obstacles and waiting cannot
+open a wall), so different components always mean no path. The index is built
+once per map with NumPy: free cells are grouped into horizontal runs, runs
+touching in adjacent rows are joined, and the run graph is labelled by
+repeatedly hooking roots onto smaller roots and shortcutting. After that it
+follows set_static_obstacle incrementally: a new obstacle can only split its
+own component, which is checked by searching outwards from the cell's
+neighbours in lockstep until they meet or one side runs out, so the work is
+proportional to the smaller side of a split.
+"""
+from collections import deque
+from typing import Dict, List, Tuple
+import numpy as np
+from environment import GridEnvironment, MOVES
+
+Cell = Tuple[int, int]
+
+def _roots(parent: np.ndarray, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Component representative of every node of an undirected graph given as edges a[i] - b[i].
+    """
+    while len(a):
+        pa, pb = parent[a], parent[b]
+        open_edges = pa != pb
+        if not open_edges.any():
+            break
+        a, b, pa, pb = a[open_edges], b[open_edges], pa[open_edges], pb[open_edges]
+        np.minimum.at(parent, np.maximum(pa, pb), np.minimum(pa, pb))
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
+                break
+            parent = grand
+    return parent
+
+def label_components(free: np.ndarray) -> np.ndarray:
+    """
+    int32 array of component labels 0..n-1 for 4-connected free cells, -1 elsewhere.
+    """
+    rows, cols = free.shape
+    labels = np.full((rows, cols), -1, dtype=np.int32)
+    padded = np.zeros((rows, cols + 2), dtype=np.int8)
+    padded[:, 1:-1] = free
+    edges = np.diff(padded, axis=1)
+    run_row, run_start = np.nonzero(edges == 1)
+    _, run_end = np.nonzero(edges == -1)  # exclusive; same (row-major) order as the starts
+    if len(run_row) == 0:
+        return labels
+    # Run a touches run b in the next row when b starts before a ends and ends after a starts
+    width = cols + 1
+    start_keys = run_row * width + run_start
+    end_keys = run_row * width + run_end
+    first = np.searchsorted(end_keys, (run_row + 1) * width + run_start, side='right')
+    stop = np.searchsorted(start_keys, (run_row + 1) * width + run_end, side='left')
+    counts = np.maximum(stop - first, 0)
+    a = np.repeat(np.arange(len(run_row)), counts)
+    b = np.repeat(first, counts) + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    roots = _roots(np.arange(len(run_row)), a, b)
+    _, run_labels = np.unique(roots, return_inverse=True)
+    labels.ravel()[free.ravel()] = np.repeat(run_labels.astype(np.int32), run_end - run_start)
+    return labels
+
+class ComponentIndex:
+    """
+    labels[r, c] is the component of a free cell (-1 for static obstacles)
+    and sizes[label] its number of cells. Kept up to date through the
+    environment's change listeners; splits and merges count the incremental
+    updates that changed components.
+    """
+    def __init__(self, env: GridEnvironment):
+        self.env = env
+        self.labels = label_components(~np.asarray(env.obstacle_grid))
+        self.sizes: Dict[int, int] = dict(enumerate(np.bincount(self.labels[self.labels >= 0]).tolist()))
+        self.next_label = len(self.sizes)
+        self.splits = 0
+        self.merges = 0
+
+    @classmethod
+    def for_env(cls, env: GridEnvironment) -> 'ComponentIndex':
+        """
+        The environment's index, built on first use.
+        """
+        index = env.precomputed.get('components')
+        if index is None:
+            index = env.precomputed['components'] = cls(env)
+            env.subscribe(index._on_change)
+        return index
+
+    @property
+    def count(self) -> int:
+        return len(self.sizes)
+
+    def component(self, cell: Cell) -> int:
+        return int(self.labels[cell])
+
+    def reachable(self, start: Cell, goal: Cell) -> bool:
+        """
+        False only if no path can exist. A start on an obstacle can still
+        step off it, so its free neighbours count.
+        """
+        if start == goal:
+            return True
+        target = self.labels[goal]
+        if target < 0:
+            return False
+        if self.labels[start] == target:
+            return True
+        rows, cols = self.labels.shape
+        return any(0 <= start[0] + dr < rows and 0 <= start[1] + dc < cols
+                   and self.labels[start[0] + dr, start[1] + dc] == target for dr, dc in MOVES)
+
+    def _on_change(self, kind: str, cells: List[Cell]):
+        if kind != 'obstacle':
+            return
+        for cell in cells:
+            cell = tuple(cell)
+            if self.env.obstacle_grid[cell] and self.labels[cell] >= 0:
+                self._block(cell)
+            elif not self.env.obstacle_grid[cell] and self.labels[cell] < 0:
+                self._unblock(cell)
+
+    def _neighbours(self, cell: Cell, label: int) -> List[Cell]:
+        return [nb for nb in self.env.neighbors(*cell) if self.labels[nb] == label]
+
+    def _block(self, cell: Cell):
+        labels = self.labels
+        label = int(labels[cell])
+        labels[cell] = -1
+        self.sizes[label] -= 1
+        seeds = self._neighbours(cell, label)
+        if not seeds:
+            del self.sizes[label]
+            return
+        # One search per neighbour, one cell at a time each; searches that meet merge
+        group = list(range(len(seeds)))
+
+        def find(i):
+            while group[i] != i:
+                group[i] = group[group[i]]
+                i = group[i]
+            return i
+        owner = {seed: i for i, seed in enumerate(seeds)}
+        queues = [deque([seed]) for seed in seeds]
+        active = set(range(len(seeds)))  # roots whose region is not settled yet
+        while len(active) > 1:
+            for i, queue in enumerate(queues):
+                if not queue or find(i) not in active:
+                    continue
+                for nb in self._neighbours(queue.popleft(), label):
+                    j = owner.get(nb)
+                    if j is None:
+                        owner[nb] = i
+                        queue.append(nb)
+                    elif find(j) != find(i):
+                        low, high = sorted((find(i), find(j)))
+                        group[high] = low
+                        active.discard(high)
+            for root in sorted(active):
+                if len(active) > 1 and not any(queues[i] for i in range(len(seeds)) if find(i) == root):
+                    # Explored to the end without meeting the others: a separate component now
+                    region = [nb for nb, i in owner.items() if find(i) == root]
+                    rows, cols = zip(*region)
+                    labels[list(rows), list(cols)] = self.next_label
+                    self.sizes[self.next_label] = len(region)
+                    self.sizes[label] -= len(region)
+                    self.next_label += 1
+                    self.splits += 1
+                    active.discard(root)
+
+    def _unblock(self, cell: Cell):
+        labels = self.labels
+        touching = {int(labels[nb]) for nb in self.env.neighbors(*cell) if labels[nb] >= 0}
+        if not touching:
+            labels[cell] = self.next_label
+            self.sizes[self.next_label] = 1
+            self.next_label += 1
+            return
+        keep = max(touching, key=self.sizes.get)
+        for other in touching - {keep}:
+            labels[labels == other] = keep
+            self.sizes[keep] += self.sizes.pop(other)
+            self.merges += 1
+        labels[cell] = keep
+        self.sizes[keep] += 1
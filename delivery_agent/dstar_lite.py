@@ -0,0 +1,133 @@
+"""
+Incremental D* Lite planner that keeps its search state between replans.
+"""
+import heapq
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from environment import GridEnvironment
+
+INF = float('inf')
+
+class DStarLite:
+    """
+    D* Lite (Koenig & Likhachev) searching backwards from the goal.
+    Entering a cell costs its terrain cost; cells occupied at time 0 or listed in
+    `blocked` cannot be entered. After the first search, replan() only repairs
+    the vertices whose cost-to-goal is affected by the reported changes.
+    """
+    def __init__(self, env: GridEnvironment, start: Tuple[int, int], goal: Tuple[int, int]):
+        self.env = env
+        self.start = start
+        self.goal = goal
+        self.blocked: Set[Tuple[int, int]] = set()
+        self.km = 0
+        self.g: Dict[Tuple[int, int], float] = {}
+        self.rhs: Dict[Tuple[int, int], float] = {goal: 0}
+        self.open: List = []  # heap of (key, cell); stale entries are skipped lazily
+        self.open_keys: Dict[Tuple[int, int], Tuple[float, float]] = {}
+        self.expansions = 0
+        self._last = start
+        self._push(goal, self._key(goal))
+
+    def _h(self, a: Tuple[int, int], b: Tuple[int, int]) -> int:
+        return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+    def _cost(self, v: Tuple[int, int]) -> float:
+        """
+        Cost of moving into cell v from any neighbour.
+        """
+        if v in self.blocked or self.env.is_occupied(v[0], v[1], 0):
+            return INF
+        return self.env.get_cost(*v)
+
+    def _key(self, s: Tuple[int, int]) -> Tuple[float, float]:
+        m = min(self.g.get(s, INF), self.rhs.get(s, INF))
+        return (m + self._h(self.start, s) + self.km, m)
+
+    def _push(self, s: Tuple[int, int], key: Tuple[float, float]):
+        self.open_keys[s] = key
+        heapq.heappush(self.open, (key, s))
+
+    def _top(self):
+        while self.open:
+            key, s = self.open[0]
+            if self.open_keys.get(s) == key:
+                return key, s
+            heapq.heappop(self.open)
+        return (INF, INF), None
+
+    def _update_vertex(self, u: Tuple[int, int]):
+        if u != self.goal:
+            best = INF
+            for v in self.env.neighbors(*u):
+                c = self._cost(v)
+                if c < INF:
+                    best = min(best, c + self.g.get(v, INF))
+            self.rhs[u] = best
+        self.open_keys.pop(u, None)
+        if self.g.get(u, INF) != self.rhs.get(u, INF):
+            self._push(u, self._key(u))
+
+    def _compute_shortest_path(self):
+        while True:
+            k_old, u = self._top()
+            if u is None:
+                break
+            if not (k_old < self._key(self.start) or self.rhs.get(self.start, INF) != self.g.get(self.start, INF)):
+                break
+            self.expansions += 1
+            k_new = self._key(u)
+            if k_old < k_new:
+                self._push(u, k_new)
+                continue
+            heapq.heappop(self.open)
+            del self.open_keys[u]
+            if self.g.get(u, INF) > self.rhs.get(u, INF):
+                self.g[u] = self.rhs[u]
+            else:
+                self.g[u] = INF
+                self._update_vertex(u)
+            for p in self.env.neighbors(*u):
+                self._update_vertex(p)
+
+    def replan(self, start: Optional[Tuple[int, int]] = None, blocked: Optional[Iterable[Tuple[int, int]]] = None,
+               changed: Iterable[Tuple[int, int]] = ()) -> Optional[List[Tuple[int, int]]]:
+        """
+        Repair the search and return the current best path.
+        start: new agent position (if it moved)
+        blocked: replaces the set of temporarily blocked cells (None keeps it)
+        changed: cells whose terrain cost or static obstacle flag changed
+        """
+        if start is not None and start != self.start:
+            self.start = start
+            self.km += self._h(self._last, start)
+            self._last = start
+        dirty = set(changed)
+        if blocked is not None:
+            blocked = set(blocked)
+            dirty |= blocked ^ self.blocked
+            self.blocked = blocked
+        for v in dirty:
+            for u in self.env.neighbors(*v):
+                self._update_vertex(u)
+        self._compute_shortest_path()
+        return self.path()
+
+    def path(self) -> Optional[List[Tuple[int, int]]]:
+        """
+        Follow the cheapest successors from start to goal.
+        """
+        if self.rhs.get(self.start, INF) == INF:
+            return None
+        current = self.start
+        path = [current]
+        while current != self.goal:
+            best, best_cost = None, INF
+            for v in self.env.neighbors(*current):
+                c = self._cost(v) + self.g.get(v, INF)
+                if c < best_cost:
+                    best, best_cost = v, c
+            if best is None or len(path) > self.env.rows * self.env.cols:
+                return None
+            current = best
+            path.append(current)
+        return path
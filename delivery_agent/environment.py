@@ -2,8 +2,11 @@
 Environment model for autonomous delivery agent.
 Models grid, terrain costs, static and dynamic obstacles.
 """
+import bisect
 import numpy as np
-from typing import List, Tuple, Dict, Optional
+from typing import Callable, List, Tuple, Dict, Optional, Set
+
+MOVES = [(-1,0), (1,0), (0,-1), (0,1)] # up, down, left, right
 
 class Cell:
     def __init__(self, cost: int = 1, terrain: str = "road", is_obstacle: bool = False):
@@ -21,39 +24,228 @@ class DynamicObstacle:
         self.path = path
         self.schedule = schedule
 
+class OccupancyIndex:
+    """
+    Dynamic obstacle positions indexed by time step, so an occupancy lookup is
+    a dict and set probe instead of a scan over every obstacle's path.
+    """
+    def __init__(self):
+        self.by_time: Dict[int, Set[Tuple[int, int]]] = {}
+        self.by_cell: Dict[Tuple[int, int], List[int]] = {}  # sorted occupied time steps
+
+    def add(self, obstacle: DynamicObstacle):
+        for pos, t in zip(obstacle.path, obstacle.schedule):
+            pos = tuple(pos)
+            cells = self.by_time.setdefault(t, set())
+            if pos not in cells:
+                cells.add(pos)
+                bisect.insort(self.by_cell.setdefault(pos, []), t)
+
+    def occupied(self, pos: Tuple[int, int], time: int) -> bool:
+        cells = self.by_time.get(time)
+        return cells is not None and pos in cells
+
+    def cells_at(self, time: int) -> Set[Tuple[int, int]]:
+        return self.by_time.get(time, set())
+
+    def times_at(self, pos: Tuple[int, int]) -> List[int]:
+        return self.by_cell.get(pos, [])
+
 class GridEnvironment:
+    """
+    Grid stored as flat NumPy arrays instead of one Cell object per square:
+    cost_grid (int32 movement cost), obstacle_grid (bool static obstacle mask)
+    terrain_grid (uint8 index into terrain_types) and refuel_grid (bool mask of
+    refuel stations). Planners may read the arrays directly; all writes should
+    go through the setters.
+    """
+    GRIDS = ('cost_grid', 'obstacle_grid', 'refuel_grid', 'terrain_grid')
+    dense = True  # whole-grid arrays are available (planners that need them check this)
+
     def __init__(self, rows: int, cols: int):
         self.rows = rows
         self.cols = cols
-        self.grid = [[Cell() for _ in range(cols)] for _ in range(rows)]
+        self.cost_grid = np.ones((rows, cols), dtype=np.int32)
+        self.obstacle_grid = np.zeros((rows, cols), dtype=bool)
+        self.terrain_grid = np.zeros((rows, cols), dtype=np.uint8)
+        self.refuel_grid = np.zeros((rows, cols), dtype=bool)
+        self._init_state()
+
+    def _init_state(self):
+        """
+        Everything except the grid storage (shared with environments that keep the grid elsewhere).
+        """
+        self.terrain_types: List[str] = ["road"]
+        self.version = 0  # bumped on every change reported to listeners
         self.dynamic_obstacles: List[DynamicObstacle] = []
+        self.occupancy = OccupancyIndex()
+        self.precomputed: Dict[str, object] = {}  # per-map planner preprocessing, e.g. the HPA* cluster graph
+        self._listeners: List[Callable[[str, List[Tuple[int, int]]], None]] = []
+
+    @classmethod
+    def from_arrays(cls, cost_grid: np.ndarray, obstacle_grid: np.ndarray, refuel_grid: Optional[np.ndarray] = None,
+                    terrain_grid: Optional[np.ndarray] = None, terrain_types: Optional[List[str]] = None) -> 'GridEnvironment':
+        """
+        Environment over existing arrays, which are used as they are (not
+        copied). Read-only arrays, such as memory-mapped map files, are copied
+        the first time a setter changes them.
+        """
+        rows, cols = cost_grid.shape
+        env = cls.__new__(cls)  # skip __init__, which would allocate grids only to drop them
+        env.rows = rows
+        env.cols = cols
+        env._init_state()
+        env.cost_grid = cost_grid
+        env.obstacle_grid = obstacle_grid
+        env.refuel_grid = refuel_grid if refuel_grid is not None else np.zeros((rows, cols), dtype=bool)
+        if terrain_grid is not None:
+            env.terrain_grid = terrain_grid
+            env.terrain_types = list(terrain_types or ["road"])
+        else:
+            env.terrain_grid = np.zeros((rows, cols), dtype=np.uint8)
+        return env
+
+    def _writable(self, name: str) -> np.ndarray:
+        grid = getattr(self, name)
+        if not grid.flags.writeable:
+            grid = np.array(grid)
+            setattr(self, name, grid)
+        return grid
+
+    def __getstate__(self):
+        # Listeners and cached preprocessing stay with this process (e.g. when sent to a worker pool)
+        state = self.__dict__.copy()
+        state['_listeners'] = []
+        state['precomputed'] = {}
+        for name in ('neighbors', 'is_occupied', 'safe_intervals'):
+            state.pop(name, None)  # instrumentation probes (see instrument.py)
+        for name in self.GRIDS:
+            grid = state.get(name)
+            if isinstance(grid, np.memmap) and not grid.flags.writeable and grid.filename:
+                # Unedited map file planes: the receiver maps the same file instead of unpickling a copy
+                state[name] = ('memmap', grid.filename, grid.offset, grid.dtype.str, grid.shape)
+        return state
+
+    def __setstate__(self, state):
+        for name in self.GRIDS:
+            if isinstance(state.get(name), tuple):
+                _, filename, offset, dtype, shape = state[name]
+                state[name] = np.memmap(filename, dtype=np.dtype(dtype), mode='r', offset=offset, shape=shape)
+        self.__dict__.update(state)
+
+    def subscribe(self, listener: Callable[[str, List[Tuple[int, int]]], None]):
+        """
+        Call listener(kind, cells) after every map change. kind is 'obstacle',
+        'cost_increase', 'cost_decrease', 'refuel', 'dynamic' (dynamic obstacles
+        added) or 'dynamic_release' (dynamic obstacles left or were rescheduled
+        on the cells, so they may be free at times they were not before).
+        """
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[str, List[Tuple[int, int]]], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, kind: str, cells: List[Tuple[int, int]]):
+        self.version += 1
+        for listener in list(self._listeners):
+            listener(kind, cells)
+
+    def terrain_code(self, terrain: str) -> int:
+        """
+        Integer code stored in terrain_grid for a terrain name, registering new names.
+        """
+        if terrain not in self.terrain_types:
+            if len(self.terrain_types) > np.iinfo(self.terrain_grid.dtype).max:
+                raise ValueError(f"Too many terrain types (adding {terrain!r})")
+            self.terrain_types.append(terrain)
+        return self.terrain_types.index(terrain)
 
     def set_static_obstacle(self, row: int, col: int):
-        self.grid[row][col].is_obstacle = True
+        if not self.obstacle_grid[row, col]:
+            self._writable('obstacle_grid')[row, col] = True
+            self._notify('obstacle', [(row, col)])
 
     def set_terrain_cost(self, row: int, col: int, cost: int, terrain: str = "road"):
-        self.grid[row][col].cost = cost
-        self.grid[row][col].terrain = terrain
+        old_cost = self.cost_grid[row, col]
+        self._writable('cost_grid')[row, col] = cost
+        self._writable('terrain_grid')[row, col] = self.terrain_code(terrain)
+        if cost != old_cost:
+            self._notify('cost_increase' if cost > old_cost else 'cost_decrease', [(row, col)])
+
+    def set_refuel_station(self, row: int, col: int, refuel: bool = True):
+        if self.refuel_grid[row, col] != refuel:
+            self._writable('refuel_grid')[row, col] = refuel
+            self._notify('refuel', [(row, col)])
+
+    def is_refuel_station(self, row: int, col: int) -> bool:
+        return bool(self.refuel_grid[row, col])
+
+    def has_refuel_stations(self) -> bool:
+        return bool(self.refuel_grid.any())
+
+    def get_terrain(self, row: int, col: int) -> str:
+        return self.terrain_types[self.terrain_grid[row, col]]
+
+    def get_cell(self, row: int, col: int) -> Cell:
+        """
+        Snapshot of a square as a Cell object (changes to it are not written back).
+        """
+        return Cell(self.get_cost(row, col), self.get_terrain(row, col), bool(self.obstacle_grid[row, col]))
 
     def add_dynamic_obstacle(self, obstacle: DynamicObstacle):
         self.dynamic_obstacles.append(obstacle)
+        self.occupancy.add(obstacle)
+        self._notify('dynamic', [tuple(pos) for pos in obstacle.path])
+
+    def is_static_obstacle(self, row: int, col: int) -> bool:
+        return bool(self.obstacle_grid[row, col])
 
     def is_occupied(self, row: int, col: int, time: int) -> bool:
-        if self.grid[row][col].is_obstacle:
+        if self.obstacle_grid[row, col]:
             return True
-        for obs in self.dynamic_obstacles:
-            for pos, t in zip(obs.path, obs.schedule):
-                if pos == (row, col) and t == time:
-                    return True
-        return False
+        return self.occupancy.occupied((row, col), time)
+
+    def dynamic_cells_at(self, time: int) -> Set[Tuple[int, int]]:
+        """
+        Cells held by dynamic obstacles at a time step.
+        """
+        return set(self.occupancy.cells_at(time))
+
+    def safe_intervals(self, row: int, col: int) -> List[Tuple[int, float]]:
+        """
+        Maximal [first, last] time ranges (from t=0) in which the cell is free;
+        the last interval is open-ended. Static obstacles have none.
+        """
+        if self.is_static_obstacle(row, col):
+            return []
+        intervals = []
+        first = 0
+        for t in self.occupancy.times_at((row, col)):
+            if t > first:
+                intervals.append((first, t - 1))
+            first = max(first, t + 1)
+        intervals.append((first, float('inf')))
+        return intervals
+
+    def occupancy_mask(self, time: int) -> np.ndarray:
+        """
+        Boolean (rows, cols) mask of every cell occupied at a time step,
+        static obstacles included.
+        """
+        mask = self.obstacle_grid.copy()
+        cells = [(r, c) for r, c in self.occupancy.cells_at(time) if 0 <= r < self.rows and 0 <= c < self.cols]
+        if cells:
+            rows, cols = zip(*cells)
+            mask[list(rows), list(cols)] = True
+        return mask
 
     def get_cost(self, row: int, col: int) -> int:
-        return self.grid[row][col].cost
+        return int(self.cost_grid[row, col])
 
     def neighbors(self, row: int, col: int) -> List[Tuple[int, int]]:
-        moves = [(-1,0), (1,0), (0,-1), (0,1)] # up, down, left, right
         result = []
-        for dr, dc in moves:
+        for dr, dc in MOVES:
             nr, nc = row + dr, col + dc
             if 0 <= nr < self.rows and 0 <= nc < self.cols:
                 result.append((nr, nc))
@@ -0,0 +1,270 @@
+"""
+Run experiments to compare planners.
+
+A sweep runs every planner on every (map, dynamic setting, start/goal pair)
+of a scenario file, on a process pool. Each worker loads a map the first time
+one of its jobs needs it and keeps it. Results are appended to a JSON Lines
+file as they come in, one record per job, so an interrupted sweep resumes
+where it stopped when run again with the same output file.
+
+    python experiment.py scenarios.json --out results.jsonl --processes 8
+
+Scenario file (JSON; everything but maps is optional):
+
+    {
+      "maps": ["maps/large.txt",
+               {"name": "open100", "generate": {"rows": 100, "cols": 100, "density": 0.2, "seed": 1}}],
+      "planners": ["a_star", "jps", "sipp"],
+      "pairs": [[[0, 0], [15, 21]]]  or  {"random": 200, "seed": 0},
+      "dynamic": [{"name": "static"},
+                  {"name": "walkers", "walkers": 10, "seed": 1},
+                  {"name": "truck", "obstacles": [{"path": [[2, 1], [2, 2]], "schedule": [2, 3]}]}],
+      "options": {"local_search": {"seed": 0}}
+    }
+
+Maps are file paths or {"name", "path"} / {"name", "generate": generate_map
+arguments} objects; a map may carry its own "obstacles". Pairs default to
+corner to corner. A run plans with dynamic=True whenever the map or the
+setting has dynamic obstacles. Without a scenario file the original
+comparison of four maps and planners is run.
+"""
+import argparse
+import hashlib
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from environment import GridEnvironment, DynamicObstacle
+from agent import DeliveryAgent
+from benchmark import add_random_walkers, generate_map
+from fleet import random_tasks
+from map_io import load_map
+
+DEFAULT_SCENARIO = {
+    'maps': ['maps/small.txt', 'maps/medium.txt', 'maps/large.txt',
+             {'name': 'maps/dynamic.txt', 'path': 'maps/dynamic.txt',
+              'obstacles': [{'path': [[2, 1], [2, 2], [2, 3], [2, 4], [2, 5]], 'schedule': [2, 3, 4, 5]}]}],
+    'planners': ['bfs', 'uniform_cost', 'a_star', 'local_search']
+}
+
+def _map_spec(entry) -> dict:
+    spec = {'path': entry} if isinstance(entry, str) else dict(entry)
+    spec.setdefault('name', spec.get('path'))
+    if spec['name'] is None:
+        raise ValueError(f"Map needs a name or path: {entry}")
+    return spec
+
+def _obstacles(items: Iterable[dict]) -> List[DynamicObstacle]:
+    return [DynamicObstacle([tuple(cell) for cell in item['path']], list(item['schedule'])) for item in items]
+
+def load_base(spec: dict) -> GridEnvironment:
+    """
+    A scenario map with its own dynamic obstacles, if any.
+    """
+    env = generate_map(**spec['generate']) if 'generate' in spec else load_map(spec['path'])
+    for obstacle in _obstacles(spec.get('obstacles', ())):
+        env.add_dynamic_obstacle(obstacle)
+    return env
+
+def with_setting(base: GridEnvironment, setting: dict) -> GridEnvironment:
+    """
+    base with the dynamic obstacles of a setting added, as an environment
+    over the same arrays (base itself is left as it is).
+    """
+    if not setting.get('obstacles') and not setting.get('walkers'):
+        return base
+    env = GridEnvironment.from_arrays(base.cost_grid, base.obstacle_grid, base.refuel_grid, base.terrain_grid,
+                                      base.terrain_types)
+    for obstacle in base.dynamic_obstacles + _obstacles(setting.get('obstacles', ())):
+        env.add_dynamic_obstacle(obstacle)
+    add_random_walkers(env, setting.get('walkers', 0), np.random.default_rng(setting.get('seed', 0)))
+    return env
+
+def expand(scenario: dict) -> List[dict]:
+    """
+    One job per (map, dynamic setting, planner, pair), grouped by map. Maps
+    are loaded here only to draw random pairs. Job ids end in a hash of the
+    job's map spec, setting, planner, options, start and goal.
+    """
+    settings = scenario.get('dynamic') or [{'name': 'static'}]
+    jobs = []
+    for entry in scenario['maps']:
+        spec = _map_spec(entry)
+        pairs = scenario.get('pairs')
+        if pairs is None:
+            pairs = [(None, None)]  # corner to corner, resolved once the worker has the map
+        elif isinstance(pairs, dict):
+            pairs = list(zip(*random_tasks(load_base(spec), pairs['random'], pairs.get('seed', 0))))
+        for setting in settings:
+            for planner in scenario.get('planners', ['a_star']):
+                options = scenario.get('options', {}).get(planner, {})
+                for i, (start, goal) in enumerate(pairs):
+                    job = {'map': spec, 'setting': setting, 'planner': planner, 'options': options,
+                           'start': start, 'goal': goal}
+                    job['id'] = f"{spec['name']}|{setting['name']}|{planner}|{i}|{_digest(job)}"
+                    jobs.append(job)
+    return jobs
+
+def _digest(job: dict) -> str:
+    """
+    Short hash of everything a job's result depends on, so a resumed sweep
+    never mistakes a record of a different job for this one.
+    """
+    text = json.dumps([job['map'], job['setting'], job['planner'], job['options'], job['start'], job['goal']],
+                      sort_keys=True)
+    return hashlib.sha1(text.encode()).hexdigest()[:12]
+
+# Per-worker maps: base environments by map spec, and with each dynamic setting applied
+_worker_bases: Dict[str, GridEnvironment] = {}
+_worker_envs: Dict[Tuple[str, str], GridEnvironment] = {}
+
+def _environment(spec: dict, setting: dict) -> GridEnvironment:
+    map_key = json.dumps(spec, sort_keys=True)
+    key = (map_key, json.dumps(setting, sort_keys=True))
+    env = _worker_envs.get(key)
+    if env is None:
+        base = _worker_bases.get(map_key)
+        if base is None:
+            base = _worker_bases[map_key] = load_base(spec)
+        env = _worker_envs[key] = with_setting(base, setting)
+    return env
+
+def run_job(job: dict, keep_paths: bool = False) -> dict:
+    """
+    The result record of one job; failures are recorded under 'error'.
+    """
+    record = {'id': job['id'], 'map': job['map']['name'], 'dynamic': job['setting']['name'], 'planner': job['planner']}
+    try:
+        env = _environment(job['map'], job['setting'])
+        start, goal = job['start'], job['goal']
+        if start is None:
+            start, goal = (0, 0), (env.rows - 1, env.cols - 1)
+        record.update(start=list(start), goal=list(goal))
+        result = DeliveryAgent(env, tuple(start), tuple(goal)).run_planner(
+            job['planner'], dynamic=bool(env.dynamic_obstacles), **job['options'])
+    except Exception as error:
+        record['error'] = f"{type(error).__name__}: {error}"
+        return record
+    for key in ('success', 'cost', 'length', 'time', 'unreachable', 'bound', 'restarts'):
+        if key in result:
+            record[key] = result[key]
+    if keep_paths:
+        record['path'] = result['path']
+    return record
+
+def _run_chunk(jobs: List[dict], keep_paths: bool) -> List[dict]:
+    return [run_job(job, keep_paths) for job in jobs]
+
+def read_results(path: str, repair: bool = False) -> Dict[str, dict]:
+    """
+    Records of a results file by job id (the last one wins). With repair, a
+    partly written last line left by an interrupted run is cut off.
+    """
+    records = {}
+    if not os.path.exists(path):
+        return records
+    with open(path, 'rb+' if repair else 'rb') as f:
+        data = f.read()
+        end = data.rfind(b'\n') + 1
+        if repair and end < len(data):
+            f.truncate(end)
+    for line in data[:end].splitlines():
+        if line.strip():
+            record = json.loads(line)
+            records[record['id']] = record
+    return records
+
+def run_experiments(scenario: Optional[dict] = None, output: Optional[str] = None, processes: Optional[int] = None,
+                    resume: bool = True, chunk_size: int = 16, keep_paths: bool = False,
+                    verbose: bool = False) -> dict:
+    """
+    Run a scenario (the default comparison if None). Records are streamed to
+    output (JSON Lines) as jobs finish; with resume, jobs already recorded
+    there without an error are skipped. processes=None or 1 runs in this
+    process. Returns the scenario's records by job id (including those
+    from earlier runs) and how many jobs ran and were skipped.
+    """
+    jobs = expand(scenario or DEFAULT_SCENARIO)
+    records = read_results(output, repair=True) if output and resume else {}
+    done = {job_id for job_id, record in records.items() if 'error' not in record}
+    todo = [job for job in jobs if job['id'] not in done]
+    # Consecutive jobs share a map and setting, so a chunk rarely needs more than one map loaded
+    chunks = [todo[i:i + chunk_size] for i in range(0, len(todo), chunk_size)]
+    start_time = time.time()
+    out = open(output, 'a' if resume else 'w') if output else None
+    finished = 0
+    try:
+        def collect(chunk_records: List[dict]):
+            nonlocal finished
+            for record in chunk_records:
+                records[record['id']] = record
+                if out:
+                    out.write(json.dumps(record) + '\n')
+            if out:
+                out.flush()
+            finished += len(chunk_records)
+            if verbose:
+                print(f"{finished}/{len(todo)} jobs ({time.time() - start_time:.1f} s)")
+
+        if processes and processes > 1 and len(chunks) > 1:
+            with ProcessPoolExecutor(max_workers=processes) as pool:
+                for future in as_completed([pool.submit(_run_chunk, chunk, keep_paths) for chunk in chunks]):
+                    collect(future.result())
+        else:
+            for chunk in chunks:
+                collect(_run_chunk(chunk, keep_paths))
+            _worker_bases.clear()
+            _worker_envs.clear()
+    finally:
+        if out:
+            out.close()
+    records = {job['id']: records[job['id']] for job in jobs if job['id'] in records}  # in scenario order
+    return {'records': records, 'ran': len(todo), 'skipped': len(jobs) - len(todo), 'time': time.time() - start_time}
+
+def summarize(records: Iterable[dict]) -> List[dict]:
+    """
+    Per (map, dynamic setting, planner): runs, successes, errors, mean cost
+    of the successful runs and median planning time.
+    """
+    groups: Dict[Tuple[str, str, str], List[dict]] = {}
+    for record in records:
+        groups.setdefault((record['map'], record['dynamic'], record['planner']), []).append(record)
+    rows = []
+    for (map_name, setting, planner), group in groups.items():
+        solved = [r for r in group if r.get('success')]
+        times = [r['time'] for r in group if 'time' in r]
+        rows.append({'map': map_name, 'dynamic': setting, 'planner': planner, 'runs': len(group),
+                     'success': len(solved), 'errors': sum('error' in r for r in group),
+                     'mean_cost': statistics.mean(r['cost'] for r in solved) if solved else None,
+                     'median_time': statistics.median(times) if times else None})
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep planners over maps, start/goal pairs and dynamic settings")
+    parser.add_argument('scenario', nargs='?', default=None, help='Scenario JSON file (default: the basic comparison)')
+    parser.add_argument('--out', type=str, default=None, help='JSON Lines file to stream results to (and resume from)')
+    parser.add_argument('--processes', type=int, default=None, help='Worker processes')
+    parser.add_argument('--chunk-size', type=int, default=16, help='Jobs sent to a worker at a time')
+    parser.add_argument('--no-resume', action='store_true', help='Overwrite the output instead of resuming')
+    parser.add_argument('--paths', action='store_true', help='Keep the paths in the records')
+    args = parser.parse_args()
+
+    scenario = None
+    if args.scenario:
+        with open(args.scenario) as f:
+            scenario = json.load(f)
+    sweep = run_experiments(scenario, args.out, args.processes, not args.no_resume, args.chunk_size, args.paths,
+                            verbose=True)
+    print(f"Ran {sweep['ran']} jobs in {sweep['time']:.2f} seconds ({sweep['skipped']} already done)")
+    for row in summarize(sweep['records'].values()):
+        cost = f"{row['mean_cost']:.1f}" if row['mean_cost'] is not None else '-'
+        median = f"{row['median_time']:.4f}" if row['median_time'] is not None else '-'
+        errors = f" errors {row['errors']}" if row['errors'] else ''
+        print(f"{row['map']:<20} {row['dynamic']:<10} {row['planner']:<14} solved {row['success']}/{row['runs']}"
+              f"{errors}  mean cost {cost}  median time {median}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+Cost-to-go fields: the cost from every cell to the nearest of one or more goals,
+computed with whole-array NumPy sweeps instead of a per-cell search. Any number
+of agents heading to the same depot can then follow the field downhill.
+"""
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+import numpy as np
+from environment import GridEnvironment, MOVES
+
+INF = float('inf')
+Cell = Tuple[int, int]
+
+class _Scanner:
+    """
+    Precomputed terms for relaxing one grid row at a time (pass transposed
+    arrays to work on columns). Along a row, a cell may take the remaining cost
+    of any cell further along plus the steps in between, as long as every cell
+    entered on the way is free; with prefix sums of the step costs that is a
+    running minimum. Blocked cells split a row into segments, and each segment
+    is shifted by its own multiple of big so the running minimum cannot leak
+    across a wall (anything that does leak ends up above total and is
+    discarded).
+    """
+    def __init__(self, step: np.ndarray, blocked: np.ndarray, total: float):
+        big = 4.0 * (total + 1)
+        prefix = np.cumsum(step, axis=1)  # step is 0 on blocked cells; segments never span them
+        before = np.zeros_like(prefix)
+        before[:, 1:] = prefix[:, :-1]
+        # Moving left, c -> ... -> k costs before[c] - before[k]. A blocked cell
+        # can be left but not entered, so a new segment starts after it.
+        segment = np.zeros_like(prefix)
+        segment[:, 1:] = np.cumsum(blocked[:, :-1], axis=1)
+        self.left = before + segment * big
+        # Moving right, c -> ... -> k costs prefix[k] - prefix[c]; a new segment starts at each blocked cell.
+        self.right = prefix + np.cumsum(blocked, axis=1) * big
+        self.enter = np.where(blocked, INF, step)  # cost of entering each cell from the previous row
+        self.total = total
+
+    def relax(self, dist: np.ndarray) -> bool:
+        """
+        Gauss-Seidel pass over the rows of dist (in place), first downwards then
+        upwards: each row takes the row before it into account, then relaxes
+        along itself. Returns whether anything changed.
+        """
+        changed = False
+        rows = dist.shape[0]
+        for order in (range(rows), range(rows - 1, -1, -1)):
+            prev = None
+            for r in order:
+                row = dist[r] if prev is None else np.minimum(dist[r], self.enter[prev] + dist[prev])
+                left = np.minimum.accumulate(row - self.left[r]) + self.left[r]
+                right = np.minimum.accumulate((row + self.right[r])[::-1])[::-1] - self.right[r]
+                row = np.minimum(row, np.minimum(left, right))
+                row[row > self.total] = INF
+                if not np.array_equal(row, dist[r]):
+                    dist[r] = row
+                    changed = True
+                prev = r
+        return changed
+
+def cost_to_go(env: GridEnvironment, goals: Iterable[Cell]) -> np.ndarray:
+    """
+    float64 (rows, cols) array: cheapest static cost from each cell to any goal,
+    with the same move rules as the static planners in agent.py (inf where no
+    goal can be reached). Only static obstacles block, so the field stays
+    valid while dynamic obstacles come and go. Alternates row-wise and column-wise relaxation passes
+    until neither changes anything, so the number of passes grows with how
+    often optimal paths double back rather than with the size of the map.
+    """
+    blocked = np.asarray(env.obstacle_grid)
+    step = np.where(blocked, 0, env.cost_grid).astype(np.float64)
+    total = float(step.sum())
+    dist = np.full((env.rows, env.cols), INF)
+    for r, c in goals:
+        dist[r, c] = 0
+    scanners = [(dist, _Scanner(step, blocked, total)), (dist.T, _Scanner(step.T, blocked.T, total))]
+    stable = 0
+    turn = 0
+    while stable < len(scanners):
+        view, scanner = scanners[turn % 2]
+        stable = 0 if scanner.relax(view) else stable + 1
+        turn += 1
+    return dist
+
+def descend(env: GridEnvironment, field: np.ndarray, start: Cell) -> Optional[List[Cell]]:
+    """
+    Follow a cost-to-go field from start to its goal, always stepping into the
+    free neighbour with the cheapest step plus remaining cost.
+    """
+    if not np.isfinite(field[start]):
+        return None
+    current = tuple(start)
+    path = [current]
+    while field[current] > 0:
+        best, best_cost = None, INF
+        r, c = current
+        for dr, dc in MOVES:
+            nr, nc = r + dr, c + dc
+            if 0 <= nr < env.rows and 0 <= nc < env.cols and not env.is_occupied(nr, nc, 0):
+                cost = env.get_cost(nr, nc) + field[nr, nc]
+                if cost < best_cost:
+                    best, best_cost = (nr, nc), cost
+        if best is None or len(path) > env.rows * env.cols:
+            return None
+        current = best
+        path.append(current)
+    return path
+
+def field_for(env: GridEnvironment, goal: Cell, max_fields: int = 8) -> np.ndarray:
+    """
+    The environment's cached field for goal, built on first use. At most
+    max_fields fields are kept (least recently used dropped first), since each
+    is a whole-grid float64 array. Any static map edit drops every cached field.
+    """
+    fields: Optional['OrderedDict[Cell, np.ndarray]'] = env.precomputed.get('fields')
+    if fields is None:
+        fields = env.precomputed['fields'] = OrderedDict()
+
+        def invalidate(kind, cells):
+            if kind in ('obstacle', 'cost_increase', 'cost_decrease'):
+                env.precomputed.pop('fields', None)
+                env.unsubscribe(invalidate)
+        env.subscribe(invalidate)
+    goal = tuple(goal)
+    field = fields.get(goal)
+    if field is None:
+        field = fields[goal] = cost_to_go(env, [goal])
+        while len(fields) > max_fields:
+            fields.popitem(last=False)
+    else:
+        fields.move_to_end(goal)
+    return field
@@ -0,0 +1,279 @@
+"""
+Fast paths for the BFS, uniform-cost and A* loops in agent.py on array-backed
+environments. Cells are encoded as r * cols + c, neighbours are computed from
+the code, and g-values, parents and closed flags live in preallocated lists
+instead of tuple-keyed dicts. Each function mirrors the loop it replaces
+step for step (same heap entries, same tie-breaking: an encoded cell orders
+like its (row, col) tuple), so the paths returned are identical.
+"""
+import heapq
+from collections import deque
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import numpy as np
+from environment import GridEnvironment
+
+INF = float('inf')
+Cell = Tuple[int, int]
+
+class Adjacency:
+    """
+    In-bounds neighbours of an encoded cell, in env.neighbors order (up, down,
+    left, right), worked out from the code so nothing is stored per cell.
+    """
+    __slots__ = ('rows', 'cols', 'last_row')
+
+    def __init__(self, rows: int, cols: int):
+        self.rows = rows
+        self.cols = cols
+        self.last_row = (rows - 1) * cols  # first code of the bottom row
+
+    def __getitem__(self, u: int) -> Tuple[int, ...]:
+        cols = self.cols
+        c = u % cols
+        if cols <= u < self.last_row and 0 < c < cols - 1:
+            return (u - cols, u + cols, u - 1, u + 1)
+        result = []
+        if u >= cols:
+            result.append(u - cols)
+        if u < self.last_row:
+            result.append(u + cols)
+        if c:
+            result.append(u - 1)
+        if c < cols - 1:
+            result.append(u + 1)
+        return tuple(result)
+
+    def __len__(self) -> int:
+        return self.rows * self.cols
+
+class FlatGrid:
+    """
+    Flat copies of an environment's costs and occupancy. Built once per
+    environment and patched for the cells each map change reports, so it
+    stays valid across versions without copying the grid again.
+    """
+    heap_ops = (heapq.heappush, heapq.heappop)  # replaced by counting versions when instrumented
+
+    def __init__(self, env: GridEnvironment):
+        rows, cols = env.rows, env.cols
+        self.env = env
+        self.version = env.version
+        self.rows = rows
+        self.cols = cols
+        self.size = rows * cols
+        self.cost: List[int] = env.cost_grid.ravel().tolist()
+        self.wall: List[bool] = env.obstacle_grid.ravel().tolist()
+        self.blocked: List[bool] = env.occupancy_mask(0).ravel().tolist()  # what static searches treat as occupied
+        self.moving: Dict[int, Set[int]] = {}
+        self._index_moving()
+        self.adjacency = Adjacency(rows, cols)
+
+    def _index_moving(self):
+        # Dynamic occupancy is sized by the obstacles, not the grid, so it is simply re-read
+        rows, cols = self.rows, self.cols
+        self.moving = {t: {r * cols + c for r, c in cells if 0 <= r < rows and 0 <= c < cols}
+                       for t, cells in self.env.occupancy.by_time.items()}
+
+    def _on_change(self, kind: str, cells: List[Cell]):
+        env = self.env
+        if kind in ('dynamic', 'dynamic_release'):
+            before = self.moving.get(0, set())
+            self._index_moving()
+            now = self.moving.get(0, set())
+            for v in before ^ now:
+                self.blocked[v] = self.wall[v] or v in now
+        elif kind == 'obstacle':
+            for r, c in cells:
+                v = r * self.cols + c
+                self.wall[v] = bool(env.obstacle_grid[r, c])
+                self.blocked[v] = self.wall[v] or v in self.moving.get(0, ())
+        elif kind in ('cost_increase', 'cost_decrease'):
+            for r, c in cells:
+                self.cost[r * self.cols + c] = int(env.cost_grid[r, c])
+        self.version = env.version
+
+    @classmethod
+    def for_env(cls, env: GridEnvironment) -> 'FlatGrid':
+        """
+        The environment's grid, built on first use and kept up to date from
+        then on (rebuilt only if env.version moved on without it).
+        """
+        flat = env.precomputed.get('flat')
+        if flat is None or flat.version != env.version:
+            if flat is not None:
+                env.unsubscribe(flat._on_change)
+            flat = env.precomputed['flat'] = cls(env)
+            env.subscribe(flat._on_change)
+        return flat
+
+    def encode(self, cell: Cell) -> int:
+        return cell[0] * self.cols + cell[1]
+
+    def trace(self, parent: List[int], current: int) -> List[Cell]:
+        path = []
+        while current != -1:
+            path.append(divmod(current, self.cols))
+            current = parent[current]
+        path.reverse()
+        return path
+
+def bfs(flat: FlatGrid, start: Cell, goal: Cell) -> Optional[List[Cell]]:
+    """
+    Static breadth-first search (DeliveryAgent.bfs with dynamic=False).
+    """
+    s, g = flat.encode(start), flat.encode(goal)
+    adjacency, blocked = flat.adjacency, flat.blocked
+    parent = [-1] * flat.size
+    seen = bytearray(flat.size)
+    seen[s] = 1
+    queue = deque([s])
+    while queue:
+        u = queue.popleft()
+        if u == g:
+            return flat.trace(parent, u)
+        for v in adjacency[u]:
+            if not seen[v] and not blocked[v]:
+                seen[v] = 1
+                queue.append(v)
+                parent[v] = u
+    return None
+
+def uniform_cost(flat: FlatGrid, start: Cell, goal: Cell, dynamic: bool, unit: bool = False) -> Optional[List[Cell]]:
+    """
+    DeliveryAgent._uniform_cost_search with terrain costs, or cost 1 per step
+    when unit is set (dynamic BFS).
+    """
+    s, g = flat.encode(start), flat.encode(goal)
+    adjacency, cost, size = flat.adjacency, flat.cost, flat.size
+    push, pop = flat.heap_ops
+    parent = [-1] * size
+    best = [INF] * size
+    best[s] = 0
+    if not dynamic:
+        blocked = flat.blocked
+        closed = bytearray(size)
+        pq = [(0, s)]
+        while pq:
+            d, u = pop(pq)
+            if u == g:
+                return flat.trace(parent, u)
+            if closed[u]:
+                continue
+            closed[u] = 1
+            for v in adjacency[u]:
+                nd = d + (1 if unit else cost[v])
+                if not closed[v] and not blocked[v] and nd < best[v]:
+                    best[v] = nd
+                    push(pq, (nd, v))
+                    parent[v] = u
+        return None
+    wall, moving = flat.wall, flat.moving
+    visited = set()  # encoded (cell, time) states: time * size + cell
+    pq = [(0, s, 0)]
+    while pq:
+        d, u, t = pop(pq)
+        if u == g:
+            return flat.trace(parent, u)
+        state = t * size + u
+        if state in visited:
+            continue
+        visited.add(state)
+        new_t = t + 1
+        occupied = moving.get(new_t, ())
+        for v in adjacency[u]:
+            nd = d + (1 if unit else cost[v])
+            if new_t * size + v not in visited and not wall[v] and v not in occupied and nd < best[v]:
+                best[v] = nd
+                push(pq, (nd, v, new_t))
+                parent[v] = u
+    return None
+
+def sweep(flat: FlatGrid, start: Cell, goals: List[Cell]) -> Dict[Cell, Optional[List[Cell]]]:
+    """
+    Static uniform_cost to several goals at once: one search that runs until
+    every goal is settled. Up to each goal it pops exactly what a search for
+    that goal alone would, so each path is the one uniform_cost returns.
+    """
+    s = flat.encode(start)
+    remaining = {flat.encode(goal) for goal in goals}
+    adjacency, cost, blocked, size = flat.adjacency, flat.cost, flat.blocked, flat.size
+    push, pop = flat.heap_ops
+    parent = [-1] * size
+    best = [INF] * size
+    best[s] = 0
+    closed = bytearray(size)
+    found = {}
+    pq = [(0, s)]
+    while pq and remaining:
+        d, u = pop(pq)
+        if closed[u]:
+            continue
+        closed[u] = 1
+        if u in remaining:
+            remaining.discard(u)
+            found[u] = flat.trace(parent, u)
+        for v in adjacency[u]:
+            nd = d + cost[v]
+            if not closed[v] and not blocked[v] and nd < best[v]:
+                best[v] = nd
+                push(pq, (nd, v))
+                parent[v] = u
+    return {goal: found.get(flat.encode(goal)) for goal in goals}
+
+def a_star(flat: FlatGrid, start: Cell, goal: Cell, dynamic: bool,
+           heuristic: Optional[Callable[[Cell], float]] = None) -> Optional[List[Cell]]:
+    """
+    DeliveryAgent.a_star; Manhattan distance when no heuristic(pos) is given.
+    """
+    s, g = flat.encode(start), flat.encode(goal)
+    adjacency, cost, size, cols = flat.adjacency, flat.cost, flat.size, flat.cols
+    push, pop = flat.heap_ops
+    manhattan = None
+    if heuristic is None:
+        gr, gc = goal
+        manhattan = (np.abs(np.arange(flat.rows) - gr)[:, None] + np.abs(np.arange(cols) - gc)).ravel().tolist()
+    parent = [-1] * size
+    g_cost = [INF] * size
+    g_cost[s] = 0
+    if not dynamic:
+        blocked = flat.blocked
+        closed = bytearray(size)
+        pq = [(0, s)]
+        while pq:
+            f, u = pop(pq)
+            if u == g:
+                return flat.trace(parent, u)
+            if closed[u]:
+                continue
+            closed[u] = 1
+            base = g_cost[u]
+            for v in adjacency[u]:
+                new_g = base + cost[v]
+                if new_g < g_cost[v] and not closed[v] and not blocked[v]:
+                    g_cost[v] = new_g
+                    h = manhattan[v] if manhattan is not None else heuristic(divmod(v, cols))
+                    push(pq, (new_g + h, v))
+                    parent[v] = u
+        return None
+    wall, moving = flat.wall, flat.moving
+    visited = set()  # encoded (cell, time) states: time * size + cell
+    pq = [(0, s, 0)]
+    while pq:
+        f, u, t = pop(pq)
+        if u == g:
+            return flat.trace(parent, u)
+        state = t * size + u
+        if state in visited:
+            continue
+        visited.add(state)
+        new_t = t + 1
+        occupied = moving.get(new_t, ())
+        base = g_cost[u]
+        for v in adjacency[u]:
+            new_g = base + cost[v]
+            if new_g < g_cost[v] and new_t * size + v not in visited and not wall[v] and v not in occupied:
+                g_cost[v] = new_g
+                h = manhattan[v] if manhattan is not None else heuristic(divmod(v, cols))
+                push(pq, (new_g + h, v, new_t))
+                parent[v] = u
+    return None
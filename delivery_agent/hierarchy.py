@@ -0,0 +1,265 @@
+"""
+Hierarchical path planning (HPA*): the grid is split into square clusters, the
+entrances between neighbouring clusters and the costs between entrances of the
+same cluster are precomputed once per map, and queries search this small
+abstract graph before stitching the stored cluster-local paths together.
+"""
+import heapq
+import itertools
+from typing import Dict, List, Optional, Set, Tuple
+from environment import GridEnvironment
+
+INF = float('inf')
+Cell = Tuple[int, int]
+
+class ClusterGraph:
+    def __init__(self, env: GridEnvironment, cluster_size: int = 10):
+        self.env = env
+        self.cluster_size = cluster_size
+        self.cluster_rows = -(-env.rows // cluster_size)
+        self.cluster_cols = -(-env.cols // cluster_size)
+        # border key ('h', ci, cj): between (ci, cj) and (ci, cj + 1); ('v', ci, cj): between (ci, cj) and (ci + 1, cj)
+        self.transitions: Dict[Tuple[str, int, int], List[Tuple[Cell, Cell]]] = {}
+        self.nodes: Dict[Tuple[int, int], Set[Cell]] = {}  # cluster -> entrance cells inside it
+        self.inter: Dict[Cell, Set[Cell]] = {}  # entrance -> entrances across a border
+        self.intra: Dict[Cell, Dict[Cell, Tuple[int, List[Cell]]]] = {}  # entrance -> {entrance: (cost, path)}
+        self.dirty_clusters: Set[Tuple[int, int]] = set()
+        self.dirty_borders: Set[Tuple[str, int, int]] = set()
+        self.rebuilds = 0
+        for ci in range(self.cluster_rows):
+            for cj in range(self.cluster_cols):
+                self.dirty_clusters.add((ci, cj))
+                if cj + 1 < self.cluster_cols:
+                    self.dirty_borders.add(('h', ci, cj))
+                if ci + 1 < self.cluster_rows:
+                    self.dirty_borders.add(('v', ci, cj))
+        env.subscribe(self._on_change)
+        self.refresh()
+
+    @classmethod
+    def for_env(cls, env: GridEnvironment, cluster_size: int = 10) -> 'ClusterGraph':
+        """
+        The environment's cached graph, built on first use.
+        """
+        graph = env.precomputed.get('hpa')
+        if graph is None or graph.cluster_size != cluster_size:
+            if graph is not None:
+                env.unsubscribe(graph._on_change)
+            graph = cls(env, cluster_size)
+            env.precomputed['hpa'] = graph
+        return graph
+
+    def cluster_of(self, cell: Cell) -> Tuple[int, int]:
+        return (cell[0] // self.cluster_size, cell[1] // self.cluster_size)
+
+    def _bounds(self, cluster: Tuple[int, int]) -> Tuple[int, int, int, int]:
+        size = self.cluster_size
+        r0, c0 = cluster[0] * size, cluster[1] * size
+        return r0, min(r0 + size, self.env.rows), c0, min(c0 + size, self.env.cols)
+
+    def _free(self, r: int, c: int) -> bool:
+        # Static walls only: dynamic changes don't touch the graph, so it must not depend on them
+        return not self.env.is_static_obstacle(r, c)
+
+    def _on_change(self, kind: str, cells: List[Cell]):
+        if kind in ('dynamic', 'dynamic_release', 'refuel'):
+            return
+        size = self.cluster_size
+        for r, c in cells:
+            ci, cj = r // size, c // size
+            self.dirty_clusters.add((ci, cj))
+            # A cell on a cluster edge can change the entrances of that border
+            if c % size == 0 and cj > 0:
+                self.dirty_borders.add(('h', ci, cj - 1))
+            if c % size == size - 1 and cj + 1 < self.cluster_cols:
+                self.dirty_borders.add(('h', ci, cj))
+            if r % size == 0 and ci > 0:
+                self.dirty_borders.add(('v', ci - 1, cj))
+            if r % size == size - 1 and ci + 1 < self.cluster_rows:
+                self.dirty_borders.add(('v', ci, cj))
+
+    def refresh(self):
+        """
+        Recompute dirty borders and clusters; called before every query.
+        """
+        for border in self.dirty_borders:
+            self._build_border(border)
+            kind, ci, cj = border
+            self.dirty_clusters.add((ci, cj))
+            self.dirty_clusters.add((ci, cj + 1) if kind == 'h' else (ci + 1, cj))
+        self.dirty_borders.clear()
+        for cluster in self.dirty_clusters:
+            self._build_cluster(cluster)
+            self.rebuilds += 1
+        self.dirty_clusters.clear()
+
+    def _build_border(self, border: Tuple[str, int, int]):
+        kind, ci, cj = border
+        r0, r1, c0, c1 = self._bounds((ci, cj))
+        if kind == 'h':
+            pairs = [((r, c1 - 1), (r, c1)) for r in range(r0, r1)]
+        else:
+            pairs = [((r1 - 1, c), (r1, c)) for c in range(c0, c1)]
+        transitions = []
+        run: List[Tuple[Cell, Cell]] = []
+        for pair in pairs + [None]:
+            if pair is not None and self._free(*pair[0]) and self._free(*pair[1]):
+                run.append(pair)
+                continue
+            if run:
+                # One transition in the middle of a short entrance, one at each end of a long one
+                transitions.extend([run[len(run) // 2]] if len(run) < 6 else [run[0], run[-1]])
+                run = []
+        self.transitions[border] = transitions
+
+    def _cluster_transitions(self, cluster: Tuple[int, int]) -> List[Tuple[Cell, Cell]]:
+        """
+        (inside, outside) pairs for every transition on the cluster's borders.
+        """
+        ci, cj = cluster
+        result = []
+        for border, flip in ((('h', ci, cj), False), (('h', ci, cj - 1), True), (('v', ci, cj), False), (('v', ci - 1, cj), True)):
+            for a, b in self.transitions.get(border, []):
+                result.append((b, a) if flip else (a, b))
+        return result
+
+    def _build_cluster(self, cluster: Tuple[int, int]):
+        for node in self.nodes.get(cluster, ()):
+            self.intra.pop(node, None)
+            self.inter.pop(node, None)
+        nodes = set()
+        for inside, outside in self._cluster_transitions(cluster):
+            nodes.add(inside)
+            self.inter.setdefault(inside, set()).add(outside)
+        self.nodes[cluster] = nodes
+        cells = self._free_cells(cluster)
+        for node in nodes:
+            dist, parent = self._local_search(cells, node, targets=nodes)
+            self.intra[node] = {other: (dist[other], self._trace(parent, other))
+                                for other in nodes if other != node and other in dist}
+
+    def _free_cells(self, cluster: Tuple[int, int]) -> Dict[Cell, int]:
+        """
+        Terrain cost of every free cell in a cluster.
+        """
+        r0, r1, c0, c1 = self._bounds(cluster)
+        return {(r, c): self.env.get_cost(r, c) for r in range(r0, r1) for c in range(c0, c1) if self._free(r, c)}
+
+    def _local_search(self, cells: Dict[Cell, int], source: Cell, reverse: bool = False, targets: Optional[Set[Cell]] = None):
+        """
+        Dijkstra restricted to the free cells of one cluster, stopping early once
+        every target is settled. With reverse=True distances are costs from each
+        cell *to* source, and parent points towards source.
+        """
+        dist = {source: 0}
+        parent = {source: None}
+        pq = [(0, source)]
+        done = set()
+        remaining = len(targets) if targets is not None else -1
+        while pq and remaining != 0:
+            d, (r, c) = heapq.heappop(pq)
+            if (r, c) in done:
+                continue
+            done.add((r, c))
+            if targets is not None and (r, c) in targets:
+                remaining -= 1
+            if reverse and (r, c) not in cells:
+                continue  # a blocked goal cannot be entered
+            step = cells[(r, c)] if reverse else 0
+            for nb in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+                cost = cells.get(nb)
+                if cost is None:
+                    continue
+                nd = d + (step if reverse else cost)
+                if nd < dist.get(nb, INF):
+                    dist[nb] = nd
+                    parent[nb] = (r, c)
+                    heapq.heappush(pq, (nd, nb))
+        return dist, parent
+
+    def _trace(self, parent: Dict[Cell, Optional[Cell]], cell: Cell) -> List[Cell]:
+        path = []
+        while cell is not None:
+            path.append(cell)
+            cell = parent[cell]
+        path.reverse()
+        return path
+
+    def find_path(self, start: Cell, goal: Cell) -> Optional[List[Cell]]:
+        """
+        Search the abstract graph, then stitch the stored segments into a grid path.
+        """
+        self.refresh()
+        if start != goal and not self._free(*start):
+            # Entrances only cover free cells; leave a blocked start through its free neighbours
+            best_path, best_cost = None, INF
+            for nb in self.env.neighbors(*start):
+                path = self.find_path(nb, goal) if self._free(*nb) else None
+                cost = sum(self.env.get_cost(*cell) for cell in path) if path else INF
+                if cost < best_cost:
+                    best_path, best_cost = [start] + path, cost
+            return best_path
+        start_cluster, goal_cluster = self.cluster_of(start), self.cluster_of(goal)
+        start_cells = self._free_cells(start_cluster)
+        goal_cells = start_cells if goal_cluster == start_cluster else self._free_cells(goal_cluster)
+        from_start, start_parent = self._local_search(start_cells, start)
+        to_goal, goal_parent = self._local_search(goal_cells, goal, reverse=True)
+
+        def heuristic(cell):
+            return abs(cell[0] - goal[0]) + abs(cell[1] - goal[1])
+
+        def start_segment(node):
+            return self._trace(start_parent, node)
+
+        def goal_segment(node):
+            return list(reversed(self._trace(goal_parent, node)))
+
+        # Abstract search; 'start'/'goal' are virtual nodes, segments are built lazily
+        counter = itertools.count()
+        pq = [(heuristic(start), next(counter), 0, 'start')]
+        best = {'start': 0}
+        parent: Dict[object, Tuple[object, object]] = {}
+        closed = set()
+        while pq:
+            f, _, g, node = heapq.heappop(pq)
+            if node in closed:
+                continue
+            closed.add(node)
+            if node == 'goal':
+                return self._stitch(parent, start_segment, goal_segment)
+            edges = []
+            if node == 'start':
+                edges = [(n, from_start[n], ('start', n)) for n in self.nodes[start_cluster] if n in from_start]
+                if start_cluster == goal_cluster and goal in from_start:
+                    edges.append(('goal', from_start[goal], ('direct', goal)))
+            else:
+                edges.extend((other, cost, ('intra', node, other)) for other, (cost, _) in self.intra[node].items())
+                edges.extend((other, self.env.get_cost(*other), ('inter', node, other)) for other in self.inter.get(node, ()))
+                if self.cluster_of(node) == goal_cluster and node in to_goal:
+                    edges.append(('goal', to_goal[node], ('goal', node)))
+            for nxt, cost, how in edges:
+                new_g = g + cost
+                if nxt not in closed and new_g < best.get(nxt, INF):
+                    best[nxt] = new_g
+                    parent[nxt] = (node, how)
+                    heapq.heappush(pq, (new_g + (0 if nxt == 'goal' else heuristic(nxt)), next(counter), new_g, nxt))
+        return None
+
+    def _stitch(self, parent, start_segment, goal_segment) -> List[Cell]:
+        hops = []
+        node = 'goal'
+        while node != 'start':
+            node, how = parent[node]
+            hops.append(how)
+        path: List[Cell] = []
+        for how in reversed(hops):
+            if how[0] in ('start', 'direct'):
+                segment = start_segment(how[1])
+            elif how[0] == 'intra':
+                segment = self.intra[how[1]][how[2]][1]
+            elif how[0] == 'inter':
+                segment = [how[1], how[2]]
+            else:
+                segment = goal_segment(how[1])
+            path.extend(segment[1:] if path else segment)
+        return path
@@ -0,0 +1,160 @@
+"""
+Opt-in search instrumentation for run_planner.
+
+Turn it on per agent (DeliveryAgent(..., instrument=True)) or for every agent
+by registering a profiler hook with add_hook(fn); fn(planner_name, result) is
+called after each instrumented run. The counters and phase timers end up in
+result['stats'].
+
+Nothing is wrapped while instrumentation is off, so it costs nothing: the
+planners take their heap functions from DeliveryAgent.heap_ops and
+FlatGrid.heap_ops, which are plain heapq.heappush/heappop. An instrumented
+run swaps in counting versions, probes the environment's neighbors,
+is_occupied and safe_intervals for its duration, and hands the flat fast
+path a counting view of its arrays.
+
+Counters:
+- expansions: nodes expanded (one per neighbour list looked up; JPS counts its closed jump points)
+- generated: successor cells in those neighbour lists
+- pushes, pops, max_open: open-list heap operations and peak heap size, for
+  the planners in agent.py and flat_search
+- occupancy_checks: cells tested for being blocked
+Timers (seconds, nested phases are included in their parent): 'cache',
+'search', 'preprocess' (per-map tables built during the search) and 'result'.
+"""
+import copy
+import heapq
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Dict, List
+
+HEAP_OPS = (heapq.heappush, heapq.heappop)
+COUNTERS = ('expansions', 'generated', 'pushes', 'pops', 'occupancy_checks', 'max_open')
+PROBED = ('neighbors', 'is_occupied', 'safe_intervals')
+
+_hooks: List[Callable[[str, dict], None]] = []
+
+def add_hook(hook: Callable[[str, dict], None]):
+    """
+    Call hook(planner_name, result) after every run_planner call, which
+    instruments every agent while any hook is registered.
+    """
+    _hooks.append(hook)
+
+def remove_hook(hook: Callable[[str, dict], None]):
+    if hook in _hooks:
+        _hooks.remove(hook)
+
+def hooks() -> List[Callable[[str, dict], None]]:
+    return _hooks
+
+def phase(stats, name: str):
+    """
+    stats.phase(name), or a no-op context when stats is None.
+    """
+    return stats.phase(name) if stats is not None else nullcontext()
+
+class _Probe:
+    """
+    Read-only sequence view that reports each index lookup.
+    """
+    __slots__ = ('items', 'seen')
+
+    def __init__(self, items, seen: Callable[[object], None]):
+        self.items = items
+        self.seen = seen
+
+    def __getitem__(self, index):
+        item = self.items[index]
+        self.seen(item)
+        return item
+
+    def __len__(self):
+        return len(self.items)
+
+class SearchStats:
+    """
+    Counters and phase timers for one planner run.
+    """
+    def __init__(self):
+        for name in COUNTERS:
+            setattr(self, name, 0)
+        self.timers: Dict[str, float] = {}
+
+    def as_dict(self) -> dict:
+        result = {name: getattr(self, name) for name in COUNTERS}
+        result['timers'] = dict(self.timers)
+        return result
+
+    @contextmanager
+    def phase(self, name: str):
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timers[name] = self.timers.get(name, 0.0) + time.perf_counter() - began
+
+    @property
+    def heap_ops(self):
+        """
+        Counting (push, pop) pair with the heapq signatures.
+        """
+        def push(heap, item):
+            self.pushes += 1
+            heapq.heappush(heap, item)
+            if len(heap) > self.max_open:
+                self.max_open = len(heap)
+
+        def pop(heap):
+            self.pops += 1
+            return heapq.heappop(heap)
+        return push, pop
+
+    def _expanded(self, successors):
+        self.expansions += 1
+        self.generated += len(successors)
+
+    def _checked(self, _):
+        self.occupancy_checks += 1
+
+    @contextmanager
+    def probing(self, env):
+        """
+        Count neighbour lookups and occupancy checks on env while the block runs.
+        """
+        saved = {name: vars(env).get(name) for name in PROBED}
+        neighbors, is_occupied, safe_intervals = env.neighbors, env.is_occupied, env.safe_intervals
+
+        def counted_neighbors(row, col):
+            result = neighbors(row, col)
+            self._expanded(result)
+            return result
+
+        def counted_is_occupied(row, col, time):
+            self.occupancy_checks += 1
+            return is_occupied(row, col, time)
+
+        def counted_safe_intervals(row, col):
+            self.occupancy_checks += 1
+            return safe_intervals(row, col)
+        env.neighbors, env.is_occupied, env.safe_intervals = counted_neighbors, counted_is_occupied, counted_safe_intervals
+        try:
+            yield
+        finally:
+            for name, previous in saved.items():
+                if previous is None:
+                    vars(env).pop(name, None)
+                else:
+                    setattr(env, name, previous)
+
+    def flat_view(self, flat):
+        """
+        Shallow copy of a flat_search.FlatGrid whose adjacency and occupancy
+        lookups and heap operations are counted (the grid itself is untouched).
+        """
+        view = copy.copy(flat)
+        view.adjacency = _Probe(flat.adjacency, self._expanded)
+        view.blocked = _Probe(flat.blocked, self._checked)
+        view.wall = _Probe(flat.wall, self._checked)
+        view.heap_ops = self.heap_ops
+        return view
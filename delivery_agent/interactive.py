@@ -0,0 +1,169 @@
+"""
+Interactive interface for delivery agent simulation.
+Allows user to choose fuel, map, dynamic obstacles, and shows map progress.
+"""
+from environment import GridEnvironment, DynamicObstacle
+from agent import DeliveryAgent
+from map_io import load_map
+
+class InteractiveDeliveryAgent(DeliveryAgent):
+    def __init__(self, env, start, goal, fuel=100):
+        super().__init__(env, start, goal, fuel)
+
+    def can_move(self, pos):
+        cost = self.env.get_cost(*pos)
+        return self.fuel >= cost
+
+    def move(self, pos):
+        cost = self.env.get_cost(*pos)
+        if self.fuel >= cost:
+            self.fuel -= cost
+            if self.env.is_refuel_station(*pos):
+                self.fuel = self.fuel_capacity
+            return True
+        return False
+
+def print_map(env, agent_pos, t, agent):
+    print(f"\nMap at time {t}:")
+    moving = env.dynamic_cells_at(t)
+    for r in range(env.rows):
+        row = ""
+        for c in range(env.cols):
+            if (r, c) == agent_pos:
+                row += "A-"  # Agent
+            elif env.obstacle_grid[r, c]:
+                row += "#-"  # Static obstacle
+            elif env.refuel_grid[r, c]:
+                row += "F-"  # Refuel station
+            elif (r, c) in moving:
+                row += "O-"  # Dynamic obstacle at this time
+            else:
+                cost = env.get_cost(r, c)
+                row += f"{cost}-"
+        print(row.rstrip('-'))  # Remove trailing -
+    print(f"Agent fuel: {agent.fuel}")
+
+def main():
+    print("=== Interactive Delivery Agent Simulation ===")
+
+    # Choose map
+    maps = {
+        '1': ('maps/small.txt', 'Small map'),
+        '2': ('maps/medium.txt', 'Medium map'),
+        '3': ('maps/large.txt', 'Large map'),
+        '4': ('maps/dynamic.txt', 'Dynamic map')
+    }
+    print("Choose map:")
+    for k, v in maps.items():
+        print(f"{k}. {v[1]}")
+    map_choice = input("Enter choice (1-4): ").strip()
+    if map_choice not in maps:
+        print("Invalid choice.")
+        return
+    map_file, _ = maps[map_choice]
+    env = load_map(map_file)
+
+    # Dynamic obstacles
+    dynamic = input("Enable dynamic obstacles? (y/n): ").strip().lower() == 'y'
+    if dynamic:
+        # Add multiple dynamic obstacles, adjusted for map size
+        max_col = env.cols - 1
+        obs1 = DynamicObstacle([(2,1),(2,2),(2,3),(2,4),(2,min(4,max_col))], [2,3,4,5])  # Moves right on row 2
+        env.add_dynamic_obstacle(obs1)
+        obs2 = DynamicObstacle([(1,3),(2,3),(3,3),(min(4,env.rows-1),3)], [3,4,5,6])  # Moves down on col 3
+        env.add_dynamic_obstacle(obs2)
+        obs3 = DynamicObstacle([(3,1),(3,2),(3,min(3,max_col))], [4,5,6])  # Moves right on row 3
+        env.add_dynamic_obstacle(obs3)
+        print("Dynamic obstacles added:")
+        print(f"  Obstacle 1: Moves right on row 2 from col 1 to {min(4,max_col)} at times 2-5")
+        print(f"  Obstacle 2: Moves down on col 3 from row 1 to {min(4,env.rows-1)} at times 3-6")
+        print(f"  Obstacle 3: Moves right on row 3 from col 1 to {min(3,max_col)} at times 4-6")
+
+    # Fuel
+    fuel = int(input("Enter initial fuel (e.g., 50): ").strip())
+
+    # Replanning strategy
+    strategies = {'2': 'd_star_lite', '3': 'fuel_aware'}
+    replanner = strategies.get(input("Replanning strategy (1. Local search, 2. D* Lite, 3. Fuel-aware A*): ").strip(), 'local_search')
+
+    start = (0, 0)
+    goal = (env.rows - 1, env.cols - 1)
+    agent = InteractiveDeliveryAgent(env, start, goal, fuel)
+
+    print(f"Start: {start}, Goal: {goal}, Fuel: {fuel}, Dynamic: {dynamic}")
+
+    # Check the trip is possible on the fuel in the tank before moving at all
+    result = agent.run_planner('fuel_aware', dynamic=dynamic)
+    if not result['success']:
+        print(f"No path to the goal within the fuel budget ({fuel}). Not starting.")
+        return
+
+    # Plan initial path (with D* Lite when replanning incrementally, so its search can be reused)
+    label = 'D* Lite' if replanner == 'd_star_lite' else 'fuel-aware A*'
+    print(f"\nPlanning initial path using {label}...")
+    if replanner == 'd_star_lite':
+        result = agent.run_planner('d_star_lite', dynamic=dynamic)
+    if not result['success']:
+        print("No initial path found.")
+        return
+    path = result['path']
+    print(f"Initial path: {path}")
+
+    # Simulate movement
+    current_pos = start
+    t = 0
+    total_cost = 0
+    print_map(env, current_pos, t, agent)
+
+    while current_pos != goal:
+        # Check if next move is blocked
+        next_pos = path[path.index(current_pos) + 1] if path.index(current_pos) + 1 < len(path) else goal
+        move_cost = env.get_cost(*next_pos)
+
+        if env.is_occupied(next_pos[0], next_pos[1], t + 1):
+            print(f"Obstacle detected at {next_pos} at time {t+1}, replanning...")
+            if replanner == 'd_star_lite':
+                # Repair the previous search, treating cells occupied next step as blocked
+                agent.start = current_pos
+                new_result = agent.run_planner('d_star_lite', dynamic=dynamic, blocked_cells=env.dynamic_cells_at(t + 1))
+            elif replanner == 'fuel_aware':
+                temp_agent = InteractiveDeliveryAgent(env, current_pos, goal, agent.fuel)
+                temp_agent.fuel_capacity = agent.fuel_capacity
+                new_result = temp_agent.run_planner('fuel_aware', dynamic=dynamic)
+            else:
+                # Replan using local search
+                temp_agent = InteractiveDeliveryAgent(env, current_pos, goal, agent.fuel)
+                new_result = temp_agent.run_planner('local_search', dynamic=dynamic)
+            if new_result['success']:
+                new_path = new_result['path']
+                print(f"New path: {new_path}")
+                path = new_path
+                next_pos = path[1]
+                move_cost = env.get_cost(*next_pos)
+            else:
+                print("Replanning failed. Agent stuck.")
+                break
+
+        if not agent.can_move(next_pos):
+            print(f"Insufficient fuel to move to {next_pos} (need {move_cost}, have {agent.fuel}). Agent stuck.")
+            break
+
+        # Move
+        if agent.move(next_pos):
+            total_cost += move_cost
+            current_pos = next_pos
+            t += 1
+            print_map(env, current_pos, t, agent)
+        else:
+            print("Move failed due to fuel.")
+            break
+
+        if current_pos == goal:
+            print(f"Reached goal at time {t}, total cost: {total_cost}, remaining fuel: {agent.fuel}")
+            break
+
+    if current_pos != goal:
+        print("Simulation ended without reaching goal.")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""
+ALT (A*, Landmarks, Triangle inequality) preprocessing. Exact cost tables to and
+from a few landmark cells give a lower bound on the cost between any two cells
+that, unlike Manhattan distance, accounts for walls and expensive terrain.
+"""
+import heapq
+from typing import Callable, List, Tuple
+import numpy as np
+from environment import GridEnvironment
+
+INF = float('inf')
+
+def _sweep(free: List[bool], cost: List[int], rows: int, cols: int, source: int, reverse: bool) -> np.ndarray:
+    """
+    Dijkstra over the whole grid from a flat cell index. Forward gives the cost
+    from source to every cell; reverse gives the cost from every cell to source.
+    """
+    dist = [INF] * (rows * cols)
+    dist[source] = 0
+    pq = [(0, source)]
+    while pq:
+        d, u = heapq.heappop(pq)
+        if d > dist[u]:
+            continue
+        step = cost[u]  # reverse: moving from a neighbour into u
+        r, c = divmod(u, cols)
+        for v, ok in ((u - cols, r > 0), (u + cols, r < rows - 1), (u - 1, c > 0), (u + 1, c < cols - 1)):
+            if ok and free[v]:
+                nd = d + (step if reverse else cost[v])
+                if nd < dist[v]:
+                    dist[v] = nd
+                    heapq.heappush(pq, (nd, v))
+    return np.array(dist, dtype=np.float32).reshape(rows, cols)
+
+def _leave_blocked(dist_to: np.ndarray, free_mask: np.ndarray, cost: np.ndarray) -> np.ndarray:
+    """
+    Fill in cost-to-landmark for blocked cells: an agent starting on one may
+    still step off it into a free neighbour.
+    """
+    via = np.where(free_mask, dist_to + cost, np.inf)
+    best = np.full(dist_to.shape, np.inf, dtype=np.float32)
+    best[1:, :] = np.minimum(best[1:, :], via[:-1, :])
+    best[:-1, :] = np.minimum(best[:-1, :], via[1:, :])
+    best[:, 1:] = np.minimum(best[:, 1:], via[:, :-1])
+    best[:, :-1] = np.minimum(best[:, :-1], via[:, 1:])
+    return np.where(free_mask, dist_to, best).astype(np.float32)
+
+class LandmarkTable:
+    """
+    dist_from[i, r, c]: cost from landmark i to (r, c); dist_to[i, r, c]: cost
+    from (r, c) to landmark i (moves are not symmetric, since entering a cell
+    costs that cell's terrain cost). Unreachable entries are inf.
+    """
+    def __init__(self, landmarks: List[Tuple[int, int]], dist_from: np.ndarray, dist_to: np.ndarray):
+        self.landmarks = [tuple(l) for l in landmarks]
+        self.dist_from = dist_from
+        self.dist_to = dist_to
+
+    @classmethod
+    def build(cls, env: GridEnvironment, count: int = 8) -> 'LandmarkTable':
+        """
+        Pick landmarks by farthest-point selection and compute their tables.
+        """
+        free_mask = ~np.asarray(env.obstacle_grid)  # static walls only, so the table holds at any time step
+        free_cells = np.flatnonzero(free_mask)
+        rows, cols = env.rows, env.cols
+        if len(free_cells) == 0:
+            empty = np.full((0, rows, cols), np.inf, dtype=np.float32)
+            return cls([], empty, empty.copy())
+        free = free_mask.ravel().tolist()
+        cost = env.cost_grid.ravel().tolist()
+        # Start from the free cell farthest from the first one, then keep adding
+        # the cell farthest from every landmark chosen so far.
+        seed = _sweep(free, cost, rows, cols, int(free_cells[0]), reverse=False)
+        landmarks, dist_from, dist_to = [], [], []
+        nearest = np.where(np.isfinite(seed), seed, -1).ravel()
+        for _ in range(min(count, len(free_cells))):
+            candidate = int(np.argmax(nearest))
+            if nearest[candidate] < 0 or candidate in landmarks:
+                break
+            landmarks.append(candidate)
+            dist_from.append(_sweep(free, cost, rows, cols, candidate, reverse=False))
+            dist_to.append(_leave_blocked(_sweep(free, cost, rows, cols, candidate, reverse=True), free_mask, env.cost_grid))
+            reached = np.isfinite(dist_from[-1]).ravel()
+            nearest = np.where(reached, np.minimum(nearest, dist_from[-1].ravel()), nearest)
+            nearest[candidate] = -1
+        return cls([divmod(l, cols) for l in landmarks], np.stack(dist_from), np.stack(dist_to))
+
+    @classmethod
+    def for_env(cls, env: GridEnvironment, count: int = 8) -> 'LandmarkTable':
+        """
+        The environment's cached table, built on first use. Any static map edit
+        drops it, since the stored distances would no longer be exact.
+        """
+        table = env.precomputed.get('alt')
+        if table is None:
+            table = cls.build(env, count)
+            table.attach(env)
+        return table
+
+    def attach(self, env: GridEnvironment):
+        """
+        Install this table as the environment's cached ALT table.
+        """
+        if self.dist_from.shape[1:] != (env.rows, env.cols):
+            raise ValueError(f"Landmark table is {self.dist_from.shape[1:]}, map is {(env.rows, env.cols)}")
+        def invalidate(kind, cells):
+            if kind in ('obstacle', 'cost_increase', 'cost_decrease'):
+                env.precomputed.pop('alt', None)
+                env.unsubscribe(invalidate)
+        env.precomputed['alt'] = self
+        env.subscribe(invalidate)
+
+    def save(self, path: str):
+        np.savez_compressed(path, landmarks=np.array(self.landmarks, dtype=np.int32).reshape(-1, 2),
+                            dist_from=self.dist_from, dist_to=self.dist_to)
+
+    @classmethod
+    def load(cls, path: str) -> 'LandmarkTable':
+        with np.load(path) as data:
+            return cls([tuple(l) for l in data['landmarks'].tolist()], data['dist_from'], data['dist_to'])
+
+    def heuristic(self, goal: Tuple[int, int]) -> Callable[[Tuple[int, int]], float]:
+        """
+        Admissible estimate of the cost from a cell to goal: the best triangle
+        inequality bound over all landmarks, and never below Manhattan distance.
+        """
+        tables = [(self.dist_from[i], self.dist_to[i], self.dist_from[i].item(goal), self.dist_to[i].item(goal))
+                  for i in range(len(self.landmarks))]
+
+        def estimate(pos):
+            best = abs(pos[0] - goal[0]) + abs(pos[1] - goal[1])
+            for dist_from, dist_to, from_goal, to_goal in tables:
+                # d(L, goal) - d(L, pos) and d(pos, L) - d(goal, L); inf - inf says nothing
+                from_pos = dist_from.item(pos)
+                if from_goal != from_pos:
+                    best = max(best, from_goal - from_pos)
+                to_pos = dist_to.item(pos)
+                if to_pos != to_goal:
+                    best = max(best, to_pos - to_goal)
+            return best
+        return estimate
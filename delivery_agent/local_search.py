@@ -0,0 +1,132 @@
+"""
+Stochastic local search for DeliveryAgent.local_search_replan: independent
+randomized walks towards the goal (greedy on step cost plus Manhattan
+distance, with simulated annealing and a tabu list of recently visited cells
+to get out of dead ends), run serially or across a process pool. All walks
+share the best cost found so far. Dynamic walks give up once they are past
+it; a static walk's path is loop-cut at the end, so its running cost is no
+bound and it always runs to the goal. Either way the result does not depend
+on the order in which the walks finish.
+"""
+import math
+import multiprocessing
+import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional, Tuple
+from environment import GridEnvironment
+
+INF = float('inf')
+Cell = Tuple[int, int]
+
+def _remove_loops(path: List[Cell]) -> List[Cell]:
+    """
+    Cut out every cycle, keeping the first visit of each cell.
+    """
+    result: List[Cell] = []
+    index = {}
+    for cell in path:
+        if cell in index:
+            for dropped in result[index[cell] + 1:]:
+                del index[dropped]
+            del result[index[cell] + 1:]
+        else:
+            index[cell] = len(result)
+            result.append(cell)
+    return result
+
+def walk(env: GridEnvironment, best, start: Cell, goal: Cell, dynamic: bool, seed: int, max_iter: int,
+         temperature: float, tabu_size: int, deadline: Optional[float]) -> Optional[Tuple[int, List[Cell]]]:
+    """
+    One restart. best is a shared multiprocessing.Value holding the cheapest
+    cost found by any walk; it is updated when this walk beats it.
+    Returns (cost, path), or None if the walk got stuck or was cut short.
+    """
+    rng = random.Random(seed)
+    current, t, cost = start, 0, 0
+    path = [start]
+    tabu = deque([start], maxlen=tabu_size)
+
+    def score(cell):
+        return env.get_cost(*cell) + abs(cell[0] - goal[0]) + abs(cell[1] - goal[1])
+
+    for step in range(max_iter):
+        if current == goal:
+            break
+        if (dynamic and cost > best.value) or (deadline is not None and step % 32 == 0 and time.time() >= deadline):
+            return None
+        new_t = t + 1 if dynamic else 0
+        options = [cell for cell in env.neighbors(*current) if not env.is_occupied(cell[0], cell[1], new_t)]
+        if not options:
+            return None
+        fresh = [cell for cell in options if cell not in tabu] or options
+        choice = min(fresh, key=score)
+        heat = temperature * (1 - step / max_iter)
+        if heat > 0:
+            candidate = rng.choice(fresh)
+            delta = score(candidate) - score(choice)
+            if delta <= 0 or rng.random() < math.exp(-delta / heat):
+                choice = candidate
+        current, t = choice, new_t
+        cost += env.get_cost(*current)
+        path.append(current)
+        tabu.append(current)
+    if current != goal:
+        return None
+    if not dynamic:
+        path = _remove_loops(path)
+        cost = sum(env.get_cost(*cell) for cell in path[1:])
+    with best.get_lock():
+        if cost > best.value:  # ties are kept, the lowest restart index wins
+            return None
+        best.value = cost
+    return cost, path
+
+_worker_env: Optional[GridEnvironment] = None
+_worker_best = None
+
+def _init_worker(env: GridEnvironment, best):
+    global _worker_env, _worker_best
+    _worker_env, _worker_best = env, best
+
+def _worker_walk(args):
+    return args[0], walk(_worker_env, _worker_best, *args[1:])
+
+def search(env: GridEnvironment, start: Cell, goal: Cell, dynamic: bool = False, restarts: int = 10,
+           seed: Optional[int] = None, max_iter: int = 1000, temperature: float = 2.0, tabu_size: int = 16,
+           time_budget: Optional[float] = None, processes: Optional[int] = None) -> Tuple[Optional[List[Cell]], dict]:
+    """
+    Run the restarts (restart 0 is the plain greedy walk, the rest anneal)
+    and return (best path or None, stats).
+    """
+    base = seed if seed is not None else random.randrange(2 ** 31)
+    deadline = time.time() + time_budget if time_budget is not None else None
+    best = multiprocessing.Value('d', INF)
+    jobs = [(i, start, goal, dynamic, base + i, max_iter, temperature if i else 0.0, tabu_size, deadline)
+            for i in range(restarts)]
+    found = []
+    if processes and processes > 1 and restarts > 1:
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(env, best)) as pool:
+            futures = [pool.submit(_worker_walk, job) for job in jobs]
+            for future in as_completed(futures):
+                i, result = future.result()
+                if result is not None:
+                    found.append((result[0], i, result[1]))
+                if deadline is not None and time.time() >= deadline:
+                    for pending in futures:
+                        pending.cancel()
+                    break
+    else:
+        for job in jobs:
+            if deadline is not None and time.time() >= deadline:
+                break
+            result = walk(env, best, *job[1:])
+            if result is not None:
+                found.append((result[0], job[0], result[1]))
+    stats = {'restarts': restarts, 'improvements': len(found)}
+    if not found:
+        return None, stats
+    cost, index, path = min(found, key=lambda item: item[:2])
+    stats['best_restart'] = index
+    return path, stats
@@ -2,34 +2,25 @@
 Main CLI entry point for running delivery agent planners.
 """
 import argparse
-from environment import GridEnvironment, DynamicObstacle
+from environment import DynamicObstacle
 from agent import DeliveryAgent
+from map_io import load_map
 import time
 
-def load_map(file_path: str) -> GridEnvironment:
-    with open(file_path, 'r') as f:
-        lines = [line.strip().split('-') for line in f.readlines() if line.strip()]
-    rows = len(lines)
-    cols = max(len(row) for row in lines) if lines else 0
-    env = GridEnvironment(rows, cols)
-    for r, row in enumerate(lines):
-        for c in range(cols):
-            ch = row[c] if c < len(row) else '1'
-            if ch == '#':
-                env.set_static_obstacle(r, c)
-            elif ch.isdigit():
-                env.set_terrain_cost(r, c, int(ch))
-            else:
-                env.set_terrain_cost(r, c, 1)
-    return env
-
 def main():
     parser = argparse.ArgumentParser(description="Autonomous Delivery Agent CLI")
-    parser.add_argument('--planner', type=str, choices=['bfs', 'uniform_cost', 'a_star', 'local_search'], required=True, help='Planner to use')
+    parser.add_argument('--planner', type=str, choices=['bfs', 'uniform_cost', 'a_star', 'local_search', 'd_star_lite', 'sipp', 'jps', 'hpa_star', 'alt', 'fuel_aware', 'wavefront', 'ara_star', 'bidirectional_dijkstra', 'bidirectional_a_star'], required=True, help='Planner to use')
     parser.add_argument('--map', type=str, required=True, help='Path to map file')
     parser.add_argument('--start', type=str, default='0,0', help='Start position row,col')
     parser.add_argument('--goal', type=str, default=None, help='Goal position row,col')
     parser.add_argument('--dynamic', action='store_true', help='Enable dynamic obstacles handling')
+    parser.add_argument('--time-budget', type=float, default=None, help='Seconds the anytime (ara_star) or local search planner may use')
+    parser.add_argument('--max-expansions', type=int, default=None, help='Expansion budget for the anytime planner (ara_star)')
+    parser.add_argument('--restarts', type=int, default=10, help='Random restarts for local_search')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed for local_search')
+    parser.add_argument('--processes', type=int, default=None, help='Worker processes for local_search restarts')
+    parser.add_argument('--stats', action='store_true', help='Print search counters and phase timers')
+    parser.add_argument('--fuel', type=int, default=None, help='Fuel in the tank (fuel_aware planner); unlimited by default')
     args = parser.parse_args()
 
     env = load_map(args.map)
@@ -42,16 +33,33 @@ def main():
     start = tuple(map(int, args.start.split(',')))
     goal = tuple(map(int, args.goal.split(','))) if args.goal else (env.rows - 1, env.cols - 1)
 
-    agent = DeliveryAgent(env, start, goal)
+    agent = DeliveryAgent(env, start, goal, args.fuel, instrument=args.stats)
 
     print(f"Running planner {args.planner} from {start} to {goal} on map {args.map} with dynamic={dynamic}")
-    result = agent.run_planner(args.planner, dynamic=dynamic)
+    options = {}
+    if args.planner == 'ara_star':
+        options = {'time_budget': args.time_budget, 'max_expansions': args.max_expansions}
+    elif args.planner == 'local_search':
+        options = {'restarts': args.restarts, 'seed': args.seed, 'processes': args.processes,
+                   'time_budget': args.time_budget}
+    result = agent.run_planner(args.planner, dynamic=dynamic, **options)
 
     if result['success']:
         print(f"Path found with cost {result['cost']}, length {result['length']}, time {result['time']:.4f} seconds")
+        if 'heuristic_strength' in result:
+            print(f"Heuristic strength at start: {result['heuristic_strength']:.2f}")
+        if 'bound' in result:
+            print(f"Within {result['bound']:.2f}x of the optimal cost")
+        if 'fuel_left' in result:
+            print(f"Fuel left at goal: {result['fuel_left']}")
         print("Path:", result['path'])
     else:
         print("No path found.")
+    if 'stats' in result:
+        stats = dict(result['stats'])
+        timers = stats.pop('timers')
+        print("Search stats:", ', '.join(f"{name}={value}" for name, value in stats.items()))
+        print("Timers:", ', '.join(f"{name}={seconds:.4f}s" for name, seconds in timers.items()))
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,106 @@
+"""
+Map loading and saving. Two formats are supported:
+
+- text: one row per line, cells separated by '-': a digit string is the cell's
+  movement cost, '#' a static obstacle, 'F' a refuel station (cost 1); short
+  rows are padded with cost-1 cells.
+- binary: a small header followed by the raw cost, obstacle, refuel and terrain
+  planes. Binary maps are memory-mapped read-only, so loading does not copy the
+  grid and processes that open the same file share it in the page cache. The
+  environment copies a plane only when it is first edited.
+
+Convert a text map with: python map_io.py maps/large.txt maps/large.bin
+"""
+import argparse
+import struct
+from typing import Dict, List, Tuple
+import numpy as np
+from environment import GridEnvironment
+
+MAGIC = b'DAGRID1\n'
+HEADER = struct.Struct('<8sIII')  # magic, rows, cols, length of the terrain name block
+PLANES = [('cost_grid', np.int32), ('obstacle_grid', np.bool_), ('refuel_grid', np.bool_), ('terrain_grid', np.uint8)]
+
+def _align(offset: int) -> int:
+    return -(-offset // 8) * 8
+
+def is_binary(path: str) -> bool:
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+def load_text(path: str) -> GridEnvironment:
+    with open(path, 'r') as f:
+        lines = [line.strip().split('-') for line in f.readlines() if line.strip()]
+    rows = len(lines)
+    cols = max(len(row) for row in lines) if lines else 0
+    cells = np.array([row + ['1'] * (cols - len(row)) for row in lines], dtype=str).reshape(rows, cols)
+    digits = np.char.isdigit(cells)
+    cost_grid = np.where(digits, cells, '1').astype(np.int32)
+    return GridEnvironment.from_arrays(cost_grid, cells == '#', refuel_grid=cells == 'F')
+
+def save_text(env: GridEnvironment, path: str):
+    with open(path, 'w') as f:
+        for r in range(env.rows):
+            row = []
+            for c in range(env.cols):
+                if env.obstacle_grid[r, c]:
+                    row.append('#')
+                elif env.refuel_grid[r, c]:
+                    row.append('F')
+                else:
+                    row.append(str(env.get_cost(r, c)))
+            f.write('-'.join(row) + '\n')
+
+def save_binary(env: GridEnvironment, path: str):
+    names = '\n'.join(env.terrain_types).encode('utf-8')
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, env.rows, env.cols, len(names)))
+        f.write(names)
+        f.write(b'\0' * (_align(f.tell()) - f.tell()))
+        for name, dtype in PLANES:
+            f.write(np.ascontiguousarray(getattr(env, name), dtype=dtype).tobytes())
+
+def open_planes(path: str) -> Tuple[Dict[str, np.memmap], List[str]]:
+    """
+    Read-only memory maps of every plane in a binary map, plus its terrain names.
+    Nothing is read from the planes until they are indexed.
+    """
+    with open(path, 'rb') as f:
+        magic, rows, cols, names_len = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a binary map")
+        terrain_types = f.read(names_len).decode('utf-8').split('\n')
+    offset = _align(HEADER.size + names_len)
+    planes = {}
+    for name, dtype in PLANES:
+        planes[name] = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(rows, cols))
+        offset += rows * cols * np.dtype(dtype).itemsize
+    return planes, terrain_types
+
+def load_binary(path: str) -> GridEnvironment:
+    planes, terrain_types = open_planes(path)
+    return GridEnvironment.from_arrays(planes['cost_grid'], planes['obstacle_grid'], planes['refuel_grid'],
+                                       planes['terrain_grid'], terrain_types)
+
+def load_map(path: str) -> GridEnvironment:
+    """
+    Load a map in either format (detected from the file contents).
+    """
+    return load_binary(path) if is_binary(path) else load_text(path)
+
+def convert(paths: List[str]):
+    for source, target in zip(paths[::2], paths[1::2]):
+        env = load_map(source)
+        if is_binary(source):
+            save_text(env, target)
+        else:
+            save_binary(env, target)
+        print(f"{source} -> {target} ({env.rows}x{env.cols})")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Convert maps between the text and binary formats")
+    parser.add_argument('paths', nargs='+', help='source target [source target ...]')
+    args = parser.parse_args()
+    if len(args.paths) % 2:
+        parser.error("expected pairs of source and target paths")
+    convert(args.paths)
@@ -0,0 +1,178 @@
+"""
+Streaming dynamic obstacles over a sliding time window.
+
+DynamicObstacle needs a whole path and schedule up front, and every obstacle
+added to an environment stays in its occupancy index for good. An
+ObstacleFeed instead takes observations "cell (row, col) is occupied at time
+t" one at a time, from any time-ordered iterable (a generator, or a file via
+read_observations) or pushed with observe(). It installs a SlidingOccupancy
+as the environment's occupancy index, and advance(now) moves the window:
+time steps before now are dropped, and observations up to now + horizon are
+read in. The index therefore never holds more than horizon + 1 time steps,
+and lookups cost the same at the end of a long shift as at its start.
+
+Observations carry absolute times, but the environment counts time from
+now: after advance(now), env.is_occupied(r, c, 1) asks about time now + 1.
+Planners start at t=0, so a plan made from the current position after
+advance(now) is checked against the right time steps. Every change is
+announced to the environment's listeners: newly read cells as a 'dynamic'
+change, like add_dynamic_obstacle, and on advance every cell whose occupied
+steps moved or expired as a 'dynamic_release' change (cells may now be
+free where they were not, so caches such as PathCache drop their results).
+"""
+import bisect
+import heapq
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from environment import GridEnvironment, DynamicObstacle, OccupancyIndex
+
+Cell = Tuple[int, int]
+Observation = Tuple[int, int, int]  # (time, row, col)
+
+class SlidingOccupancy(OccupancyIndex):
+    """
+    OccupancyIndex of the time steps from now on, counted from now (time 0 is now).
+    """
+    def __init__(self, now: int = 0):
+        super().__init__()
+        self.now = now
+
+    def add(self, obstacle: DynamicObstacle):
+        # Schedules of obstacles added to the environment are in its time, which starts at now
+        for pos, t in zip(obstacle.path, obstacle.schedule):
+            self.mark(tuple(pos), self.now + t)
+
+    def mark(self, cell: Cell, time: int) -> bool:
+        """
+        Record one occupied cell at an absolute time; False if it was already
+        known or is in the past.
+        """
+        if time < self.now:
+            return False
+        t = time - self.now
+        cells = self.by_time.setdefault(t, set())
+        if cell in cells:
+            return False
+        cells.add(cell)
+        bisect.insort(self.by_cell.setdefault(cell, []), t)
+        return True
+
+    def advance(self, now: int) -> int:
+        """
+        Move time 0 to now: drop the steps before it and renumber the rest.
+        Returns the number of entries dropped.
+        """
+        shift = now - self.now
+        if shift <= 0:
+            return 0
+        dropped = sum(len(cells) for t, cells in self.by_time.items() if t < shift)
+        self.by_time = {t - shift: cells for t, cells in self.by_time.items() if t >= shift}
+        by_cell = {}
+        for cell, times in self.by_cell.items():
+            kept = [t - shift for t in times[bisect.bisect_left(times, shift):]]
+            if kept:
+                by_cell[cell] = kept
+        self.by_cell = by_cell
+        self.now = now
+        return dropped
+
+def observations(obstacles: Iterable[DynamicObstacle]) -> Iterator[Observation]:
+    """
+    The positions of whole obstacles as one time-ordered observation stream.
+    """
+    return heapq.merge(*(sorted((t, r, c) for (r, c), t in zip(obstacle.path, obstacle.schedule))
+                         for obstacle in obstacles))
+
+def read_observations(path: str) -> Iterator[Observation]:
+    """
+    Observations from a text file with one "time row col" line each (commas
+    also separate; blank lines and # comments are skipped), read lazily.
+    """
+    with open(path) as f:
+        for line in f:
+            line = line.split('#', 1)[0].replace(',', ' ').split()
+            if line:
+                t, r, c = map(int, line)
+                yield t, r, c
+
+class ObstacleFeed:
+    """
+    Feeds observations into env over the window [now, now + horizon], which
+    env sees as time steps 0 to horizon.
+    source must be in time order; observe() takes pushes in any order.
+    Obstacles already on env are carried over into the stream.
+    """
+    def __init__(self, env: GridEnvironment, source: Iterable[Observation] = (), horizon: int = 32, now: int = 0):
+        self.env = env
+        self.horizon = horizon
+        self.occupancy = SlidingOccupancy(now)
+        self.source = heapq.merge(observations(env.dynamic_obstacles), (tuple(item) for item in source))
+        self._next: Optional[Observation] = None  # read from source but beyond the window
+        self.pending: List[Observation] = []  # heap of pushed observations beyond the window
+        self.observed = 0
+        self.expired = 0
+        self.late = 0  # observations that arrived for a time already past
+        env.occupancy = self.occupancy
+        changed = self._fill()
+        if changed:
+            env._notify('dynamic', changed)
+
+    @property
+    def now(self) -> int:
+        return self.occupancy.now
+
+    def observe(self, time: int, row: int, col: int):
+        """
+        Push one observation; it is applied at once if it falls in the window.
+        """
+        if time <= self.now + self.horizon:
+            changed = self._mark([(time, row, col)])
+            if changed:
+                self.env._notify('dynamic', changed)
+        else:
+            heapq.heappush(self.pending, (time, row, col))
+
+    def advance(self, now: int) -> List[Cell]:
+        """
+        Slide the window to start at now. Returns the newly occupied cells;
+        listeners also hear about the cells whose steps moved or expired.
+        """
+        moved = set(self.occupancy.by_cell) if now > self.now else set()
+        self.expired += self.occupancy.advance(now)
+        added = self._fill()
+        if moved:
+            self.env._notify('dynamic_release', sorted(moved.union(added)))
+        elif added:
+            self.env._notify('dynamic', added)
+        return added
+
+    def _fill(self) -> List[Cell]:
+        limit = self.now + self.horizon
+        due = []
+        while self.pending and self.pending[0][0] <= limit:
+            due.append(heapq.heappop(self.pending))
+        if self._next is not None and self._next[0] <= limit:
+            due.append(self._next)
+            self._next = None
+        if self._next is None:
+            for observation in self.source:
+                if observation[0] > limit:
+                    self._next = observation
+                    break
+                due.append(observation)
+        return self._mark(due)
+
+    def _mark(self, due: List[Observation]) -> List[Cell]:
+        changed: Set[Cell] = set()
+        for t, r, c in due:
+            if t < self.now:
+                self.late += 1
+            elif self.occupancy.mark((r, c), t):
+                self.observed += 1
+                changed.add((r, c))
+        return sorted(changed)
+
+    def stats(self) -> Dict[str, int]:
+        return {'now': self.now, 'observed': self.observed, 'expired': self.expired, 'late': self.late,
+                'window_steps': len(self.occupancy.by_time),
+                'window_entries': sum(len(cells) for cells in self.occupancy.by_time.values()),
+                'pending': len(self.pending) + (self._next is not None)}
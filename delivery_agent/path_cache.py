@@ -0,0 +1,91 @@
+"""
+LRU cache of run_planner results for repeated queries on one environment.
+"""
+import copy
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+from environment import GridEnvironment
+
+Cell = Tuple[int, int]
+
+class PathCache:
+    """
+    Results are stored with the map version they are valid for. When the map
+    changes, entries whose path avoids every changed cell are carried over to
+    the new version: blocking a cell or making it dearer cannot improve a path
+    that never used it. A cost decrease can, so it drops everything, as does
+    a dynamic obstacle leaving cells free ('dynamic_release'); so does a
+    refuel station change for fuel_aware entries. Failed queries survive
+    obstacles and cost increases (those never create a path).
+    Share one cache between agents via DeliveryAgent(cache=...).
+    """
+    def __init__(self, env: GridEnvironment, max_entries: int = 1024):
+        self.env = env
+        self.max_entries = max_entries
+        self.entries: 'OrderedDict[Hashable, Tuple[int, dict]]' = OrderedDict()  # key -> (version, result)
+        self.by_cell: Dict[Cell, Set[Hashable]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        env.subscribe(self._on_change)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hit_rate,
+                'invalidations': self.invalidations, 'entries': len(self.entries)}
+
+    def get(self, key: Hashable) -> Optional[dict]:
+        entry = self.entries.get(key)
+        if entry is None or entry[0] != self.env.version:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return copy.deepcopy(entry[1])
+
+    def put(self, key: Hashable, result: dict):
+        self._drop(key)
+        self.entries[key] = (self.env.version, copy.deepcopy(result))
+        for cell in set(result['path'] or ()):
+            self.by_cell.setdefault(cell, set()).add(key)
+        while len(self.entries) > self.max_entries:
+            self._drop(next(iter(self.entries)))
+
+    def clear(self):
+        self.invalidations += len(self.entries)
+        self.entries.clear()
+        self.by_cell.clear()
+
+    def _drop(self, key: Hashable):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        for cell in set(entry[1]['path'] or ()):
+            keys = self.by_cell.get(cell)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.by_cell[cell]
+
+    def _on_change(self, kind: str, cells: List[Cell]):
+        if kind in ('cost_decrease', 'dynamic_release'):
+            self.clear()
+            return
+        stale = set()
+        if kind == 'refuel':
+            stale.update(key for key in self.entries if key[0] == 'fuel_aware')
+        else:
+            for cell in cells:
+                stale.update(self.by_cell.get(tuple(cell), ()))
+        for key in stale:
+            self._drop(key)
+        self.invalidations += len(stale)
+        # Everything else is still valid (and as good as before) on the new map
+        previous = self.env.version - 1
+        for key, (version, result) in self.entries.items():
+            if version == previous:
+                self.entries[key] = (self.env.version, result)
@@ -0,0 +1,140 @@
+"""
+Multi-stop delivery routes: choose the order in which to visit several drop-off
+points and stitch the legs into one grid path. Leg costs come from one search
+per stop (batch.distance_matrix).
+"""
+import itertools
+import time
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+from environment import GridEnvironment
+from batch import distance_matrix
+
+INF = float('inf')
+Cell = Tuple[int, int]
+
+def route_cost(costs: np.ndarray, order: Sequence[int], return_to_start: bool = False) -> float:
+    """
+    Cost of visiting points in order starting from point 0.
+    """
+    tour = [0] + list(order) + ([0] if return_to_start else [])
+    return float(sum(costs[a, b] for a, b in zip(tour, tour[1:])))
+
+def held_karp(costs: np.ndarray, return_to_start: bool = False) -> List[int]:
+    """
+    Exact visiting order of points 1..n-1 from point 0 by dynamic programming
+    over subsets. O(2^n * n^2), so only for a handful of stops. If some stop
+    can't be reached every order costs INF, and 1..n-1 is returned as is.
+    """
+    n = len(costs)
+    if n <= 1:
+        return []
+    stops = n - 1
+    full = (1 << stops) - 1
+    # best[mask][j]: cheapest way to visit the stops in mask, ending at stop j (point j + 1)
+    best = [[INF] * stops for _ in range(full + 1)]
+    parent = [[-1] * stops for _ in range(full + 1)]
+    for j in range(stops):
+        best[1 << j][j] = costs[0, j + 1]
+    for mask in range(1, full + 1):
+        for j in range(stops):
+            here = best[mask][j]
+            if here == INF or not mask & (1 << j):
+                continue
+            for k in range(stops):
+                if mask & (1 << k):
+                    continue
+                new = here + costs[j + 1, k + 1]
+                if new < best[mask | (1 << k)][k]:
+                    best[mask | (1 << k)][k] = new
+                    parent[mask | (1 << k)][k] = j
+    finish = [best[full][j] + (costs[j + 1, 0] if return_to_start else 0) for j in range(stops)]
+    last = int(np.argmin(finish))
+    if finish[last] == INF:
+        return list(range(1, n))
+    order = []
+    mask = full
+    while last != -1:
+        order.append(last + 1)
+        mask, last = mask & ~(1 << last), parent[mask][last]
+    order.reverse()
+    return order
+
+def nearest_neighbour(costs: np.ndarray) -> List[int]:
+    order = []
+    remaining = set(range(1, len(costs)))
+    current = 0
+    while remaining:
+        current = min(remaining, key=lambda k: (costs[current, k], k))
+        order.append(current)
+        remaining.remove(current)
+    return order
+
+def improve(costs: np.ndarray, order: List[int], return_to_start: bool = False) -> List[int]:
+    """
+    First-improvement local search with 2-opt (reverse a segment) and Or-opt
+    (move a run of 1-3 stops elsewhere) until neither finds a better order.
+    Costs may be asymmetric, so every candidate is priced in full.
+    """
+    order = list(order)
+    best = route_cost(costs, order, return_to_start)
+    improved = True
+    while improved:
+        improved = False
+        n = len(order)
+        for i, j in itertools.combinations(range(n), 2):
+            candidate = order[:i] + order[i:j + 1][::-1] + order[j + 1:]
+            cost = route_cost(costs, candidate, return_to_start)
+            if cost < best:
+                order, best, improved = candidate, cost, True
+        for length in (1, 2, 3):
+            for i in range(n - length + 1):
+                segment = order[i:i + length]
+                rest = order[:i] + order[i + length:]
+                for k in range(len(rest) + 1):
+                    if k == i:
+                        continue
+                    candidate = rest[:k] + segment + rest[k:]
+                    cost = route_cost(costs, candidate, return_to_start)
+                    if cost < best:
+                        order, best, improved = candidate, cost, True
+                        break
+                else:
+                    continue
+                break
+    return order
+
+def plan_route(env: GridEnvironment, start: Cell, stops: Sequence[Cell], return_to_start: bool = False,
+               exact_limit: int = 10, processes: Optional[int] = None) -> dict:
+    """
+    Plan a static route from start through every stop (optionally back to start).
+    Orders up to exact_limit stops exactly, larger sets with nearest neighbour
+    plus 2-opt/Or-opt. Returns a run_planner-style dict plus 'order' (indices
+    into stops, in visiting order) and 'fuel_used'.
+    """
+    start_time = time.time()
+    points = [tuple(start)] + [tuple(s) for s in stops]
+    matrix = distance_matrix(env, points, points, return_paths=True, processes=processes)
+    costs = matrix['costs']
+    if len(stops) <= exact_limit:
+        order = held_karp(costs, return_to_start)
+    else:
+        order = improve(costs, nearest_neighbour(costs), return_to_start)
+    total = route_cost(costs, order, return_to_start)
+    if total == INF or len(order) != len(stops):
+        return {'path': None, 'cost': None, 'length': None, 'time': time.time() - start_time,
+                'success': False, 'order': None, 'fuel_used': None}
+    tour = [0] + order + ([0] if return_to_start else [])
+    path = [points[0]]
+    for a, b in zip(tour, tour[1:]):
+        path.extend(matrix['paths'][a][b][1:])
+    cost = int(total)
+    return {
+        'path': path,
+        'cost': cost,
+        'length': len(path) - 1,
+        'time': time.time() - start_time,
+        'success': True,
+        'order': [k - 1 for k in order],
+        'fuel_used': cost
+    }
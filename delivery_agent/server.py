@@ -0,0 +1,391 @@
+"""
+Long-running planning server: maps are loaded once, queries arrive as small
+JSON requests over HTTP (TCP or a Unix socket) and run on a process pool, so
+neither interpreter start-up nor map parsing is paid per query and a slow
+search never blocks the event loop.
+
+    python server.py --map maps/large.txt --map depot=maps/city.bin --port 8765
+    python server.py --map maps/large.txt --unix /tmp/planner.sock
+
+    curl -d '{"planner": "a_star", "start": [0, 0], "goal": [9, 9]}' localhost:8765/plan
+    curl localhost:8765/metrics
+
+Endpoints:
+- POST /plan: {"map", "planner", "start", "goal", "dynamic", "fuel", "options"}
+  (map may be left out when only one is loaded) -> the run_planner result
+- GET /maps: loaded maps and their sizes
+- GET /metrics: request counts, coalescing and batching figures, throughput
+  and latency percentiles
+
+Identical queries in flight at the same time are coalesced: the later ones
+wait for the first one's result. Queries that differ only in their goal and
+arrive within batch_window seconds go to a worker as one batch; static
+uniform_cost batches are answered by a single search from the shared source
+(flat_search.sweep), and goals in another connected component are answered
+without any search. Each worker keeps its own copy of the maps (binary maps
+are memory-mapped, so the pages are shared) and a PathCache per map.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+import numpy as np
+from environment import GridEnvironment
+from agent import DeliveryAgent
+from components import ComponentIndex
+from flat_search import FlatGrid
+from map_io import load_map
+from path_cache import PathCache
+import flat_search
+
+Cell = Tuple[int, int]
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+class Query(NamedTuple):
+    map: str
+    planner: str
+    start: Cell
+    goal: Cell
+    dynamic: bool = False
+    fuel: Optional[int] = None
+    options: Tuple[Tuple[str, object], ...] = ()
+
+    @property
+    def source(self) -> tuple:
+        """
+        Everything but the goal: queries with the same source can be batched.
+        """
+        return self.map, self.planner, self.start, self.dynamic, self.fuel, self.options
+
+def parse_query(data: dict, maps: Dict[str, GridEnvironment]) -> Query:
+    """
+    Query from a decoded request body; raises ValueError on bad input.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Expected a JSON object")
+    name = data.get('map')
+    if name is None and len(maps) == 1:
+        name = next(iter(maps))
+    if name not in maps:
+        raise ValueError(f"Unknown map: {name}")
+    env = maps[name]
+    cells = []
+    for field in ('start', 'goal'):
+        cell = data.get(field)
+        if not (isinstance(cell, (list, tuple)) and len(cell) == 2 and all(isinstance(v, int) for v in cell)):
+            raise ValueError(f"{field} must be [row, col]")
+        if not (0 <= cell[0] < env.rows and 0 <= cell[1] < env.cols):
+            raise ValueError(f"{field} {list(cell)} is outside the {env.rows}x{env.cols} map")
+        cells.append((cell[0], cell[1]))
+    options = data.get('options') or {}
+    if not isinstance(options, dict) or any(isinstance(v, (list, dict)) for v in options.values()):
+        raise ValueError("options must be an object of scalar values")
+    fuel = data.get('fuel')
+    if fuel is not None and not isinstance(fuel, int):
+        raise ValueError("fuel must be an integer")
+    return Query(name, str(data.get('planner', 'a_star')), cells[0], cells[1], bool(data.get('dynamic', False)),
+                 fuel, tuple(sorted(options.items())))
+
+# Per-worker state, set up by _init_worker in every pool process
+_worker_maps: Dict[str, GridEnvironment] = {}
+_worker_caches: Dict[str, PathCache] = {}
+
+def _init_worker(maps: Dict[str, Union[str, GridEnvironment]], cache_entries: int):
+    for name, env in maps.items():
+        env = load_map(env) if isinstance(env, str) else env
+        _worker_maps[name] = env
+        _worker_caches[name] = PathCache(env, cache_entries)
+
+def _ready() -> int:
+    return len(_worker_maps)
+
+def _swept(env: GridEnvironment, start: Cell, goals: List[Cell]) -> List[dict]:
+    """
+    Static uniform_cost results for several goals from one search.
+    """
+    start_time = time.time()
+    index = ComponentIndex.for_env(env)
+    reachable = [goal for goal in goals if index.reachable(start, goal)]
+    paths = flat_search.sweep(FlatGrid.for_env(env), start, reachable) if reachable else {}
+    elapsed = time.time() - start_time
+    results = []
+    for goal in goals:
+        path = paths.get(goal)
+        if path:
+            cost = sum(env.get_cost(r, c) for r, c in path[1:])
+            result = {'path': path, 'cost': cost, 'length': len(path) - 1, 'time': elapsed, 'success': True}
+        else:
+            result = {'path': None, 'cost': None, 'length': None, 'time': elapsed, 'success': False}
+            if goal not in paths:
+                result['unreachable'] = True
+        result['swept'] = True
+        results.append(result)
+    return results
+
+def _run_batch(source: tuple, goals: List[Cell]) -> List[dict]:
+    """
+    Results for one batch (queries sharing source), in the order of goals.
+    A query that fails gets {'error': message} instead of a result.
+    """
+    name, planner, start, dynamic, fuel, options = source
+    env = _worker_maps[name]
+    if planner == 'uniform_cost' and not dynamic and fuel is None and not options and len(goals) > 1 and env.dense:
+        return _swept(env, start, goals)
+    results = []
+    for goal in goals:
+        agent = DeliveryAgent(env, start, goal, fuel, cache=_worker_caches[name])
+        try:
+            results.append(agent.run_planner(planner, dynamic=dynamic, **dict(options)))
+        except (ValueError, TypeError) as error:
+            results.append({'error': str(error)})
+    return results
+
+def _percentiles(values: List[float]) -> dict:
+    if not values:
+        return {'p50': None, 'p95': None, 'p99': None, 'max': None}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99]).tolist()
+    return {'p50': p50, 'p95': p95, 'p99': p99, 'max': max(values)}
+
+class Metrics:
+    """
+    Counters plus the latencies (seconds, request in to result out) of the
+    last window completed queries, for throughput and percentiles.
+    """
+    def __init__(self, window: int = 10000):
+        self.started = time.time()
+        self.requests = 0
+        self.completed = 0
+        self.failed = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.batched_queries = 0
+        self.swept = 0
+        self.recent: deque = deque(maxlen=window)  # (finish time, latency)
+
+    def record(self, latency: float, ok: bool):
+        self.completed += 1
+        if not ok:
+            self.failed += 1
+        self.recent.append((time.time(), latency))
+
+    def snapshot(self, in_flight: int = 0, queued: int = 0) -> dict:
+        now = time.time()
+        uptime = now - self.started
+        latencies = [latency * 1000 for _, latency in self.recent]
+        last_minute = sum(1 for finished, _ in self.recent if now - finished <= 60)
+        return {
+            'uptime': uptime,
+            'requests': self.requests,
+            'completed': self.completed,
+            'failed': self.failed,
+            'coalesced': self.coalesced,
+            'batches': self.batches,
+            'batched_queries': self.batched_queries,
+            'mean_batch': self.batched_queries / self.batches if self.batches else 0.0,
+            'swept': self.swept,
+            'in_flight': in_flight,
+            'queued': queued,
+            'throughput': self.completed / uptime if uptime > 0 else 0.0,
+            'throughput_last_minute': last_minute / min(uptime, 60) if uptime > 0 else 0.0,
+            'latency_ms': _percentiles(latencies)
+        }
+
+class PlanningServer:
+    """
+    maps: name -> map file path (or an already loaded environment, which
+    needs processes=0 since environments are not sent to worker processes).
+    processes=None uses one worker per CPU; processes=0 runs queries on one
+    background thread in this process instead of a pool.
+    """
+    def __init__(self, maps: Dict[str, Union[str, GridEnvironment]], processes: Optional[int] = None,
+                 batch_window: float = 0.002, max_batch: int = 64, cache_entries: int = 1024):
+        self.maps = {name: load_map(env) if isinstance(env, str) else env for name, env in maps.items()}
+        self.workers = processes if processes is not None else os.cpu_count()
+        if processes == 0:
+            self.workers = 1
+            self.pool: Executor = ThreadPoolExecutor(1, initializer=_init_worker, initargs=(self.maps, cache_entries))
+        else:
+            if not all(isinstance(env, str) for env in maps.values()):
+                raise TypeError("Worker processes load maps from files; pass paths or use processes=0")
+            # Workers start on demand while the event loop and the pool's own threads are
+            # running, and forking a threaded process can leave locks held in the child
+            self.pool = ProcessPoolExecutor(self.workers, multiprocessing.get_context('spawn'),
+                                            initializer=_init_worker, initargs=(dict(maps), cache_entries))
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.metrics = Metrics()
+        self.in_flight: Dict[Query, asyncio.Future] = {}
+        self.pending: Dict[tuple, List[Query]] = {}  # source -> queries waiting for the batch window
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+
+    async def plan(self, query: Query) -> dict:
+        """
+        The run_planner result for query (with 'error' set if it failed).
+        """
+        began = time.perf_counter()
+        self.metrics.requests += 1
+        future = self.in_flight.get(query)
+        if future is not None:
+            self.metrics.coalesced += 1
+        else:
+            future = self.in_flight[query] = asyncio.get_running_loop().create_future()
+            group = self.pending.setdefault(query.source, [])
+            group.append(query)
+            if len(group) >= self.max_batch:
+                self._dispatch(query.source)
+            elif self._flush_handle is None:
+                self._flush_handle = asyncio.get_running_loop().call_later(self.batch_window, self._flush)
+        try:
+            result = await asyncio.shield(future)
+        except Exception as error:
+            result = {'error': f"{type(error).__name__}: {error}"}
+        self.metrics.record(time.perf_counter() - began, 'error' not in result)
+        return result
+
+    def _flush(self):
+        self._flush_handle = None
+        for source in list(self.pending):
+            self._dispatch(source)
+
+    def _dispatch(self, source: tuple):
+        queries = self.pending.pop(source)
+        self.metrics.batches += 1
+        self.metrics.batched_queries += len(queries)
+        task = asyncio.ensure_future(self._run(source, queries))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, source: tuple, queries: List[Query]):
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(self.pool, _run_batch, source, [query.goal for query in queries])
+        except Exception as error:
+            for query in queries:
+                self.in_flight.pop(query).set_exception(error)
+            return
+        for query, result in zip(queries, results):
+            if result.get('swept'):
+                self.metrics.swept += 1
+            self.in_flight.pop(query).set_result(result)
+
+    def stats(self) -> dict:
+        return self.metrics.snapshot(len(self.in_flight), sum(len(group) for group in self.pending.values()))
+
+    # HTTP
+
+    async def _respond(self, method: str, path: str, body: bytes) -> Tuple[int, object]:
+        if path == '/plan':
+            if method != 'POST':
+                return 405, {'error': "Use POST"}
+            try:
+                query = parse_query(json.loads(body or b'null'), self.maps)
+            except ValueError as error:  # includes malformed JSON
+                return 400, {'error': str(error)}
+            result = await self.plan(query)
+            return (400 if 'error' in result else 200), result
+        if method != 'GET':
+            return 405, {'error': "Use GET"}
+        if path == '/metrics':
+            return 200, self.stats()
+        if path == '/maps':
+            return 200, {name: {'rows': env.rows, 'cols': env.cols} for name, env in self.maps.items()}
+        if path == '/health':
+            return 200, {'ok': True}
+        return 404, {'error': f"No such endpoint: {path}"}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        One connection: HTTP/1.1 requests with Content-Length bodies, kept
+        alive until the client closes it or asks to.
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                try:
+                    status, payload = await self._respond(method, target.split('?')[0], body)
+                except Exception as error:
+                    status, payload = 500, {'error': f"{type(error).__name__}: {error}"}
+                data = json.dumps(payload, default=_json_default).encode()
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                writer.write(f"{version} {status} {REASONS.get(status, '')}\r\n"
+                             f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                             f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            pass  # malformed request or client gone
+        finally:
+            writer.close()
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8765, unix: Optional[str] = None) -> asyncio.AbstractServer:
+        """
+        Start the workers, then listen (on the Unix socket path if given,
+        otherwise host:port).
+        """
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.pool, _ready) for _ in range(self.workers)))
+        if unix:
+            return await asyncio.start_unix_server(self._handle, path=unix)
+        return await asyncio.start_server(self._handle, host, port)
+
+    def close(self):
+        self.pool.shutdown(wait=False)
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+def _parse_map(text: str) -> Tuple[str, str]:
+    name, _, path = text.rpartition('=')
+    return name or os.path.splitext(os.path.basename(path))[0], path
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve planning queries over HTTP with preloaded maps")
+    parser.add_argument('--map', type=_parse_map, action='append', required=True,
+                        help='Map to preload, as path or name=path (repeatable)')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Address to listen on')
+    parser.add_argument('--port', type=int, default=8765, help='TCP port')
+    parser.add_argument('--unix', type=str, default=None, help='Listen on this Unix socket instead of TCP')
+    parser.add_argument('--processes', type=int, default=None, help='Worker processes (default: one per CPU)')
+    parser.add_argument('--batch-window', type=float, default=2.0, help='Milliseconds to collect queries sharing a source')
+    parser.add_argument('--max-batch', type=int, default=64, help='Dispatch a batch once it has this many queries')
+    args = parser.parse_args()
+
+    async def serve():
+        server = PlanningServer(dict(args.map), args.processes, args.batch_window / 1000, args.max_batch)
+        listener = await server.start(args.host, args.port, args.unix)
+        print(f"Serving {', '.join(server.maps)} on {args.unix or f'http://{args.host}:{args.port}'}")
+        try:
+            async with listener:
+                await listener.serve_forever()
+        finally:
+            server.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""
+Simulate agent movement and replanning with dynamic obstacles, fuel, and time tracking.
+"""
+import argparse
+from environment import GridEnvironment, DynamicObstacle
+from agent import DeliveryAgent
+from obstacle_feed import ObstacleFeed, read_observations
+
+class EnhancedDeliveryAgent(DeliveryAgent):
+    def __init__(self, env, start, goal, fuel=100):
+        super().__init__(env, start, goal, fuel)
+
+    def can_move(self, pos):
+        cost = self.env.get_cost(*pos)
+        return self.fuel >= cost
+
+    def move(self, pos):
+        cost = self.env.get_cost(*pos)
+        if self.fuel >= cost:
+            self.fuel -= cost
+            if self.env.is_refuel_station(*pos):
+                self.fuel = self.fuel_capacity
+            return True
+        return False
+
+def simulate_replanning(replanner: str = 'local_search', feed_path: str = None, horizon: int = 32):
+    """
+    replanner: 'local_search' plans from scratch whenever the next cell is blocked;
+    'd_star_lite' repairs the agent's incremental D* Lite search instead;
+    'fuel_aware' replans with the fuel-constrained search from the fuel left.
+    Dynamic obstacles come through an ObstacleFeed that only keeps the next
+    horizon time steps; feed_path adds observations streamed from a file
+    ("time row col" per line).
+    """
+    env = GridEnvironment(5, 5)
+    env.set_static_obstacle(1, 1)
+    # env.set_static_obstacle(2, 3)  # Removed to allow path through (3,3)
+    # Dynamic obstacle: blocks (3,3) at t=6, simulating a vehicle appearing
+    obs = DynamicObstacle([(3, 3)], [6])
+    env.add_dynamic_obstacle(obs)
+    feed = ObstacleFeed(env, read_observations(feed_path) if feed_path else (), horizon)
+
+    start = (0, 0)
+    goal = (4, 4)
+    agent = EnhancedDeliveryAgent(env, start, goal, fuel=50)  # Limited fuel
+
+    print("=== Simulation: Agent Movement with Dynamic Obstacles, Fuel, and Time ===")
+    print(f"Start: {start}, Goal: {goal}, Initial Fuel: {agent.fuel}")
+    print("Static obstacles: (1,1), (2,3)")
+    print("Dynamic obstacle path: [(2,1) at t=3, (2,2) at t=4, (2,3) at t=5]")
+    print()
+
+    # Check the trip is possible on the fuel in the tank before moving at all
+    result = agent.run_planner('fuel_aware', dynamic=True)
+    if not result['success']:
+        print(f"No path to the goal within the fuel budget ({agent.fuel}). Not starting.")
+        return
+
+    # Plan initial path (with D* Lite when replanning incrementally, so its search can be reused)
+    label = 'D* Lite' if replanner == 'd_star_lite' else 'fuel-aware A*'
+    print(f"Planning initial path using {label}...")
+    if replanner == 'd_star_lite':
+        result = agent.run_planner('d_star_lite', dynamic=True)
+    if not result['success']:
+        print("No initial path found.")
+        return
+    path = result['path']
+    print(f"Initial path ({label}): {path}")
+    print(f"Path cost: {result['cost']}, Length: {result['length']}")
+    print()
+
+    # Simulate movement
+    current_pos = start
+    t = 0
+    total_cost = 0
+    while current_pos != goal:
+        feed.advance(t)  # drop past time steps, read observations up to t + horizon; env time 0 is now t
+        print(f"Time {t}: At {current_pos}, Fuel: {agent.fuel}")
+        # Show dynamic obstacles at current time
+        obstacles_at_t = [(pos, t) for pos in sorted(env.dynamic_cells_at(0))]
+        if obstacles_at_t:
+            print(f"  Dynamic obstacles at t={t}: {obstacles_at_t}")
+
+        # Check if next move is blocked
+        next_pos = path[path.index(current_pos) + 1] if path.index(current_pos) + 1 < len(path) else goal
+        move_cost = env.get_cost(*next_pos)
+        print(f"  Next move to {next_pos}, cost: {move_cost}")
+
+        if env.is_occupied(next_pos[0], next_pos[1], 1):
+            print(f"  Obstacle detected at {next_pos} at time {t+1}, replanning...")
+            if replanner == 'd_star_lite':
+                # Repair the previous search, treating cells occupied next step as blocked
+                print("  Replanning using D* Lite (incremental repair)...")
+                agent.start = current_pos
+                new_result = agent.run_planner('d_star_lite', dynamic=True, blocked_cells=env.dynamic_cells_at(1))
+            elif replanner == 'fuel_aware':
+                print("  Replanning using fuel-aware A* from the fuel left...")
+                temp_agent = EnhancedDeliveryAgent(env, current_pos, goal, agent.fuel)
+                temp_agent.fuel_capacity = agent.fuel_capacity
+                new_result = temp_agent.run_planner('fuel_aware', dynamic=True)
+            else:
+                # Replan using local search (hill-climbing with restarts)
+                print("  Replanning using Local Search (hill-climbing with random restarts)...")
+                temp_agent = EnhancedDeliveryAgent(env, current_pos, goal, agent.fuel)
+                new_result = temp_agent.run_planner('local_search', dynamic=True)
+            if new_result['success']:
+                new_path = new_result['path']
+                print(f"  New path: {new_path}")
+                print(f"  New path cost: {new_result['cost']}, Length: {new_result['length']}")
+                path = new_path  # Update path (starts at current_pos)
+                next_pos = path[1]
+                move_cost = env.get_cost(*next_pos)
+            else:
+                print("  Replanning failed. Agent stuck.")
+                break
+
+        if not agent.can_move(next_pos):
+            print(f"  Insufficient fuel to move to {next_pos} (need {move_cost}, have {agent.fuel}). Agent stuck.")
+            break
+
+        # Move
+        if agent.move(next_pos):
+            total_cost += move_cost
+            current_pos = next_pos
+            t += 1
+            print(f"  Moved to {current_pos}, fuel now: {agent.fuel}")
+        else:
+            print("  Move failed due to fuel.")
+            break
+
+        if current_pos == goal:
+            print(f"Reached goal at time {t}, total cost: {total_cost}, remaining fuel: {agent.fuel}")
+            break
+        print()
+
+    if current_pos != goal:
+        print("Simulation ended without reaching goal.")
+    stats = feed.stats()
+    print(f"Obstacle feed: {stats['observed']} observations, {stats['expired']} expired, "
+          f"{stats['window_entries']} in the window at t={stats['now']}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Simulate agent movement with replanning")
+    parser.add_argument('--replanner', choices=['local_search', 'd_star_lite', 'fuel_aware'], default='local_search', help='Replanning strategy')
+    parser.add_argument('--feed', type=str, default=None, help='File of dynamic obstacle observations, one "time row col" per line')
+    parser.add_argument('--horizon', type=int, default=32, help='Time steps ahead kept from the obstacle feed')
+    args = parser.parse_args()
+    simulate_replanning(args.replanner, args.feed, args.horizon)
@@ -0,0 +1,486 @@
+import unittest
+from environment import GridEnvironment, DynamicObstacle
+from agent import DeliveryAgent
+
+class TestDeliveryAgent(unittest.TestCase):
+    def setUp(self):
+        self.env = GridEnvironment(5, 5)
+        self.env.set_static_obstacle(1, 1)
+        self.env.set_static_obstacle(2, 3)
+        self.agent = DeliveryAgent(self.env, (0, 0), (4, 4))
+
+    def test_bfs_static(self):
+        path = self.agent.bfs(dynamic=False)
+        self.assertIsNotNone(path)
+        self.assertEqual(path[0], (0, 0))
+        self.assertEqual(path[-1], (4, 4))
+
+    def test_uniform_cost_static(self):
+        path = self.agent.uniform_cost_search(dynamic=False)
+        self.assertIsNotNone(path)
+
+    def test_a_star_static(self):
+        path = self.agent.a_star(dynamic=False)
+        self.assertIsNotNone(path)
+
+    def test_local_search_static(self):
+        path = self.agent.local_search_replan(dynamic=False)
+        self.assertIsNotNone(path)
+
+    def test_local_search_restarts(self):
+        env = GridEnvironment(8, 8)
+        for r in range(6):
+            env.set_static_obstacle(r, 4)
+        env.set_terrain_cost(6, 2, 5)
+        agent = DeliveryAgent(env, (0, 0), (0, 7))
+        optimal = agent.run_planner('uniform_cost')['cost']
+        first = agent.run_planner('local_search', restarts=8, seed=3)
+        again = agent.run_planner('local_search', restarts=8, seed=3)
+        self.assertTrue(first['success'])
+        self.assertEqual(first['path'], again['path'])
+        self.assertGreaterEqual(first['cost'], optimal)
+        self.assertEqual(len(set(first['path'])), len(first['path']))  # loops are cut out
+        pooled = agent.run_planner('local_search', restarts=8, seed=3, processes=2)
+        self.assertEqual(pooled['path'], first['path'])
+        self.assertEqual(first['restarts'], 8)
+        # The shared bound never cuts a static walk short: the result is the best walk on its own
+        import multiprocessing
+        import local_search
+        from benchmark import generate_map
+        env = generate_map(12, 12, density=0.25, terrain={1: 1, 5: 1}, seed=2)
+        path, _ = local_search.search(env, (0, 0), (11, 11), restarts=8, seed=2)
+        walks = [local_search.walk(env, multiprocessing.Value('d', float('inf')), (0, 0), (11, 11), False, 2 + i,
+                                   1000, 2.0 if i else 0.0, 16, None) for i in range(8)]
+        self.assertEqual(path, min((w[0], i, w[1]) for i, w in enumerate(walks) if w)[2])
+
+    def test_d_star_lite_incremental_replan(self):
+        path = self.agent.d_star_lite()
+        self.assertEqual(len(path), len(self.agent.a_star()))
+        # Block the next cell and replan from one step along the path
+        self.agent.start = path[1]
+        expansions = self.agent._d_star.expansions
+        new_path = self.agent.d_star_lite(blocked_cells={path[2]})
+        self.assertEqual(new_path[0], path[1])
+        self.assertEqual(new_path[-1], (4, 4))
+        self.assertNotIn(path[2], new_path)
+        self.assertGreater(self.agent._d_star.expansions, expansions)
+        result = self.agent.run_planner('d_star_lite', blocked_cells=set())
+        self.assertEqual(result['cost'], 7)
+
+    def test_sipp_waits_for_obstacle(self):
+        # Single-lane road: a vehicle sits on (0, 2) at t=1..2, so the agent must wait
+        env = GridEnvironment(1, 5)
+        env.add_dynamic_obstacle(DynamicObstacle([(0, 2), (0, 2)], [1, 2]))
+        agent = DeliveryAgent(env, (0, 0), (0, 4))
+        self.assertIsNone(agent.a_star(dynamic=True))
+        result = agent.run_planner('sipp', dynamic=True)
+        self.assertTrue(result['success'])
+        self.assertEqual(result['cost'], 4)
+        self.assertEqual(result['length'], 5)
+        for t, (r, c) in enumerate(result['path']):
+            self.assertFalse(env.is_occupied(r, c, t))
+        self.assertEqual(env.safe_intervals(0, 2), [(0, 0), (3, float('inf'))])
+
+    def test_jps_matches_a_star_cost(self):
+        env = GridEnvironment(8, 10)
+        for r, c in [(1, 1), (1, 2), (3, 5), (4, 5), (5, 5), (6, 2), (2, 8)]:
+            env.set_static_obstacle(r, c)
+        for r in range(3, 6):
+            env.set_terrain_cost(r, 3, 4, terrain="mud")
+        agent = DeliveryAgent(env, (0, 0), (7, 9))
+        jps = agent.run_planner('jps')
+        self.assertTrue(jps['success'])
+        self.assertEqual(jps['cost'], agent.run_planner('a_star')['cost'])
+        for (r1, c1), (r2, c2) in zip(jps['path'], jps['path'][1:]):
+            self.assertEqual(abs(r1 - r2) + abs(c1 - c2), 1)
+
+    def test_hpa_star_with_incremental_rebuild(self):
+        env = GridEnvironment(20, 20)
+        for r in range(2, 18):
+            env.set_static_obstacle(r, 9)
+        agent = DeliveryAgent(env, (10, 0), (10, 19))
+        result = agent.run_planner('hpa_star', cluster_size=5)
+        self.assertTrue(result['success'])
+        self.assertGreaterEqual(result['cost'], agent.run_planner('a_star')['cost'])
+        for r, c in result['path']:
+            self.assertFalse(env.is_occupied(r, c, 0))
+        graph = env.precomputed['hpa']
+        rebuilds = graph.rebuilds
+        # Close the top gap: only the two clusters either side of the edited border are rebuilt
+        env.set_static_obstacle(0, 9)
+        env.set_static_obstacle(1, 9)
+        result = agent.run_planner('hpa_star', cluster_size=5)
+        self.assertEqual(graph.rebuilds - rebuilds, 2)
+        self.assertTrue(all(r >= 18 for r, c in result['path'] if c == 9))
+        # A t=0 dynamic obstacle counts the same whether the graph was built before or after it
+        env = GridEnvironment(1, 30)
+        agent = DeliveryAgent(env, (0, 0), (0, 29))
+        self.assertTrue(agent.run_planner('hpa_star', cluster_size=5)['success'])
+        env.add_dynamic_obstacle(DynamicObstacle([(0, 15)], [0]))
+        self.assertFalse(agent.run_planner('hpa_star', cluster_size=5)['success'])
+
+    def test_alt_landmark_heuristic(self):
+        import os, tempfile
+        from landmarks import LandmarkTable
+        env = GridEnvironment(10, 10)
+        for r in range(9):
+            env.set_static_obstacle(r, 5)
+        agent = DeliveryAgent(env, (0, 0), (0, 9))
+        manhattan = agent.run_planner('a_star')
+        alt = agent.run_planner('alt', landmarks=4)
+        self.assertEqual(alt['cost'], manhattan['cost'])
+        self.assertGreater(alt['heuristic_strength'], manhattan['heuristic_strength'])
+        self.assertLessEqual(alt['heuristic_strength'], 1.0)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'landmarks.npz')
+            env.precomputed['alt'].save(path)
+            env.set_terrain_cost(9, 0, 3)  # map edit drops the cached table
+            self.assertNotIn('alt', env.precomputed)
+            loaded = LandmarkTable.load(path)
+        self.assertEqual(len(loaded.landmarks), 4)
+        self.assertEqual(loaded.dist_from.shape, (4, 10, 10))
+        # Cells held by dynamic obstacles at t=0 are not walls for the table
+        env = GridEnvironment(4, 4)
+        for cell in [(3, 3), (1, 2), (2, 2)]:
+            env.add_dynamic_obstacle(DynamicObstacle([cell], [0]))
+        agent = DeliveryAgent(env, (3, 0), (2, 3))
+        self.assertEqual(agent.run_planner('alt', dynamic=True, landmarks=3)['cost'],
+                         agent.run_planner('a_star', dynamic=True)['cost'])
+
+    def test_batch_distance_matrix(self):
+        from batch import distance_matrix
+        sources = [(0, 0), (4, 0)]
+        targets = [(4, 4), (0, 4), (1, 1)]
+        for processes in (None, 2):
+            result = distance_matrix(self.env, sources, targets, return_paths=True, processes=processes)
+            self.assertEqual(result['costs'].shape, (2, 3))
+            for i, s in enumerate(sources):
+                for j, t in enumerate(targets[:2]):
+                    expected = DeliveryAgent(self.env, s, t).run_planner('uniform_cost')['cost']
+                    self.assertEqual(result['costs'][i, j], expected)
+                    self.assertEqual(result['paths'][i][j][0], s)
+                    self.assertEqual(result['paths'][i][j][-1], t)
+            self.assertEqual(result['costs'][0, 2], float('inf'))  # (1, 1) is an obstacle
+            self.assertIsNone(result['paths'][0][2])
+
+    def test_multi_stop_route(self):
+        import itertools
+        from routing import plan_route
+        stops = [(4, 0), (0, 4), (2, 2)]
+        result = plan_route(self.env, (0, 0), stops)
+        self.assertTrue(result['success'])
+        self.assertEqual(sorted(result['order']), [0, 1, 2])
+        self.assertEqual(result['path'][0], (0, 0))
+        for stop in stops:
+            self.assertIn(stop, result['path'])
+        leg = lambda a, b: DeliveryAgent(self.env, a, b).run_planner('uniform_cost')['cost']
+        best = min(sum(leg(a, b) for a, b in zip(((0, 0),) + p, p)) for p in itertools.permutations(stops))
+        self.assertEqual(result['cost'], best)
+        self.assertEqual(result['fuel_used'], best)
+        heuristic = plan_route(self.env, (0, 0), stops, exact_limit=0)
+        self.assertGreaterEqual(heuristic['cost'], best)
+        for r in range(5):
+            self.env.set_static_obstacle(r, 3)  # (0, 4) is cut off
+        for limit in (10, 0):
+            result = plan_route(self.env, (0, 0), [(4, 0), (0, 4)], exact_limit=limit)
+            self.assertFalse(result['success'])
+            self.assertIsNone(result['order'])
+
+    def test_cost_to_go_field(self):
+        from fields import cost_to_go
+        self.env.set_static_obstacle(2, 1)
+        self.env.set_static_obstacle(2, 2)
+        field = cost_to_go(self.env, [(4, 4)])
+        for r in range(5):
+            for c in range(5):
+                result = DeliveryAgent(self.env, (r, c), (4, 4)).run_planner('uniform_cost')
+                self.assertEqual(field[r, c], result['cost'] if result['success'] else float('inf'))
+        result = self.agent.run_planner('wavefront')
+        self.assertEqual(result['cost'], field[0, 0])
+        self.env.set_static_obstacle(3, 4)  # drops the cached field
+        self.assertEqual(self.agent.run_planner('wavefront')['cost'], self.agent.run_planner('uniform_cost')['cost'])
+        # A dynamic obstacle at t=0 on the route is honoured even with the field already cached
+        env = GridEnvironment(3, 5)
+        for c in range(1, 4):
+            env.set_static_obstacle(1, c)
+        agent = DeliveryAgent(env, (0, 0), (2, 0))
+        self.assertEqual(agent.run_planner('wavefront')['cost'], 2)
+        env.add_dynamic_obstacle(DynamicObstacle([(1, 0)], [0]))
+        self.assertEqual(agent.run_planner('wavefront')['cost'], 10)
+        # Cached fields are bounded, least recently used first out
+        from fields import field_for
+        first = field_for(env, (0, 0), max_fields=2)
+        field_for(env, (0, 4), max_fields=2)
+        self.assertIs(field_for(env, (0, 0), max_fields=2), first)
+        field_for(env, (2, 4), max_fields=2)
+        self.assertEqual(list(env.precomputed['fields']), [(0, 0), (2, 4)])
+
+    def test_path_cache(self):
+        from path_cache import PathCache
+        cache = PathCache(self.env)
+        agent = DeliveryAgent(self.env, (0, 0), (4, 4), cache=cache)
+        first = agent.run_planner('a_star')
+        self.assertNotIn('cached', first)
+        self.assertTrue(agent.run_planner('a_star')['cached'])
+        version = self.env.version
+        off_path = next((r, c) for r in range(5) for c in range(5) if (r, c) not in first['path'] and not self.env.obstacle_grid[r, c])
+        self.env.set_terrain_cost(*off_path, 9)
+        self.assertGreater(self.env.version, version)
+        self.assertTrue(agent.run_planner('a_star').get('cached'))  # survives: the path never enters that cell
+        self.env.set_static_obstacle(*first['path'][2])
+        result = agent.run_planner('a_star')
+        self.assertNotIn('cached', result)
+        self.assertNotIn(first['path'][2], result['path'])
+        self.env.set_terrain_cost(*off_path, 1)  # a cheaper cell may shorten any path
+        self.assertEqual(len(cache.entries), 0)
+        self.assertEqual(cache.stats()['hits'], 2)
+        self.assertAlmostEqual(cache.hit_rate, 2 / 4)
+
+    def test_flat_search_matches_generic_loops(self):
+        import random
+        from flat_search import FlatGrid
+        rng = random.Random(5)
+        env = GridEnvironment(12, 12)
+        for r in range(12):
+            for c in range(12):
+                if rng.random() < 0.25:
+                    env.set_static_obstacle(r, c)
+                else:
+                    env.set_terrain_cost(r, c, rng.choice([1, 1, 2, 5]))
+        env.add_dynamic_obstacle(DynamicObstacle([(1, 0), (1, 1), (2, 1)], [1, 2, 3]))
+        agent = DeliveryAgent(env, (0, 0), (11, 11))
+        generic_agent = DeliveryAgent(env, (0, 0), (11, 11))
+        generic_agent.use_flat = False
+        flat = FlatGrid.for_env(env)
+        path = agent.a_star()
+        for edit in range(4):
+            for dynamic in (False, True):
+                fast = [agent.bfs(dynamic), agent.uniform_cost_search(dynamic), agent.a_star(dynamic)]
+                generic = [generic_agent.bfs(dynamic), generic_agent.uniform_cost_search(dynamic),
+                           generic_agent.a_star(dynamic)]
+                self.assertEqual(fast, generic)
+            # Edits patch the same grid instead of building a new one
+            r, c = path[len(path) // 2 + edit]
+            [lambda: env.set_static_obstacle(r, c), lambda: env.set_terrain_cost(r, c, 9),
+             lambda: env.add_dynamic_obstacle(DynamicObstacle([(r, c)], [0])),
+             lambda: env.set_terrain_cost(r, c, 1)][edit]()
+            self.assertIs(FlatGrid.for_env(env), flat)
+
+    def test_ara_star_budget_and_bound(self):
+        import random
+        rng = random.Random(7)
+        env = GridEnvironment(30, 30)
+        for r in range(30):
+            for c in range(30):
+                env.set_terrain_cost(r, c, rng.choice([1, 2, 6]))
+        agent = DeliveryAgent(env, (0, 0), (29, 29))
+        optimal = agent.run_planner('uniform_cost')['cost']
+        full = agent.run_planner('ara_star', epsilon=3.0)
+        self.assertEqual(full['cost'], optimal)
+        self.assertEqual(full['bound'], 1.0)
+        first = agent.run_planner('ara_star', epsilon=3.0, max_expansions=full['expansions'] // 2)
+        self.assertTrue(first['success'])
+        self.assertTrue(first['budget_exhausted'])
+        self.assertLessEqual(first['expansions'], full['expansions'] // 2)
+        self.assertLessEqual(first['cost'], first['bound'] * optimal)
+        self.assertFalse(agent.run_planner('ara_star', max_expansions=1)['success'])
+
+    def test_fleet_reservations(self):
+        from fleet import Fleet
+        # Both shortest paths reach (1, 2) at t=2; the shorter trip has to give way
+        env = GridEnvironment(4, 5)
+        fleet = Fleet(env, [(1, 0), (3, 2)], [(1, 4), (0, 2)])
+        paths = fleet.plan()
+        self.assertTrue(all(paths))
+        horizon = max(len(path) for path in paths)
+        at = [[path[min(t, len(path) - 1)] for t in range(horizon)] for path in paths]
+        for t in range(1, horizon):
+            self.assertNotEqual(at[0][t], at[1][t])
+            self.assertFalse(at[0][t] == at[1][t - 1] and at[1][t] == at[0][t - 1])  # no swaps
+        stats = fleet.run()
+        self.assertEqual((stats['arrived'], stats['collisions']), (2, 0))
+        self.assertEqual(stats['makespan'], horizon - 1)
+        self.assertGreater(len(paths[1]), 4)  # waited or went round
+        self.assertGreater(stats['agent_steps'], 0)
+        self.assertEqual(stats['failed'], [])
+        # Head-on in a corridor: the second agent can't get past and is reported
+        fleet = Fleet(GridEnvironment(1, 3), [(0, 0), (0, 2)], [(0, 2), (0, 0)])
+        self.assertIsNone(fleet.plan()[1])
+        stats = fleet.run()
+        self.assertEqual((stats['planned'], stats['failed']), (1, [1]))
+
+    def test_instrumentation(self):
+        import instrument
+        plain = self.agent.run_planner('a_star')
+        self.assertNotIn('stats', plain)
+        self.assertIs(self.agent.heap_ops, instrument.HEAP_OPS)
+        agent = DeliveryAgent(self.env, (0, 0), (4, 4), instrument=True)
+        for planner in ('bfs', 'uniform_cost', 'a_star', 'jps', 'sipp', 'fuel_aware', 'ara_star'):
+            stats = agent.run_planner(planner)['stats']
+            self.assertGreater(stats['expansions'], 0)
+            self.assertGreaterEqual(stats['generated'], stats['expansions'])
+            self.assertGreater(stats['occupancy_checks'], 0)
+            self.assertIn('search', stats['timers'])
+            if planner != 'bfs':
+                self.assertGreater(stats['pushes'], 0)
+                self.assertGreater(stats['max_open'], 0)
+                self.assertLessEqual(stats['pops'], stats['pushes'] + 1)
+        self.assertNotIn('neighbors', vars(self.env))  # probes removed after the run
+        self.assertIs(agent.heap_ops, instrument.HEAP_OPS)
+        seen = []
+        hook = lambda name, result: seen.append((name, result['stats']['expansions']))
+        instrument.add_hook(hook)
+        try:
+            self.agent.run_planner('uniform_cost')
+        finally:
+            instrument.remove_hook(hook)
+        self.assertEqual(len(seen), 1)
+        self.assertEqual(seen[0][0], 'uniform_cost')
+        self.assertNotIn('stats', self.agent.run_planner('uniform_cost'))
+
+    def test_bidirectional_search(self):
+        env = GridEnvironment(9, 12)
+        for r in range(1, 9):
+            env.set_static_obstacle(r, 5)
+        env.set_static_obstacle(0, 8)
+        env.set_terrain_cost(2, 2, 6)
+        env.set_terrain_cost(4, 9, 3)
+        for start, goal in (((8, 0), (8, 11)), ((4, 4), (4, 4)), ((0, 0), (0, 8))):
+            expected = DeliveryAgent(env, start, goal).run_planner('uniform_cost')
+            for planner in ('bidirectional_dijkstra', 'bidirectional_a_star'):
+                result = DeliveryAgent(env, start, goal).run_planner(planner)
+                self.assertEqual(result['cost'], expected['cost'])
+                if result['success']:
+                    self.assertEqual((result['path'][0], result['path'][-1]), (start, goal))
+        # Long route on an open map: the two frontiers cover much less than one
+        env = GridEnvironment(60, 60)
+        one_way = DeliveryAgent(env, (30, 20), (30, 40), instrument=True).run_planner('uniform_cost')
+        both_ways = DeliveryAgent(env, (30, 20), (30, 40)).run_planner('bidirectional_dijkstra')
+        self.assertEqual(both_ways['cost'], one_way['cost'])
+        self.assertLess(both_ways['settled'], 0.6 * one_way['stats']['expansions'])
+
+    def test_component_index(self):
+        from components import ComponentIndex
+        env = GridEnvironment(6, 8)
+        for r in range(6):
+            if r != 3:
+                env.set_static_obstacle(r, 4)
+        index = ComponentIndex.for_env(env)
+        self.assertEqual(index.count, 1)
+        self.assertTrue(DeliveryAgent(env, (0, 0), (0, 7)).run_planner('a_star')['success'])
+        # Closing the gap splits the map; the index follows and queries across skip the search
+        env.set_static_obstacle(3, 4)
+        self.assertEqual((index.count, index.splits), (2, 1))
+        self.assertEqual(sorted(index.sizes.values()), [18, 24])
+        for planner in ('a_star', 'bfs', 'sipp', 'local_search'):
+            result = DeliveryAgent(env, (0, 0), (0, 7), instrument=True).run_planner(planner, dynamic=planner == 'sipp')
+            self.assertFalse(result['success'])
+            self.assertTrue(result['unreachable'])
+            self.assertEqual(result['stats']['expansions'], 0)
+        same_side = DeliveryAgent(env, (0, 0), (5, 3)).run_planner('a_star')
+        self.assertTrue(same_side['success'])
+        self.assertNotIn('unreachable', same_side)
+
+    def test_planning_server(self):
+        import asyncio
+        import json
+        from server import PlanningServer, Query
+
+        async def scenario():
+            server = PlanningServer({'grid': self.env}, processes=0, batch_window=0.01)
+            try:
+                # Two identical queries coalesce; goals sharing a source go out as one sweep
+                queries = [Query('grid', 'uniform_cost', (0, 0), (4, 4))] * 2 + [
+                    Query('grid', 'uniform_cost', (0, 0), goal) for goal in ((0, 4), (2, 3))]
+                results = await asyncio.gather(*(server.plan(query) for query in queries))
+                listener = await server.start(port=0)
+                reader, writer = await asyncio.open_connection(*listener.sockets[0].getsockname()[:2])
+                body = json.dumps({'planner': 'a_star', 'start': [0, 0], 'goal': [4, 4]}).encode()
+                writer.write(b"POST /plan HTTP/1.1\r\nContent-Length: %d\r\nConnection: close\r\n\r\n" % len(body) + body)
+                response = await reader.read()
+                writer.close()
+                listener.close()
+                return results, response, server.stats()
+            finally:
+                server.close()
+        results, response, stats = asyncio.run(scenario())
+        expected = DeliveryAgent(self.env, (0, 0), (4, 4)).run_planner('uniform_cost')
+        self.assertEqual(results[0]['path'], expected['path'])
+        self.assertIs(results[0], results[1])
+        self.assertTrue(results[0]['swept'])
+        self.assertTrue(results[3]['unreachable'])
+        self.assertEqual((stats['requests'], stats['coalesced'], stats['batches'], stats['swept']), (5, 1, 2, 3))
+        self.assertIsNotNone(stats['latency_ms']['p95'])
+        head, _, payload = response.partition(b"\r\n\r\n")
+        self.assertIn(b" 200 ", head.split(b"\r\n")[0])
+        self.assertEqual(json.loads(payload)['cost'], expected['cost'])
+
+    def test_experiment_sweep(self):
+        import os, tempfile
+        from experiment import run_experiments, summarize
+        scenario = {'maps': [{'name': 'open', 'generate': {'rows': 12, 'cols': 12, 'density': 0.2, 'seed': 4}}],
+                    'planners': ['a_star', 'sipp'],
+                    'pairs': {'random': 5, 'seed': 0},
+                    'dynamic': [{'name': 'static'}, {'name': 'walkers', 'walkers': 4, 'seed': 1}]}
+        with tempfile.TemporaryDirectory() as tmp:
+            out = os.path.join(tmp, 'results.jsonl')
+            first = run_experiments(scenario, out, processes=2, chunk_size=3)
+            self.assertEqual((first['ran'], first['skipped']), (20, 0))
+            # Interrupted mid-write: the partial line is dropped and only the missing jobs rerun
+            with open(out) as f:
+                lines = f.readlines()
+            with open(out, 'w') as f:
+                f.writelines(lines[:12])
+                f.write(lines[12][:10])
+            resumed = run_experiments(scenario, out, processes=2, chunk_size=3)
+            self.assertEqual((resumed['ran'], resumed['skipped']), (8, 12))
+            with open(out) as f:
+                self.assertEqual(len(f.readlines()), 20)
+            # Other start/goal pairs are other jobs, not ones already done
+            scenario['pairs']['seed'] = 7
+            redrawn = run_experiments(scenario, out)
+            self.assertEqual((redrawn['ran'], redrawn['skipped']), (20, 0))
+            scenario['pairs']['seed'] = 0
+        self.assertEqual(list(resumed['records']), list(first['records']))
+        for job_id, record in first['records'].items():
+            self.assertEqual(resumed['records'][job_id]['cost'], record['cost'])
+        rows = summarize(first['records'].values())
+        self.assertEqual(len(rows), 4)
+        self.assertTrue(all(row['runs'] == 5 and row['errors'] == 0 for row in rows))
+
+    def test_no_path(self):
+        # Block all paths
+        env = GridEnvironment(3, 3)
+        for r in range(3):
+            for c in range(3):
+                if (r, c) != (0, 0) and (r, c) != (2, 2):
+                    env.set_static_obstacle(r, c)
+        agent = DeliveryAgent(env, (0, 0), (2, 2))
+        path = agent.a_star(dynamic=False)
+        self.assertIsNone(path)
+
+    def test_fuel_depletion(self):
+        # Test fuel in simulation
+        from simulate import EnhancedDeliveryAgent
+        env = GridEnvironment(5, 5)
+        env.set_terrain_cost(0, 1, 2)  # Set cost to 2
+        agent = EnhancedDeliveryAgent(env, (0, 0), (4, 4), fuel=1)  # Low fuel
+        self.assertFalse(agent.can_move((0, 1)))  # Cost 2 > fuel 1
+
+    def test_fuel_aware_search(self):
+        # The direct route costs 4 but the tank holds 3, so the agent must detour via the refuel station
+        env = GridEnvironment(2, 5)
+        env.set_refuel_station(1, 2)
+        agent = DeliveryAgent(env, (0, 0), (0, 4), fuel=3)
+        result = agent.run_planner('fuel_aware')
+        self.assertTrue(result['success'])
+        self.assertIn((1, 2), result['path'])
+        self.assertEqual(result['cost'], 6)
+        self.assertEqual(result['fuel_left'], 0)
+        env.set_refuel_station(1, 2, False)
+        self.assertFalse(agent.run_planner('fuel_aware')['success'])
+        unlimited = DeliveryAgent(env, (0, 0), (0, 4)).run_planner('fuel_aware')
+        self.assertEqual(unlimited['cost'], 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,190 @@
+import unittest
+from environment import GridEnvironment, DynamicObstacle
+
+class TestGridEnvironment(unittest.TestCase):
+    def setUp(self):
+        self.env = GridEnvironment(4, 6)
+
+    def test_array_backend(self):
+        self.env.set_terrain_cost(1, 2, 5, terrain="grass")
+        self.env.set_static_obstacle(3, 0)
+        self.assertEqual(self.env.cost_grid.shape, (4, 6))
+        self.assertEqual(self.env.get_cost(1, 2), 5)
+        self.assertEqual(self.env.cost_grid[1, 2], 5)
+        self.assertEqual(self.env.get_terrain(1, 2), "grass")
+        self.assertEqual(self.env.get_terrain(0, 0), "road")
+        self.assertTrue(self.env.obstacle_grid[3, 0])
+        self.assertTrue(self.env.is_occupied(3, 0, 0))
+        self.assertFalse(self.env.is_occupied(0, 0, 0))
+        cell = self.env.get_cell(1, 2)
+        self.assertEqual((cell.cost, cell.terrain, cell.is_obstacle), (5, "grass", False))
+
+    def test_dynamic_occupancy_index(self):
+        self.env.set_static_obstacle(0, 5)
+        self.env.add_dynamic_obstacle(DynamicObstacle([(1, 1), (1, 2), (1, 3)], [2, 3, 4]))
+        self.env.add_dynamic_obstacle(DynamicObstacle([(2, 2), (1, 2)], [3, 4]))
+        self.assertTrue(self.env.is_occupied(1, 2, 3))
+        self.assertTrue(self.env.is_occupied(1, 2, 4))
+        self.assertFalse(self.env.is_occupied(1, 2, 2))
+        self.assertEqual(self.env.dynamic_cells_at(3), {(1, 2), (2, 2)})
+        self.assertEqual(self.env.dynamic_cells_at(9), set())
+        mask = self.env.occupancy_mask(4)
+        self.assertEqual(mask.shape, (4, 6))
+        self.assertEqual({tuple(p) for p in zip(*mask.nonzero())}, {(0, 5), (1, 2), (1, 3)})
+
+    def test_binary_map_round_trip(self):
+        import os
+        import pickle
+        import tempfile
+        import numpy as np
+        from map_io import load_map, save_binary
+        self.env.set_terrain_cost(1, 2, 5, terrain="grass")
+        self.env.set_static_obstacle(3, 0)
+        self.env.set_refuel_station(2, 4)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'map.bin')
+            save_binary(self.env, path)
+            env = load_map(path)
+            self.assertIsInstance(env.cost_grid, np.memmap)
+            for name in GridEnvironment.GRIDS:
+                np.testing.assert_array_equal(getattr(env, name), getattr(self.env, name))
+            self.assertEqual(env.get_terrain(1, 2), "grass")
+            self.assertIsInstance(pickle.loads(pickle.dumps(env)).cost_grid, np.memmap)
+            env.set_terrain_cost(0, 0, 9)  # edits copy the plane, the file is untouched
+            self.assertEqual(env.get_cost(0, 0), 9)
+            self.assertEqual(load_map(path).get_cost(0, 0), 1)
+            del env
+
+    def test_tiled_environment(self):
+        import os
+        import pickle
+        import tempfile
+        from agent import DeliveryAgent
+        from map_io import save_binary
+        from tiles import TiledEnvironment
+        env = GridEnvironment(12, 12)
+        for r in range(1, 11):
+            env.set_static_obstacle(r, 6)
+        env.set_terrain_cost(0, 3, 7, terrain="mud")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'map.bin')
+            save_binary(env, path)
+            tiled = TiledEnvironment(path, tile_size=4, max_bytes=3 * 4 * 4 * 7)  # room for 3 tiles
+            self.assertFalse(tiled.dense)
+            self.assertEqual((tiled.rows, tiled.cols), (12, 12))
+            self.assertEqual(tiled.get_cost(0, 3), 7)
+            self.assertEqual(tiled.get_terrain(0, 3), "mud")
+            for planner in ('a_star', 'jps', 'alt', 'wavefront'):
+                expected = DeliveryAgent(env, (11, 0), (11, 11)).run_planner('a_star')
+                result = DeliveryAgent(tiled, (11, 0), (11, 11)).run_planner(planner)
+                self.assertEqual(result['cost'], expected['cost'])
+            self.assertLessEqual(len(tiled._tiles), 3)
+            self.assertGreater(tiled.misses, 9)  # tiles were evicted and reloaded
+            self.assertGreater(tiled.hits, tiled.misses)
+            tiled.set_static_obstacle(11, 6)
+            env.set_static_obstacle(11, 6)
+            self.assertTrue(tiled.is_occupied(11, 6, 0))
+            self.assertEqual(DeliveryAgent(tiled, (11, 0), (11, 11)).run_planner('a_star')['cost'],
+                             DeliveryAgent(env, (11, 0), (11, 11)).run_planner('a_star')['cost'])
+            # Edited tiles stay under the cap: dropped ones go to scratch files and come back from there
+            lookups = tiled.hits + tiled.misses
+            for r in range(1, 12, 4):
+                for c in range(1, 12, 4):
+                    tiled.set_terrain_cost(r, c, 4)
+                    env.set_terrain_cost(r, c, 4)
+            self.assertEqual(tiled.hits + tiled.misses, lookups + 9)  # one lookup per edit
+            self.assertLessEqual(len(tiled._tiles), 3)
+            self.assertTrue(all(tiled.get_cost(r, c) == 4 for r in range(1, 12, 4) for c in range(1, 12, 4)))
+            self.assertEqual(DeliveryAgent(tiled, (0, 0), (11, 11)).run_planner('a_star')['cost'],
+                             DeliveryAgent(env, (0, 0), (11, 11)).run_planner('a_star')['cost'])
+            self.assertEqual(pickle.loads(pickle.dumps(tiled)).get_cost(1, 1), 4)
+            del tiled
+
+    def test_benchmark_map_generator(self):
+        import numpy as np
+        from benchmark import generate_map, bench_planner, compare, run_suite
+        env = generate_map(30, 40, density=0.3, terrain={1: 1, 4: 1}, dynamic_obstacles=3, seed=7)
+        again = generate_map(30, 40, density=0.3, terrain={1: 1, 4: 1}, dynamic_obstacles=3, seed=7)
+        self.assertTrue((env.cost_grid == again.cost_grid).all())
+        self.assertTrue((env.obstacle_grid == again.obstacle_grid).all())
+        self.assertEqual([o.path for o in env.dynamic_obstacles], [o.path for o in again.dynamic_obstacles])
+        self.assertEqual(len(env.dynamic_obstacles), 3)
+        self.assertEqual(set(np.unique(env.cost_grid)), {1, 4})
+        self.assertAlmostEqual(env.obstacle_grid.mean(), 0.3, delta=0.05)
+        self.assertFalse(env.obstacle_grid[0, 0] or env.obstacle_grid[29, 39])
+        row = bench_planner(env, 'a_star', (0, 0), (29, 39), trials=3)
+        self.assertEqual(row['trials'], 3)
+        self.assertLessEqual(row['min'], row['median'])
+        self.assertLessEqual(row['median'], row['p95'])
+        self.assertGreater(row['peak_kib'], 0)
+        # Cold trials rebuild what the planner caches on the map; warm ones reuse it
+        field = bench_planner(env, 'wavefront', (0, 0), (29, 39), trials=3, memory=False)
+        self.assertGreater(field['cold_median'], field['median'])
+        self.assertEqual(field['cost'], row['cost'])
+        rows = run_suite([10], ['a_star', 'jps', 'wavefront'], dynamic_obstacles=2, trials=1, memory=False)
+        self.assertEqual([r['planner'] for r in rows], ['a_star'])  # the others would only time a_star
+        row['map'] = 'm'
+        slower = dict(row, median=row['median'] * 2)
+        self.assertFalse(compare([row], [row])[0]['regression'])
+        self.assertTrue(compare([slower], [row], tolerance=0.5)[0]['regression'])
+        self.assertTrue(compare([dict(row, cold_median=row['cold_median'] * 2)], [row], tolerance=0.5)[0]['regression'])
+
+    def test_obstacle_feed_window(self):
+        import itertools
+        from obstacle_feed import ObstacleFeed
+        env = GridEnvironment(5, 5)
+        env.add_dynamic_obstacle(DynamicObstacle([(1, 1), (1, 2)], [1, 2]))
+        changes = []
+        env.subscribe(lambda kind, cells: changes.append((kind, cells)))
+        # An endless stream: a vehicle sweeping row 3, one column per step
+        traffic = ((t, 3, t % 5) for t in itertools.count())
+        feed = ObstacleFeed(env, traffic, horizon=4)
+        self.assertTrue(env.is_occupied(1, 1, 1))
+        self.assertTrue(env.is_occupied(3, 4, 4))
+        self.assertFalse(env.is_occupied(3, 0, 5))  # beyond the window, not read yet
+        for now in range(1, 1000):
+            feed.advance(now)
+        # The environment counts time from now: step 0 is 999
+        self.assertTrue(env.is_occupied(3, 999 % 5, 0))
+        self.assertTrue(env.is_occupied(3, 1003 % 5, 4))
+        self.assertFalse(any(env.is_occupied(1, 1, t) for t in range(5)))  # expired
+        self.assertEqual(sorted(env.occupancy.by_time), list(range(5)))
+        self.assertEqual(feed.stats()['window_entries'], 5)
+        self.assertEqual(env.safe_intervals(3, 0), [(0, 0), (2, float('inf'))])
+        self.assertEqual(changes[-1], ('dynamic_release', [(3, c) for c in range(5)]))  # every cell's steps moved
+        feed.observe(1002, 0, 0)
+        feed.observe(2000, 4, 4)
+        self.assertTrue(env.is_occupied(0, 0, 3))
+        self.assertFalse(env.is_occupied(4, 4, 1001))
+        self.assertEqual(feed.stats()['pending'], 2)  # the pushed one and the next from the stream
+        # Expired obstacles stop blocking cached planners; a replan from now avoids one arriving at now + 1
+        from agent import DeliveryAgent
+        env = GridEnvironment(2, 3)
+        feed = ObstacleFeed(env, [(t, 0, 1) for t in (1, 2, 3, 6)], horizon=4)
+        agent = DeliveryAgent(env, (0, 0), (0, 2))
+        self.assertEqual(agent.run_planner('a_star', dynamic=True)['cost'], 4)
+        feed.advance(4)
+        self.assertEqual(agent.run_planner('a_star', dynamic=True)['cost'], 2)
+        feed.advance(5)
+        result = agent.run_planner('a_star', dynamic=True)
+        self.assertEqual(result['cost'], 4)
+        self.assertNotEqual(result['path'][1], (0, 1))
+        # Cached results don't outlive the obstacle that shaped them
+        from path_cache import PathCache
+        env = GridEnvironment(1, 10)
+        feed = ObstacleFeed(env, [(0, 0, 5), (1, 0, 5)])
+        agent = DeliveryAgent(env, (0, 0), (0, 9), cache=PathCache(env))
+        planners = ('a_star', 'uniform_cost', 'bfs')
+        self.assertFalse(any(agent.run_planner(planner)['success'] for planner in planners))
+        feed.advance(2)
+        for planner in planners:
+            result = agent.run_planner(planner)
+            self.assertTrue(result['success'])
+            self.assertNotIn('cached', result)
+
+    def test_neighbors_in_bounds(self):
+        self.assertEqual(self.env.neighbors(0, 0), [(1, 0), (0, 1)])
+        self.assertEqual(len(self.env.neighbors(2, 3)), 4)
+
+if __name__ == '__main__':
+    unittest.main()
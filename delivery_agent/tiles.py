@@ -0,0 +1,182 @@
+"""
+Tiled environment for maps too large to hold in memory: the grid stays in a
+binary map file (see map_io) and fixed-size square tiles are copied in on
+demand, with the least recently used tiles dropped once a memory cap is hit.
+"""
+import os
+import tempfile
+from collections import OrderedDict
+from typing import Dict, Tuple
+import numpy as np
+from environment import GridEnvironment, Cell
+from map_io import open_planes
+
+Tile = Dict[str, np.ndarray]  # grid name (GridEnvironment.GRIDS) -> tile-sized array
+
+class TiledEnvironment(GridEnvironment):
+    """
+    Same interface as GridEnvironment (neighbors, get_cost, is_occupied, the
+    setters, dynamic obstacles and change listeners), but without whole-grid
+    arrays: dense is False, and planners that need the arrays fall back to
+    A*. hits and misses count tile lookups. Edited tiles count towards the
+    cap like any other; when one is dropped it is written to a scratch
+    directory and read back from there (the map file is never written).
+    """
+    dense = False
+
+    def __init__(self, path: str, tile_size: int = 256, max_bytes: int = 256 * 2 ** 20):
+        self.path = path
+        self.tile_size = tile_size
+        self.max_bytes = max_bytes
+        self._open()
+        self.rows, self.cols = self._planes['cost_grid'].shape
+        self._init_state()
+        self.terrain_types = list(self._terrain_types)
+        self.tile_bytes = tile_size * tile_size * sum(plane.dtype.itemsize for plane in self._planes.values())
+        self.max_tiles = max(1, max_bytes // self.tile_bytes)
+        self._tiles: 'OrderedDict[Tuple[int, int], Tile]' = OrderedDict()
+        self._edited = set()  # tiles that differ from the map file
+        self._spilled = set()  # edited tiles written to the scratch directory
+        self._scratch = None  # tempfile.TemporaryDirectory, created on the first spill
+        self._has_stations = None
+        self.hits = 0
+        self.misses = 0
+
+    def _open(self):
+        self._planes, self._terrain_types = open_planes(self.path)
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        # The receiver reopens the map file; only edited tiles travel with it
+        state['_planes'] = None
+        state['_tiles'] = OrderedDict((key, self._edited_tile(key)) for key in self._edited)
+        state['_spilled'] = set()
+        state['_scratch'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._open()
+
+    @property
+    def resident_bytes(self) -> int:
+        return len(self._tiles) * self.tile_bytes
+
+    def _tile(self, row: int, col: int) -> Tuple[Tile, int, int]:
+        """
+        The tile holding a cell, plus the cell's offsets inside it.
+        """
+        size = self.tile_size
+        key = (row // size, col // size)
+        tile = self._tiles.get(key)
+        if tile is None:
+            self.misses += 1
+            tile = self._load(key)
+        else:
+            self.hits += 1
+            self._tiles.move_to_end(key)
+        return tile, row - key[0] * size, col - key[1] * size
+
+    def _load(self, key: Tuple[int, int]) -> Tile:
+        if key in self._spilled:
+            tile = self._read_spill(key)
+        else:
+            size = self.tile_size
+            r0, c0 = key[0] * size, key[1] * size
+            tile = {name: np.array(plane[r0:r0 + size, c0:c0 + size]) for name, plane in self._planes.items()}
+        self._tiles[key] = tile
+        while len(self._tiles) > self.max_tiles:
+            old, dropped = self._tiles.popitem(last=False)
+            if old in self._edited:
+                self._spill(old, dropped)
+        return tile
+
+    def _spill_path(self, key: Tuple[int, int]) -> str:
+        return os.path.join(self._scratch.name, f"{key[0]}_{key[1]}.npz")
+
+    def _spill(self, key: Tuple[int, int], tile: Tile):
+        if self._scratch is None:
+            self._scratch = tempfile.TemporaryDirectory(prefix='tiles-')
+        np.savez(self._spill_path(key), **tile)
+        self._spilled.add(key)
+
+    def _read_spill(self, key: Tuple[int, int]) -> Tile:
+        with np.load(self._spill_path(key)) as data:
+            return {name: data[name] for name in data.files}
+
+    def _edited_tile(self, key: Tuple[int, int]) -> Tile:
+        """
+        An edited tile from memory or the scratch directory, without caching it or counting a lookup.
+        """
+        tile = self._tiles.get(key)
+        return tile if tile is not None else self._read_spill(key)
+
+    def _edit(self, row: int, col: int):
+        """
+        Record that the tile holding a cell no longer matches the map file.
+        """
+        self._edited.add((row // self.tile_size, col // self.tile_size))
+
+    def set_static_obstacle(self, row: int, col: int):
+        tile, r, c = self._tile(row, col)
+        if not tile['obstacle_grid'][r, c]:
+            self._edit(row, col)
+            tile['obstacle_grid'][r, c] = True
+            self._notify('obstacle', [(row, col)])
+
+    def set_terrain_cost(self, row: int, col: int, cost: int, terrain: str = "road"):
+        tile, r, c = self._tile(row, col)
+        self._edit(row, col)
+        old_cost = tile['cost_grid'][r, c]
+        tile['cost_grid'][r, c] = cost
+        tile['terrain_grid'][r, c] = self.terrain_code(terrain)
+        if cost != old_cost:
+            self._notify('cost_increase' if cost > old_cost else 'cost_decrease', [(row, col)])
+
+    def set_refuel_station(self, row: int, col: int, refuel: bool = True):
+        tile, r, c = self._tile(row, col)
+        if tile['refuel_grid'][r, c] != refuel:
+            self._edit(row, col)
+            tile['refuel_grid'][r, c] = refuel
+            self._has_stations = True if refuel else None
+            self._notify('refuel', [(row, col)])
+
+    def is_refuel_station(self, row: int, col: int) -> bool:
+        tile, r, c = self._tile(row, col)
+        return bool(tile['refuel_grid'][r, c])
+
+    def has_refuel_stations(self) -> bool:
+        if self._has_stations is None:
+            # Scanned straight from the file (edited tiles from memory), without filling the cache
+            size = self.tile_size
+            plane = self._planes['refuel_grid']
+            self._has_stations = any(
+                (self._edited_tile((r // size, c // size))['refuel_grid'] if (r // size, c // size) in self._edited
+                 else plane[r:r + size, c:c + size]).any()
+                for r in range(0, self.rows, size) for c in range(0, self.cols, size))
+        return self._has_stations
+
+    def get_terrain(self, row: int, col: int) -> str:
+        tile, r, c = self._tile(row, col)
+        return self.terrain_types[tile['terrain_grid'][r, c]]
+
+    def get_cell(self, row: int, col: int) -> Cell:
+        tile, r, c = self._tile(row, col)
+        return Cell(int(tile['cost_grid'][r, c]), self.terrain_types[tile['terrain_grid'][r, c]], bool(tile['obstacle_grid'][r, c]))
+
+    def is_occupied(self, row: int, col: int, time: int) -> bool:
+        tile, r, c = self._tile(row, col)
+        if tile['obstacle_grid'][r, c]:
+            return True
+        return self.occupancy.occupied((row, col), time)
+
+    def is_static_obstacle(self, row: int, col: int) -> bool:
+        tile, r, c = self._tile(row, col)
+        return bool(tile['obstacle_grid'][r, c])
+
+    def occupancy_mask(self, time: int) -> np.ndarray:
+        raise TypeError("TiledEnvironment has no whole-grid arrays; use is_occupied")
+
+    def get_cost(self, row: int, col: int) -> int:
+        tile, r, c = self._tile(row, col)
+        return int(tile['cost_grid'][r, c])